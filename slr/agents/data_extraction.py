@@ -0,0 +1,320 @@
+# slr/agents/data_extraction.py
+"""
+LLM-assisted data extraction for c04 (fields from the Planning Step 6 form).
+
+For every paper:
+1. its full text (stored PDF, via slr/pdf/extract.py; the abstract otherwise)
+   is cut into chunks (slr/embed/snippets.py) and, for each form field, the
+   chunks most similar to "<field name>: <description>" are retrieved;
+2. one call asks the LLM to fill all fields at once, citing the passage
+   used per field; values are coerced to the field types (number, boolean,
+   select choices, ...);
+3. the result is checkpointed (slr/store/checkpoints.py) before the next
+   paper completes, so a re-run resumes and only new papers, or papers
+   whose PDF changed, are sent again.
+
+Metadata fields already present in the paper row (title, authors, year, id,
+url, abstract) are not asked for. Papers run concurrently (`workers`).
+
+    res = extract_papers(papers, fields, pdf_ids=ids, workers=8)
+    res["rows"][i]  # {"values": {key: value}, "evidence": {key: "passage"}, "source": "pdf" | "abstract"}
+"""
+from __future__ import annotations
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from slr.llm.client import LLMClient
+
+PROMPT_VERSION = 1
+# passages per field, and the per-paper passage budget (tokens, ~4 chars each)
+K_PER_FIELD = 2
+PASSAGE_TOKENS = 1800
+MAX_CONSECUTIVE_ERRORS = 3
+
+SYSTEM = """You are an assistant for systematic literature reviews.
+You fill in a data extraction form for one paper, using only the paper's metadata and the
+numbered passages from its full text. If the paper does not state a value, use null; never guess.
+Respond STRICTLY with JSON, no commentary.
+"""
+
+JSON_OBJECT_RE = re.compile(r"\{[\s\S]*\}")
+METADATA_KEYS = ("title", "authors", "year", "id", "url", "abstract")
+
+
+def _extract_json(text: str) -> Dict[str, Any]:
+    m = JSON_OBJECT_RE.search((text or "").strip())
+    if not m:
+        raise ValueError("Model did not return JSON.")
+    return json.loads(m.group(0))
+
+
+def field_key(f: Dict[str, Any]) -> str:
+    return str(f.get("key") or str(f.get("name", "")).lower().replace(" ", "_"))
+
+
+def field_query(f: Dict[str, Any]) -> str:
+    desc = str(f.get("desc") or f.get("help") or "").strip()
+    return f"{f.get('name') or field_key(f)}: {desc}" if desc else str(f.get("name") or field_key(f))
+
+
+def metadata_values(paper: Dict[str, Any]) -> Dict[str, Any]:
+    """Values the paper row already provides for the fixed metadata fields."""
+    authors = paper.get("authors")
+    if isinstance(authors, list):
+        authors = ", ".join(str(a.get("name", a) if isinstance(a, dict) else a) for a in authors)
+    year = str(paper.get("year") or "").strip() or str(paper.get("published") or "")[:4]
+    out = {
+        "title": paper.get("title"),
+        "authors": authors,
+        "year": year if year.isdigit() else "",
+        "id": paper.get("id") or paper.get("arxiv_id") or paper.get("doi"),
+        "url": paper.get("url") or paper.get("link"),
+        "abstract": paper.get("abstract") or paper.get("summary"),
+    }
+    return {k: str(v).strip() for k, v in out.items() if str(v or "").strip()}
+
+
+def coerce_value(f: Dict[str, Any], value: Any) -> Any:
+    """Cast an LLM value to the form field's type; None when it does not fit."""
+    if value is None or (isinstance(value, str) and value.strip().lower() in ("", "null", "n/a", "not reported")):
+        return None
+    ftype = str(f.get("type") or "text").lower()
+    choices = [str(c) for c in f.get("choices") or []]
+    if ftype == "number":
+        m = re.search(r"-?\d+(?:\.\d+)?", str(value))
+        if not m:
+            return None
+        num = float(m.group(0))
+        return int(num) if num.is_integer() else num
+    if ftype == "boolean":
+        if isinstance(value, bool):
+            return value
+        s = str(value).strip().lower()
+        return True if s in ("true", "yes", "y", "1") else False if s in ("false", "no", "n", "0") else None
+    if ftype == "multiselect":
+        items = value if isinstance(value, list) else re.split(r"[;,]", str(value))
+        items = [str(v).strip() for v in items if str(v).strip()]
+        if choices:
+            lower = {c.lower(): c for c in choices}
+            items = [lower[v.lower()] for v in items if v.lower() in lower]
+        return items or None
+    if ftype == "select" and choices:
+        lower = {c.lower(): c for c in choices}
+        return lower.get(str(value).strip().lower())
+    if isinstance(value, (list, dict)):
+        return ", ".join(map(str, value)) if isinstance(value, list) else json.dumps(value, ensure_ascii=False)
+    return str(value).strip()
+
+
+def retrieve_passages(
+    texts: Sequence[str],
+    fields: Sequence[Dict[str, Any]],
+    k_per_field: int = K_PER_FIELD,
+    max_tokens: int = PASSAGE_TOKENS,
+) -> List[Tuple[List[str], Dict[str, List[int]]]]:
+    """
+    Per text: (passages in document order, {field key: [passage numbers]}).
+    Each field contributes its k most similar chunks until max_tokens is spent;
+    all chunks of all texts are embedded in one cached call.
+    """
+    from slr.embed.sbert import encode_cached
+    from slr.embed.snippets import CHARS_PER_TOKEN, chunk_text
+
+    per_text = [chunk_text(t or "") for t in texts]
+    flat = [c for chunks in per_text for c in chunks]
+    keys = [field_key(f) for f in fields]
+    if not flat or not fields:
+        return [(chunks[:1], {}) for chunks in per_text]
+    Q = encode_cached([field_query(f) for f in fields])
+    sims = encode_cached(flat) @ Q.T  # (chunks, fields)
+
+    out: List[Tuple[List[str], Dict[str, List[int]]]] = []
+    budget = int(max_tokens) * CHARS_PER_TOKEN
+    pos = 0
+    for chunks in per_text:
+        S = sims[pos:pos + len(chunks)]
+        pos += len(chunks)
+        picked: Dict[int, None] = {}
+        used = 0
+        wanted: Dict[str, List[int]] = {}
+        # round-robin over fields: every field gets its best chunk before any gets a second one
+        ranks = [np.argsort(-S[:, j], kind="stable")[:k_per_field] for j in range(len(fields))]
+        for r in range(k_per_field):
+            for j, key in enumerate(keys):
+                if r >= len(ranks[j]):
+                    continue
+                c = int(ranks[j][r])
+                if c not in picked:
+                    if used + len(chunks[c]) > budget:
+                        continue
+                    picked[c] = None
+                    used += len(chunks[c])
+                wanted.setdefault(key, []).append(c)
+        order = sorted(picked)
+        number = {c: n for n, c in enumerate(order, 1)}
+        out.append(([chunks[c] for c in order], {k: [number[c] for c in cs] for k, cs in wanted.items()}))
+    return out
+
+
+def build_prompt(
+    paper: Dict[str, Any],
+    fields: Sequence[Dict[str, Any]],
+    passages: List[str],
+    hints: Dict[str, List[int]],
+) -> str:
+    meta = metadata_values(paper)
+    lines = [f"Title: {meta.get('title', '')}"]
+    if meta.get("abstract"):
+        lines.append(f"Abstract: {meta['abstract']}")
+    lines.append("")
+    if passages:
+        lines.append("Passages from the full text:")
+        for n, p in enumerate(passages, 1):
+            lines.append(f"[P{n}] {p}")
+        lines.append("")
+    lines.append("Fields to fill:")
+    for f in fields:
+        key = field_key(f)
+        spec = f"- {key} ({f.get('type') or 'text'}): {field_query(f)}"
+        if f.get("choices"):
+            spec += f" | choose from: {', '.join(map(str, f['choices']))}"
+        if hints.get(key):
+            spec += f" | see {', '.join(f'P{n}' for n in hints[key])}"
+        lines.append(spec)
+    lines.append("")
+    lines.append(
+        'Return STRICT JSON: {"values": {"<field key>": <value or null>}, '
+        '"evidence": {"<field key>": "P<n>" or "abstract"}} with every field key listed above.'
+    )
+    return "\n".join(lines)
+
+
+def extract_papers(
+    papers: List[Dict[str, Any]],
+    fields: List[Dict[str, Any]],
+    *,
+    client: Optional[LLMClient] = None,
+    model: str = "gpt-oss-120b",
+    pdf_ids: Optional[List[Optional[str]]] = None,
+    max_pages: int = 10,
+    temperature: float = 0.0,
+    resume: bool = True,
+    workers: int = 4,
+    store: Any = None,
+    on_progress: Optional[Callable[[float, str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Fill `fields` for every paper. `pdf_ids` (aligned with papers) are keys of
+    stored PDFs. Returns {"rows": [...aligned with papers, None for failures],
+    "stats": {...}, "errors": [...]}.
+    """
+    from slr.pdf.extract import extract_pages
+    from slr.store.checkpoints import CheckpointStore, run_id_for
+    from slr.store.keys import canonical_paper_id
+    from slr.store.pdfs import get_pdf_store
+
+    def progress(frac: float, msg: str) -> None:
+        if on_progress:
+            on_progress(frac, msg)
+
+    client = client or LLMClient(model=model)
+    store = store or CheckpointStore()
+    settings = {
+        "fields": [{k: f.get(k) for k in ("key", "name", "type", "desc", "help", "choices")} for f in fields],
+        "model": client.model,
+        "temperature": float(temperature),
+        "max_pages": int(max_pages),
+        "prompt": PROMPT_VERSION,
+    }
+    run_id = run_id_for("extraction", settings)
+    store.open_run(run_id, "extraction", settings, fresh=not resume)
+
+    n = len(papers)
+    pdf_ids = list(pdf_ids or [None] * n)
+    shas = get_pdf_store().shas([p for p in pdf_ids if p])
+    # checkpoint key: paper + PDF content, so fetching a PDF later re-extracts that paper
+    ckeys = [
+        (canonical_paper_id(p) or f"row:{i}") + (f"#{shas[pdf_ids[i]][:16]}" if pdf_ids[i] in shas else "")
+        for i, p in enumerate(papers)
+    ]
+    saved = store.load(run_id, ckeys)
+    rows: List[Optional[Dict[str, Any]]] = [saved.get(k) for k in ckeys]
+    todo = [i for i in range(n) if rows[i] is None]
+    stats: Dict[str, Any] = {"run_id": run_id, "total": n, "resumed": n - len(todo), "llm_calls": 0,
+                             "with_pdf": 0, "stopped_early": False}
+    errors: List[str] = []
+    if not todo:
+        progress(1.0, "All papers already extracted")
+        return {"rows": rows, "stats": {**stats, "remaining": 0}, "errors": errors}
+
+    progress(0.02, f"Reading full text of {len(todo)} papers…")
+    pages = extract_pages([pdf_ids[i] for i in todo if pdf_ids[i] in shas], max_pages=max_pages)
+    texts, sources = [], []
+    for i in todo:
+        body = "\n\n".join(pages.get(pdf_ids[i]) or []).strip() if pdf_ids[i] else ""
+        sources.append("pdf" if body else "abstract")
+        texts.append(body)
+    stats["with_pdf"] = sources.count("pdf")
+
+    progress(0.1, "Retrieving passages per field…")
+    meta_per_paper = [metadata_values(papers[i]) for i in todo]
+    retrieved = retrieve_passages(texts, fields)
+
+    def run(t: int) -> Tuple[int, Dict[str, Any]]:
+        i = todo[t]
+        ask = [f for f in fields if field_key(f) not in meta_per_paper[t]]
+        values: Dict[str, Any] = {k: v for k, v in meta_per_paper[t].items() if k in {field_key(f) for f in fields}}
+        evidence: Dict[str, str] = {k: "metadata" for k in values}
+        if ask:
+            passages, hints = retrieved[t]
+            raw = client.chat(system=SYSTEM, user=build_prompt(papers[i], ask, passages, hints),
+                              temperature=temperature, request_timeout=90.0)
+            data = _extract_json(raw)
+            got = data.get("values") if isinstance(data.get("values"), dict) else data
+            cites = data.get("evidence") if isinstance(data.get("evidence"), dict) else {}
+            for f in ask:
+                key = field_key(f)
+                v = coerce_value(f, got.get(key))
+                if v is None:
+                    continue
+                values[key] = v
+                cite = str(cites.get(key) or "").strip()
+                ref = cite.upper().lstrip("P")
+                if ref.isdigit() and 0 < int(ref) <= len(passages):
+                    evidence[key] = passages[int(ref) - 1]
+                elif cite.lower() == "abstract":
+                    evidence[key] = "abstract"
+        return t, {"values": values, "evidence": evidence, "source": sources[t], "asked": len(ask)}
+
+    consecutive = 0
+    ex = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+    try:
+        futures = {ex.submit(run, t): t for t in range(len(todo))}
+        for done, fut in enumerate(as_completed(futures), 1):
+            if fut.cancelled():
+                continue
+            t = futures[fut]
+            try:
+                _, res = fut.result()
+            except Exception as e:
+                errors.append(f"Paper {todo[t] + 1}: {e}")
+                consecutive += 1
+                if consecutive >= MAX_CONSECUTIVE_ERRORS and not stats["stopped_early"]:
+                    stats["stopped_early"] = True
+                    for f in futures:
+                        f.cancel()
+                continue
+            consecutive = 0
+            stats["llm_calls"] += int(res["asked"] > 0)
+            store.save_many(run_id, [(ckeys[todo[t]], res)])
+            rows[todo[t]] = res
+            progress(0.1 + 0.9 * done / len(todo), f"Extracted {done}/{len(todo)} papers")
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+    stats["remaining"] = sum(1 for r in rows if r is None)
+    return {"rows": rows, "stats": stats, "errors": errors}
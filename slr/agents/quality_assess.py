@@ -0,0 +1,230 @@
+# slr/agents/quality_assess.py
+from __future__ import annotations
+import json, re
+from typing import Dict, Any, List, Optional, Tuple
+from slr.llm.client import LLMClient
+
+SYSTEM = """You are an assistant for systematic literature reviews.
+You rate papers against a short quality checklist. Respond STRICTLY with JSON, no commentary.
+"""
+
+# Fixed mapping – same as Planning Step 5
+Y_VAL = 1.0
+P_VAL = 0.5
+N_VAL = 0.0
+
+
+def _coerce_float(x, default=1.0) -> float:
+    try:
+        return float(x)
+    except Exception:
+        return float(default)
+
+
+def checklist_items(qcheck: Dict[str, Any]) -> Tuple[List[str], List[float], str, float]:
+    """
+    Normalize a Planning Step 5 checklist.
+    Questions may be list[str] or list[dict{text, weight, keep}].
+    Returns (questions, weights, scheme, cutoff) — cutoff falls back to legacy 'min_total'.
+    """
+    raw_qs = qcheck.get("questions") or []
+    questions: List[str] = []
+    weights: List[float] = []
+    if raw_qs and isinstance(raw_qs[0], dict):
+        for q in raw_qs:
+            if not q.get("text") or (q.get("keep") is False):
+                continue
+            questions.append(q["text"])
+            weights.append(_coerce_float(q.get("weight", 1.0)))
+    else:
+        for q in raw_qs:
+            q = (q or "").strip()
+            if q:
+                questions.append(q)
+                weights.append(1.0)
+    scheme = (qcheck.get("scheme") or "Y/P/N").upper()  # "Y/N" or "Y/P/N"
+    cutoff = _coerce_float(qcheck.get("cutoff", qcheck.get("min_total", 0.0)), 0.0)
+    return questions, weights, scheme, cutoff
+
+
+def extract_json_block(txt: str) -> Optional[dict]:
+    """
+    Best-effort: pull the first JSON object from a model reply that may include
+    prose or code fences. Returns dict or None.
+    """
+    if not txt:
+        return None
+    # Try fenced ```json ... ```
+    m = re.search(r"```json\s*(\{[\s\S]*?\})\s*```", txt, flags=re.IGNORECASE)
+    if m:
+        try:
+            return json.loads(m.group(1))
+        except Exception:
+            pass
+    # Try first {...} object
+    m = re.search(r"(\{[\s\S]*\})", txt.strip())
+    if m:
+        try:
+            return json.loads(m.group(1))
+        except Exception:
+            pass
+    # Plain attempt
+    try:
+        return json.loads(txt)
+    except Exception:
+        return None
+
+
+def score_map(scheme: str) -> Dict[str, float]:
+    m = {"Y": Y_VAL, "P": P_VAL if "P" in scheme else 0.0, "N": N_VAL}
+    if scheme == "Y/N":
+        m.pop("P", None)
+    return m
+
+
+def build_user_prompt_for_paper(
+    paper: Dict[str, Any],
+    questions: List[str],
+    weights: List[float],
+    scheme: str = "Y/P/N",
+) -> str:
+    """
+    Build a strict, compact prompt per paper.
+    """
+    title = paper.get("title","").strip()
+    abstract = (paper.get("summary","") or "").strip()
+    pub = paper.get("published","")
+    cat = paper.get("category","")
+    max_possible = sum(weights)
+
+    scheme_line = "Allowed answers per question: Y or N." if scheme == "Y/N" else "Allowed answers per question: Y, P (Partial), or N."
+
+    # checklist text with weights
+    checklist_lines = []
+    for i, (q, w) in enumerate(zip(questions, weights), start=1):
+        checklist_lines.append(f"{i}. {q} (weight {w:g})")
+    checklist_text = "\n".join(checklist_lines)
+
+    mapping_text = ", ".join([f"{k}={v:g}" for k, v in score_map(scheme).items()])
+
+    # Require strict JSON
+    rubric = f"""
+Paper:
+- Title: {title}
+- Abstract: {abstract}
+- Published: {pub}
+- Category: {cat}
+
+Quality checklist:
+{checklist_text}
+
+Scoring:
+- {scheme_line}
+- Numeric mapping: {mapping_text}
+- Total score is sum of (answer_score * weight).
+- Also return percentage of max possible ({max_possible:g}).
+
+Output JSON ONLY with the following shape (no extra text):
+{{
+  "answers": ["Y", "P", "N", ...],          // length = {len(questions)}
+  "justifications": ["one sentence per Q", ...],
+  "score_per_question": [float, ...],       // after applying mapping * weight
+  "total_score": float,
+  "total_score_pct": float,                 // 0..100
+  "decision": "include" | "exclude" | "unsure"
+}}
+Rules:
+- If evidence is insufficient, answer 'P' (if allowed) or 'N', and you may set decision='unsure'.
+- Keep justifications SHORT (<= 20 words).
+- Never output markdown or prose; JSON ONLY.
+"""
+    return rubric.strip()
+
+
+def apply_quality_reply(
+    paper: Dict[str, Any],
+    resp: str,
+    questions: List[str],
+    weights: List[float],
+    scheme: str,
+    cut_off: float,
+) -> Dict[str, Any]:
+    """Parse a model reply, recompute totals and attach QA fields to a copy of `paper`."""
+    parsed = extract_json_block(resp) or {}
+    answers = parsed.get("answers") or []
+    justifs = parsed.get("justifications") or []
+    per_q = parsed.get("score_per_question") or []
+    smap = score_map(scheme)
+    max_possible = sum(weights)
+
+    # compute totals ourselves (trust, but verify)
+    # Map answers -> base score, then multiply by weight
+    def base_for(a: str) -> float:
+        a = (a or "").strip().upper()
+        return float(smap.get(a, N_VAL))
+
+    if not per_q or len(per_q) != len(questions):
+        per_q = []
+        for i in range(len(questions)):
+            base = base_for(answers[i] if i < len(answers) else "N")
+            per_q.append(base * weights[i])
+
+    total = float(sum(per_q))
+    pct = float(0.0 if max_possible <= 0 else (total / max_possible) * 100.0)
+
+    # LLM's own decision (for info only)
+    ai_decision_raw = (parsed.get("decision", "") or "").lower()
+
+    # attach QA + decisions to paper
+    enriched = dict(paper)
+    enriched["qa"] = {
+        "answers": answers[:len(questions)],
+        "justifications": justifs[:len(questions)],
+        "score_per_question": per_q[:len(questions)],
+    }
+    enriched["total_score"] = round(total, 4)
+    enriched["total_score_pct"] = round(pct, 2)
+    # score-based decision used for inclusion/exclusion
+    enriched["decision"] = "include" if total >= float(cut_off) else "exclude"
+    # keep the model's own decision separately
+    enriched["ai_decision_raw"] = ai_decision_raw or "unsure"
+    return enriched
+
+
+def quality_buckets(
+    rows: List[Dict[str, Any]],
+    cut_off: float,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split scored rows by the cut-off (re-derivable without new LLM calls):
+    score >= cut-off -> include; below it the model's own 'unsure' is kept apart.
+    Updates each row's `decision`. Returns (included, excluded, unsure).
+    """
+    incl, excl, unsure = [], [], []
+    for r in rows:
+        score = float(r.get("total_score", 0.0))
+        r["decision"] = "include" if score >= float(cut_off) else "exclude"
+        ai_dec = (r.get("ai_decision_raw", "") or "").lower()
+
+        if score >= float(cut_off):
+            incl.append(r)
+        elif ai_dec == "unsure":
+            unsure.append(r)
+        else:
+            excl.append(r)
+    return incl, excl, unsure
+
+
+def score_paper(
+    client: LLMClient,
+    paper: Dict[str, Any],
+    questions: List[str],
+    weights: List[float],
+    scheme: str,
+    cut_off: float,
+    temperature: float = 0.2,
+) -> Dict[str, Any]:
+    """One LLM call for one paper; LLM errors are raised to the caller."""
+    user = build_user_prompt_for_paper(paper, questions, weights, scheme)
+    resp = client.chat(system=SYSTEM, user=user, temperature=temperature)
+    return apply_quality_reply(paper, resp, questions, weights, scheme, cut_off)
@@ -0,0 +1,310 @@
+# slr/agents/screening.py
+from __future__ import annotations
+import json, re
+from typing import Dict, List, Optional, Callable, Iterable, Any, Tuple
+from slr.llm.client import LLMClient
+
+DECISIONS = {"include", "exclude", "unsure"}
+
+
+def safe_list(x):
+    return x if isinstance(x, list) else []
+
+
+def parse_year(dt_str: str) -> Optional[int]:
+    if not dt_str:
+        return None
+    m = re.match(r"(\d{4})", dt_str)
+    return int(m.group(1)) if m else None
+
+
+def build_policy_text(crit_norm: Dict, research_questions: List[str]) -> str:
+    inc = safe_list(crit_norm.get("inclusion", []))
+    exc = safe_list(crit_norm.get("exclusion", []))
+    rqs = safe_list(research_questions)
+
+    lines = []
+    if rqs:
+        lines.append("RESEARCH QUESTIONS:")
+        for i, rq in enumerate(rqs, 1):
+            lines.append(f"- RQ{i}: {rq}")
+        lines.append("")
+    if inc:
+        lines.append("INCLUSION CRITERIA:")
+        for i, c in enumerate(inc, 1):
+            lines.append(f"- I{i}: {c}")
+        lines.append("")
+    if exc:
+        lines.append("EXCLUSION CRITERIA:")
+        for i, c in enumerate(exc, 1):
+            lines.append(f"- E{i}: {c}")
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+def paper_to_text(r: Dict) -> str:
+    authors = ", ".join(r.get("authors", [])) if isinstance(r.get("authors"), list) else (r.get("authors") or "")
+    # If abstracts are huge and you hit token limits, you can trim here, e.g. summary[:2000]
+    return (
+        f"ID: {r.get('id','')}\n"
+        f"Title: {r.get('title','').strip()}\n"
+        f"Authors: {authors}\n"
+        f"Year: {parse_year(r.get('published','')) or ''}\n"
+        f"Category: {r.get('category','')}\n"
+        f"Abstract: {r.get('summary','').strip()}\n"
+        f"Link: {r.get('link','')}\n"
+    ).strip()
+
+
+def parse_ai_array(s: str) -> Optional[List[Dict]]:
+    """
+    Extract one top-level JSON object with key 'results' that contains a list.
+    Be forgiving if the model wrapped it with prose.
+    """
+    # try direct parse
+    try:
+        obj = json.loads(s)
+        if isinstance(obj, dict) and isinstance(obj.get("results"), list):
+            return obj["results"]
+    except Exception:
+        pass
+
+    # fallback: extract first {...}
+    m = re.search(r'\{.*\}', s, flags=re.DOTALL)
+    if not m:
+        return None
+    try:
+        obj = json.loads(m.group(0))
+        if isinstance(obj, dict) and isinstance(obj.get("results"), list):
+            return obj["results"]
+    except Exception:
+        return None
+    return None
+
+
+def batched(lst, n):
+    for i in range(0, len(lst), n):
+        yield lst[i:i+n]
+
+
+def make_system_prompt() -> str:
+    return (
+        "You are assisting a systematic literature review. "
+        "Decide if a candidate paper should be INCLUDED, EXCLUDED, or marked as UNSURE "
+        "based strictly on the provided Research Questions and Inclusion/Exclusion criteria. "
+        "Respond ONLY with compact JSON using this exact structure:\n"
+        "{ \"results\": [\n"
+        "  {\"decision\":\"include|exclude|unsure\",\"reason\":\"...\",\"matched_rules\":[\"...\"]},\n"
+        "  ... one item per paper in the batch ...\n"
+        "]}\n"
+        "If information is insufficient or ambiguous, use 'unsure'. Be concise."
+    )
+
+
+def make_user_prompt(policy: str, papers: List[Dict]) -> str:
+    """
+    Ask the model to return EXACTLY one JSON object with an array named 'results'.
+    The array length must equal the number of papers.
+    """
+    chunks = [f"POLICY\n{policy}\n\n"]
+    for idx, r in enumerate(papers, 1):
+        chunks.append(f"=== PAPER {idx} ===\n{paper_to_text(r)}")
+    chunks.append(
+        "\nINSTRUCTIONS\n"
+        "Return EXACTLY ONE JSON object named 'results' with one object per paper, in order.\n"
+        "Valid decisions: 'include' | 'exclude' | 'unsure'.\n"
+        "Schema per item: {\"decision\":\"...\",\"reason\":\"...\",\"matched_rules\":[...]}\n"
+        "Output format (and nothing else):\n"
+        "{\"results\": [ {..paper1..}, {..paper2..}, ... ]}"
+    )
+    return "\n".join(chunks)
+
+
+def screen_batch(
+    client: LLMClient,
+    policy: str,
+    batch: List[Dict],
+    temperature: float = 0.2,
+    on_warning: Optional[Callable[[str], Any]] = None,
+) -> List[Dict]:
+    """
+    Send one batch of papers to the LLM and return copies of the papers with
+    `ai_decision`, `ai_reason` and `ai_matched_rules` attached (same order).
+
+    LLM errors are raised to the caller; a short or long result array is padded
+    / trimmed and reported through `on_warning`. Padded rows are 'unsure' and
+    carry `ai_missing: True` so callers do not record them as decisions.
+    """
+    # allocate generous tokens: ~450 per paper, capped at 6000
+    max_tok = min(6000, 450 * max(1, len(batch)))
+    raw = client.chat(
+        system=make_system_prompt(),
+        user=make_user_prompt(policy, batch),
+        temperature=float(temperature),
+        max_tokens=max_tok,
+    )
+
+    items = parse_ai_array(raw or "") or []
+    returned = min(len(items), len(batch))
+    if len(items) != len(batch):
+        if on_warning:
+            on_warning(
+                f"Model returned {len(items)} results for a batch of {len(batch)}; "
+                "filling missing items as 'unsure' (not saved; they are sent again on resume)."
+            )
+        if len(items) < len(batch):
+            items = items + [{} for _ in range(len(batch) - len(items))]
+        else:
+            items = items[:len(batch)]
+
+    out: List[Dict] = []
+    for i, (r, parsed) in enumerate(zip(batch, items)):
+        parsed = parsed if isinstance(parsed, dict) else {}
+        decision = str(parsed.get("decision", "unsure")).lower().strip()
+        rr = dict(r)
+        rr["ai_decision"] = decision if decision in DECISIONS else "unsure"
+        rr["ai_reason"] = (parsed.get("reason") or "").strip()
+        rr["ai_matched_rules"] = parsed.get("matched_rules") or []
+        if i >= returned:
+            rr["ai_reason"] = rr["ai_reason"] or "No result returned by the model."
+            rr["ai_missing"] = True
+        out.append(rr)
+    return out
+
+
+def split_by_decision(rows: Iterable[Dict], key: str = "ai_decision"):
+    """Bucket screened rows into (include, exclude, unsure) lists."""
+    inc, exc, unsure = [], [], []
+    for r in rows:
+        d = r.get(key)
+        if d == "include":
+            inc.append(r)
+        elif d == "exclude":
+            exc.append(r)
+        else:
+            unsure.append(r)
+    return inc, exc, unsure
+
+
+# ---------------- Per-rule screening ----------------
+RULE_VERDICTS = {"yes", "no", "unclear"}
+
+
+def make_rule_system_prompt() -> str:
+    return (
+        "You are assisting a systematic literature review. "
+        "You check candidate papers against ONE screening rule at a time. "
+        "For each paper answer whether the rule applies to it: 'yes', 'no', or 'unclear' "
+        "when the title/abstract does not give enough information. "
+        "Respond ONLY with compact JSON using this exact structure:\n"
+        "{ \"results\": [ {\"verdict\":\"yes|no|unclear\",\"reason\":\"...\"}, ... one item per paper ... ] }\n"
+        "Keep reasons under 15 words."
+    )
+
+
+def make_rule_user_prompt(kind: str, rule: str, papers: List[Dict]) -> str:
+    """kind: 'inclusion' or 'exclusion' (only changes the wording of the question)."""
+    if kind == "exclusion":
+        question = "Does this EXCLUSION rule apply to the paper (i.e. should it be discarded for this reason)?"
+    else:
+        question = "Does the paper satisfy this INCLUSION rule?"
+    chunks = [f"RULE ({kind.upper()}): {rule}\nQUESTION: {question}\n"]
+    for idx, r in enumerate(papers, 1):
+        chunks.append(f"=== PAPER {idx} ===\n{paper_to_text(r)}")
+    chunks.append(
+        "\nINSTRUCTIONS\n"
+        "Return EXACTLY ONE JSON object named 'results' with one object per paper, in order.\n"
+        "Output format (and nothing else):\n"
+        "{\"results\": [ {\"verdict\":\"yes|no|unclear\",\"reason\":\"...\"}, ... ]}"
+    )
+    return "\n".join(chunks)
+
+
+def judge_rule_batch(
+    client: LLMClient,
+    kind: str,
+    rule: str,
+    batch: List[Dict],
+    temperature: float = 0.0,
+    on_warning: Optional[Callable[[str], Any]] = None,
+) -> List[Dict[str, str]]:
+    """
+    Judge one rule for a batch of papers.
+    Returns [{"verdict": "yes|no|unclear", "reason": str}, ...] in batch order;
+    items the model did not return are 'unclear' with "missing": True.
+    """
+    max_tok = min(4000, 120 * max(1, len(batch)) + 200)
+    raw = client.chat(
+        system=make_rule_system_prompt(),
+        user=make_rule_user_prompt(kind, rule, batch),
+        temperature=float(temperature),
+        max_tokens=max_tok,
+    )
+    items = parse_ai_array(raw or "") or []
+    if len(items) != len(batch) and on_warning:
+        on_warning(
+            f"Model returned {len(items)} verdicts for a batch of {len(batch)} (rule: {rule[:60]}); "
+            "missing items count as 'unclear' for now and are asked again on the next run."
+        )
+    returned = min(len(items), len(batch))
+    items = (items + [{} for _ in range(len(batch))])[:len(batch)]
+
+    out: List[Dict[str, Any]] = []
+    for i, parsed in enumerate(items):
+        parsed = parsed if isinstance(parsed, dict) else {}
+        v = str(parsed.get("verdict", "unclear")).lower().strip()
+        item: Dict[str, Any] = {
+            "verdict": v if v in RULE_VERDICTS else "unclear",
+            "reason": str(parsed.get("reason") or "").strip(),
+        }
+        if i >= returned:
+            item["missing"] = True
+        out.append(item)
+    return out
+
+
+def compose_rule_decision(
+    inc_verdicts: List[Tuple[str, Optional[Dict[str, str]]]],
+    exc_verdicts: List[Tuple[str, Optional[Dict[str, str]]]],
+    require_all_inclusion: bool = True,
+) -> Dict[str, Any]:
+    """
+    Combine per-rule verdicts into one screening decision.
+
+    inc_verdicts / exc_verdicts: [(label, {"verdict", "reason"} or None), ...]
+    with labels like "I1" / "E2"; None means the verdict is missing.
+
+    - any exclusion rule 'yes'                        -> exclude
+    - inclusion rule(s) 'no' (all rules / any rule)   -> exclude
+    - any missing or 'unclear' verdict otherwise      -> unsure
+    - else                                            -> include
+    """
+    def _v(x):
+        return (x or {}).get("verdict") if x else None
+
+    hit_exc = [lbl for lbl, x in exc_verdicts if _v(x) == "yes"]
+    if hit_exc:
+        reasons = "; ".join(f"{lbl}: {(x or {}).get('reason', '')}".strip() for lbl, x in exc_verdicts if lbl in hit_exc)
+        return {"decision": "exclude", "reason": reasons, "matched_rules": hit_exc}
+
+    inc_yes = [lbl for lbl, x in inc_verdicts if _v(x) == "yes"]
+    inc_no = [lbl for lbl, x in inc_verdicts if _v(x) == "no"]
+    open_rules = [lbl for lbl, x in inc_verdicts + exc_verdicts if _v(x) not in ("yes", "no")]
+
+    if require_all_inclusion:
+        failed = bool(inc_no)
+    else:
+        failed = bool(inc_verdicts) and not inc_yes and not any(_v(x) not in ("yes", "no") for _, x in inc_verdicts)
+    if failed:
+        return {
+            "decision": "exclude",
+            "reason": "Inclusion not met: " + ", ".join(inc_no),
+            "matched_rules": inc_yes,
+        }
+    if open_rules:
+        return {
+            "decision": "unsure",
+            "reason": "Unclear or missing verdicts: " + ", ".join(open_rules),
+            "matched_rules": inc_yes,
+        }
+    return {"decision": "include", "reason": "All inclusion rules met; no exclusion rule applies.", "matched_rules": inc_yes}
@@ -1,6 +1,6 @@
 # slr/agents/taxonomy.py
 import json
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from slr.llm.client import LLMClient
 
 SYSTEM_PROMPT = """You are an expert in systematic literature reviews and taxonomy design.
@@ -12,6 +12,41 @@ Return STRICT JSON that matches the required schema, with no extra text.
 """
 
 
+def _paper_line(
+    i: int,
+    title: str,
+    paper_ids: List[str],
+    abstracts: Optional[List[str]],
+    full_texts: Optional[List[str]],
+    abs_snip_len: int,
+    full_snip_len: int,
+) -> str:
+    """One "- [id] title | abs: ... | full: ..." line of the papers list."""
+    abs_snip = ""
+    full_snip = ""
+
+    # Abstract snippet
+    if abstracts and i < len(abstracts) and abstracts[i]:
+        sn = abstracts[i].strip()
+        if abs_snip_len > 0:
+            sn = sn[:abs_snip_len] + ("..." if len(sn) > abs_snip_len else "")
+        else:
+            sn = ""
+        abs_snip = f" | abs: {sn}" if sn else ""
+
+    # Full-text snippet from PDF
+    if full_texts and i < len(full_texts) and full_texts[i]:
+        ft = full_texts[i].strip()
+        if full_snip_len > 0:
+            ft = ft[:full_snip_len] + ("..." if len(ft) > full_snip_len else "")
+        else:
+            ft = ""
+        full_snip = f" | full: {ft}" if ft else ""
+
+    pid = paper_ids[i] if i < len(paper_ids) else f"paper_{i}"
+    return f"- [{pid}] {title}{abs_snip}{full_snip}"
+
+
 def _format_user_prompt(
     titles: List[str],
     paper_ids: List[str],
@@ -57,29 +92,7 @@ def _format_user_prompt(
     # Papers list
     lines.append("Papers:")
     for i, title in enumerate(titles):
-        abs_snip = ""
-        full_snip = ""
-
-        # Abstract snippet
-        if abstracts and i < len(abstracts) and abstracts[i]:
-            sn = abstracts[i].strip()
-            if abs_snip_len > 0:
-                sn = sn[:abs_snip_len] + ("..." if len(sn) > abs_snip_len else "")
-            else:
-                sn = ""
-            abs_snip = f" | abs: {sn}" if sn else ""
-
-        # Full-text snippet from PDF
-        if full_texts and i < len(full_texts) and full_texts[i]:
-            ft = full_texts[i].strip()
-            if full_snip_len > 0:
-                ft = ft[:full_snip_len] + ("..." if len(ft) > full_snip_len else "")
-            else:
-                ft = ""
-            full_snip = f" | full: {ft}" if ft else ""
-
-        pid = paper_ids[i] if i < len(paper_ids) else f"paper_{i}"
-        lines.append(f"- [{pid}] {title}{abs_snip}{full_snip}")
+        lines.append(_paper_line(i, title, paper_ids, abstracts, full_texts, abs_snip_len, full_snip_len))
 
 
     lines.append("")
@@ -176,3 +189,464 @@ def generate_taxonomy(
         }
 
     return data
+
+
+# ------------------------------------------------------------------------
+# Map-reduce synthesis: partial taxonomies per chunk, merged in rounds
+# ------------------------------------------------------------------------
+
+MERGE_SYSTEM_PROMPT = """You are an expert in systematic literature reviews and taxonomy design.
+You will receive several partial taxonomies of the same review topic, each built from a different
+subset of papers, listed as leaf paths with paper counts.
+Your job: reconcile them into ONE taxonomy: merge nodes that mean the same thing (even if named
+differently), keep genuinely distinct categories, respect the requested depth and the maximum number of
+children per node, and keep it balanced. Then map EVERY input leaf to exactly one leaf of the merged tree.
+Return STRICT JSON that matches the required schema, with no extra text.
+"""
+
+OTHER_NODE = "Other"
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English prose; only used to size chunks
+    return len(text) // 4 + 1
+
+
+def _loads_object(raw: str) -> Dict[str, Any]:
+    text = (raw or "").strip()
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        text = text[start : end + 1]
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    return data
+
+
+def leaf_paths(tree: Dict[str, Any]) -> List[List[str]]:
+    """Paths (root child -> leaf) of all leaves; the root itself is not part of a path."""
+    out: List[List[str]] = []
+
+    def walk(node: Dict[str, Any], path: List[str]) -> None:
+        children = [c for c in node.get("children") or [] if isinstance(c, dict)]
+        if not children:
+            if path:
+                out.append(path)
+            return
+        for ch in children:
+            walk(ch, path + [str(ch.get("name", "")).strip()])
+
+    walk(tree, [])
+    return out
+
+
+def path_key(path: Any) -> str:
+    if not isinstance(path, (list, tuple)):
+        path = [path]
+    return " / ".join(str(p).strip().lower() for p in path if str(p).strip())
+
+
+def fit_path(path: Any, tree: Dict[str, Any], leaves: Dict[str, List[str]]) -> Optional[List[str]]:
+    """The leaf of `tree` that `path` names (tolerates a leading root name), else None."""
+    if not isinstance(path, (list, tuple)):
+        return None
+    path = [str(p).strip() for p in path if str(p).strip()]
+    root = str(tree.get("name", "root")).strip().lower()
+    if path and path[0].lower() in (root, "root") and path_key(path) not in leaves:
+        path = path[1:]
+    return leaves.get(path_key(path))
+
+
+def _union_trees(trees: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Deterministic fallback merge: nodes with the same name (per level) are combined."""
+    def merge_into(dst: Dict[str, Any], src: Dict[str, Any]) -> None:
+        index = {str(c.get("name", "")).strip().lower(): c for c in dst["children"]}
+        for ch in src.get("children") or []:
+            if not isinstance(ch, dict):
+                continue
+            key = str(ch.get("name", "")).strip().lower()
+            if key not in index:
+                index[key] = {"name": str(ch.get("name", "")).strip(), "children": []}
+                dst["children"].append(index[key])
+            merge_into(index[key], ch)
+
+    root: Dict[str, Any] = {"name": "root", "children": []}
+    for t in trees:
+        merge_into(root, t)
+    return root
+
+
+def _add_other_leaf(tree: Dict[str, Any], depth: int) -> List[str]:
+    """Ensure an "Other" branch down to `depth` exists; returns its leaf path."""
+    node, path = tree, []
+    for _ in range(max(1, int(depth))):
+        nxt = next((c for c in node.setdefault("children", []) if c.get("name") == OTHER_NODE), None)
+        if nxt is None:
+            nxt = {"name": OTHER_NODE, "children": []}
+            node["children"].append(nxt)
+        node, path = nxt, path + [OTHER_NODE]
+    return path
+
+
+def _fit_limits(
+    tree: Dict[str, Any], mapping: List[Dict[str, Any]], depth: int, max_children_per_node: int
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Prune `tree` in place to `depth` levels and `max_children_per_node`, and
+    re-point `mapping` at the remaining leaves; returns (mapping, papers moved).
+
+    Nodes below `depth` are folded into their ancestor at that depth. A node
+    with too many children keeps the first ones plus its "Other" child; the
+    papers of the dropped children go to that "Other" branch.
+    """
+    depth, width = max(1, int(depth)), max(1, int(max_children_per_node))
+
+    def fit(node: Dict[str, Any], remaining: int) -> None:
+        children = [c for c in node.get("children") or [] if isinstance(c, dict)]
+        if remaining <= 0:
+            children = []
+        elif len(children) > width:
+            other = next((c for c in children if c.get("name") == OTHER_NODE), None)
+            node["children"] = [c for c in children if c is not other][: width - 1] + ([other] if other else [])
+            _add_other_leaf(node, remaining)
+            children = node["children"]
+        node["children"] = children
+        for ch in children:
+            fit(ch, remaining - 1)
+
+    def resolve(path: List[str]) -> List[str]:
+        node, out = tree, []
+        for name in path:
+            key = str(name).strip().lower()
+            nxt = next((c for c in node.get("children") or [] if str(c.get("name", "")).strip().lower() == key), None)
+            if nxt is None:  # dropped child (continue into "Other") or folded subtree (stop here)
+                break
+            node = nxt
+            out.append(str(nxt.get("name", "")).strip())
+        while node.get("children"):
+            node = next((c for c in node["children"] if c.get("name") == OTHER_NODE), node["children"][0])
+            out.append(str(node.get("name", "")).strip())
+        return out
+
+    fit(tree, depth)
+    out, moved = [], 0
+    for m in mapping:
+        path = resolve(m["path"])
+        moved += path != list(m["path"])
+        out.append({**m, "path": path})
+    return out, moved
+
+
+def _limits_note(moved: int) -> str:
+    return f"{moved} papers were moved to fit the depth and children limits" if moved else ""
+
+
+def _merge_prompt(
+    partials: List[Dict[str, Any]],
+    picoc: Optional[Dict[str, str]],
+    rqs: Optional[List[str]],
+    depth: int,
+    max_children_per_node: int,
+) -> str:
+    lines: List[str] = []
+    if picoc:
+        lines.append("PICOC:")
+        for k in ("population", "intervention", "comparison", "outcome", "context"):
+            if picoc.get(k):
+                lines.append(f"- {k.capitalize()}: {picoc[k]}")
+        lines.append("")
+    if rqs:
+        lines.append("Research Questions:")
+        for i, q in enumerate(rqs, 1):
+            lines.append(f"- RQ{i}: {q}")
+        lines.append("")
+    lines.append(f"Depth requested: {depth}")
+    lines.append(f"Max children per node: {max_children_per_node}")
+    lines.append("")
+    lines.append("Partial taxonomies:")
+    for k, part in enumerate(partials, 1):
+        counts: Dict[str, int] = {}
+        for m in part["mapping"]:
+            key = " / ".join(m["path"])
+            counts[key] = counts.get(key, 0) + 1
+        lines.append(f"T{k}:")
+        for path in leaf_paths(part["taxonomy"]):
+            key = " / ".join(path)
+            lines.append(f"- {key} ({counts.get(key, 0)} papers)")
+    lines.append("")
+    lines.append("Return STRICT JSON with keys: taxonomy, leaf_map, notes.")
+    lines.append(
+        "Taxonomy must be a tree object of the form "
+        '{"name": "root", "children": [ {...}, ... ]}. '
+        'Each leaf_map item must be {"source": "T<k>", "path": [input leaf path], '
+        '"target": [merged leaf path from root-child down to leaf]}; include every input leaf.'
+    )
+    return "\n".join(lines)
+
+
+def _merge_partials(
+    partials: List[Dict[str, Any]],
+    client: LLMClient,
+    picoc: Optional[Dict[str, str]],
+    rqs: Optional[List[str]],
+    depth: int,
+    max_children_per_node: int,
+) -> Dict[str, Any]:
+    """
+    Merge partial results {taxonomy, mapping, notes} into one; every paper
+    mapping is re-pointed at the merged tree through the LLM's leaf_map.
+    Falls back to a by-name union if the merge call fails.
+    """
+    if len(partials) == 1:
+        return partials[0]
+    notes = [p["notes"] for p in partials if p.get("notes")]
+    try:
+        raw = client.chat(
+            system=MERGE_SYSTEM_PROMPT,
+            user=_merge_prompt(partials, picoc, rqs, depth, max_children_per_node),
+            max_retries=4,
+            request_timeout=75.0,
+        )
+        data = _loads_object(raw)
+        tree = data.get("taxonomy")
+        if not isinstance(tree, dict) or not leaf_paths(tree):
+            raise ValueError("merge returned no taxonomy")
+        leaf_map = data.get("leaf_map") or []
+        if data.get("notes"):
+            notes.append(str(data["notes"]))
+    except Exception as e:
+        notes.append(f"merge fell back to name union: {e}")
+        tree = _union_trees([p["taxonomy"] for p in partials])
+        mapping, moved = _fit_limits(tree, [m for p in partials for m in p["mapping"]], depth, max_children_per_node)
+        notes.append(_limits_note(moved))
+        return {"taxonomy": tree, "mapping": mapping, "notes": " | ".join(n for n in notes if n)}
+
+    merged_leaves = {path_key(p): p for p in leaf_paths(tree)}
+    source_leaves = [{path_key(p): p for p in leaf_paths(part["taxonomy"])} for part in partials]
+    # (source index, input leaf key) -> merged leaf path
+    route: Dict[Any, List[str]] = {}
+    for item in leaf_map:
+        if not isinstance(item, dict):
+            continue
+        src = str(item.get("source", "")).strip().upper().lstrip("T")
+        if not src.isdigit() or not 0 < int(src) <= len(partials):
+            continue
+        k = int(src) - 1
+        source = fit_path(item.get("path"), partials[k]["taxonomy"], source_leaves[k])
+        target = fit_path(item.get("target"), tree, merged_leaves)
+        if source and target:
+            route[(k, path_key(source))] = target
+
+    # leaves the LLM forgot: same leaf name in the merged tree, else "Other"
+    by_leaf_name: Dict[str, List[str]] = {}
+    for p in merged_leaves.values():
+        by_leaf_name.setdefault(p[-1].lower(), p)
+
+    mapping: List[Dict[str, Any]] = []
+    orphans = 0
+    other: Optional[List[str]] = None
+    for k, part in enumerate(partials):
+        for m in part["mapping"]:
+            target = route.get((k, path_key(m["path"]))) or by_leaf_name.get(m["path"][-1].lower())
+            if target is None:
+                if other is None:
+                    other = _add_other_leaf(tree, depth)
+                target = other
+                orphans += 1
+            mapping.append({**m, "path": list(target)})
+    if orphans:
+        notes.append(f"{orphans} papers had no leaf mapping in a merge and were put under '{OTHER_NODE}'")
+    # the LLM does not always respect the requested shape
+    mapping, moved = _fit_limits(tree, mapping, depth, max_children_per_node)
+    notes.append(_limits_note(moved))
+    return {"taxonomy": tree, "mapping": mapping, "notes": " | ".join(n for n in notes if n)}
+
+
+MAP_ATTEMPTS = 2  # a map chunk whose call fails or returns an empty tree is tried once more
+
+
+def generate_taxonomy_map_reduce(
+    titles: List[str],
+    paper_ids: List[str],
+    abstracts: Optional[List[str]] = None,
+    full_texts: Optional[List[str]] = None,
+    picoc: Optional[Dict[str, str]] = None,
+    rqs: Optional[List[str]] = None,
+    depth: int = 2,
+    max_children_per_node: int = 6,
+    model: str = "gpt-oss-120b",
+    abs_snip_len: int = 220,
+    full_snip_len: int = 800,
+    chunk_tokens: int = 6000,
+    merge_fanin: int = 4,
+    workers: int = 4,
+    on_progress: Optional[Callable[[float, str], None]] = None,
+    **_: Any,
+) -> Dict[str, Any]:
+    """
+    Taxonomy for all papers without a single huge prompt.
+
+    Map: papers are cut into chunks whose paper lines fit `chunk_tokens`
+    (estimated), and each chunk gets a partial taxonomy + mapping via
+    generate_taxonomy(), `workers` calls at a time.
+    Reduce: groups of `merge_fanin` partial taxonomies (leaf paths + counts
+    only, no papers) are merged by the LLM into one tree of the requested
+    depth and max_children_per_node, round after round until one is left.
+    Paper mappings are re-pointed through each merge's leaf map. Every
+    partial and merged tree is pruned to depth / max_children_per_node
+    (_fit_limits) before its papers are assigned.
+    A chunk whose call fails or returns an empty tree is retried once; papers
+    still without a leaf (failed chunk, or left out by the LLM) are put under
+    "Other" and counted in the notes, so every paper is mapped.
+    Same result shape as generate_taxonomy(); max_papers is ignored.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def progress(frac: float, msg: str) -> None:
+        if on_progress:
+            on_progress(frac, msg)
+
+    n = len(titles)
+    if not n:
+        return {"taxonomy": {"name": "root", "children": []}, "mapping": [], "notes": "No papers."}
+    ids = [paper_ids[i] if i < len(paper_ids) else f"paper_{i}" for i in range(n)]
+
+    chunks: List[List[int]] = [[]]
+    used = 0
+    for i, title in enumerate(titles):
+        cost = _estimate_tokens(_paper_line(i, title, ids, abstracts, full_texts, abs_snip_len, full_snip_len))
+        if chunks[-1] and used + cost > chunk_tokens:
+            chunks.append([])
+            used = 0
+        chunks[-1].append(i)
+        used += cost
+
+    def pick(values: Optional[List[str]], idx: List[int]) -> Optional[List[str]]:
+        return [values[i] if i < len(values) else "" for i in idx] if values else None
+
+    def map_chunk(idx: List[int]) -> Dict[str, Any]:
+        for _ in range(MAP_ATTEMPTS):
+            data = generate_taxonomy(
+                titles=[titles[i] for i in idx],
+                paper_ids=[ids[i] for i in idx],
+                abstracts=pick(abstracts, idx),
+                full_texts=pick(full_texts, idx),
+                picoc=picoc,
+                rqs=rqs,
+                depth=depth,
+                max_children_per_node=max_children_per_node,
+                model=model,
+                max_papers=0,
+                abs_snip_len=abs_snip_len,
+                full_snip_len=full_snip_len,
+            )
+            tree = data.get("taxonomy") if isinstance(data.get("taxonomy"), dict) else {}
+            if leaf_paths(tree):
+                break
+        failed = not leaf_paths(tree)
+        if failed:
+            tree = {"name": "root", "children": []}
+        leaves = {path_key(p): p for p in leaf_paths(tree)}
+        wanted = {ids[i]: titles[i] for i in idx}
+        mapping, seen = [], set()
+        for m in data.get("mapping") or []:
+            pid = str(m.get("paper_id", "")) if isinstance(m, dict) else ""
+            path = fit_path(m.get("path"), tree, leaves) if pid in wanted else None
+            if path and pid not in seen:
+                seen.add(pid)
+                mapping.append({"paper_id": pid, "title": wanted[pid], "path": path})
+        missing = [pid for pid in wanted if pid not in seen]
+        if missing:
+            other = _add_other_leaf(tree, depth)
+            mapping += [{"paper_id": pid, "title": wanted[pid], "path": list(other)} for pid in missing]
+        mapping, moved = _fit_limits(tree, mapping, depth, max_children_per_node)
+        return {
+            "taxonomy": tree,
+            "mapping": mapping,
+            "notes": " | ".join(n for n in (str(data.get("notes") or ""), _limits_note(moved)) if n),
+            "unmapped": 0 if failed else len(missing),
+            "failed": len(missing) if failed else 0,
+        }
+
+    client = LLMClient(model=model)
+    workers = max(1, int(workers))
+    rounds = 0
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        progress(0.05, f"Map: {len(chunks)} partial taxonomies for {n} papers…")
+        partials = []
+        for k, part in enumerate(ex.map(map_chunk, chunks), 1):
+            partials.append(part)
+            progress(0.05 + 0.55 * k / len(chunks), f"Map: {k}/{len(chunks)} partial taxonomies")
+        unmapped = sum(p.pop("unmapped") for p in partials)
+        failed_chunks = [p.pop("failed") for p in partials]
+
+        fanin = max(2, int(merge_fanin))
+        while len(partials) > 1:
+            rounds += 1
+            groups = [partials[i:i + fanin] for i in range(0, len(partials), fanin)]
+            progress(min(0.95, 0.6 + 0.1 * rounds), f"Merge round {rounds}: {len(partials)} → {len(groups)}")
+            partials = list(ex.map(
+                lambda g: _merge_partials(g, client, picoc, rqs, depth, max_children_per_node), groups
+            ))
+
+    result = partials[0]
+    notes = [f"Map-reduce taxonomy: {len(chunks)} chunks, {rounds} merge round(s)."]
+    failed = [k for k in failed_chunks if k]
+    if failed:
+        notes.append(
+            f"{len(failed)} chunk(s) failed after {MAP_ATTEMPTS} attempts; "
+            f"their {sum(failed)} papers were put under '{OTHER_NODE}'."
+        )
+    if unmapped:
+        notes.append(f"{unmapped} papers were not mapped by the LLM in the map phase and were put under '{OTHER_NODE}'.")
+    if result.get("notes"):
+        notes.append(result["notes"])
+    progress(1.0, "Taxonomy ready")
+    return {"taxonomy": result["taxonomy"], "mapping": result["mapping"], "notes": " ".join(notes)}
+
+
+# Taxonomy engines:
+# - "single"   one prompt with up to max_papers papers (generate_taxonomy)
+# - "cluster"  embedding clusters named by the LLM, all papers (slr/agents/taxonomy_cluster.py)
+# - "map_reduce" partial taxonomies per token-budget chunk, merged by the LLM, all papers
+METHODS = ("single", "cluster", "map_reduce")
+# full-text snippets: passages closest to PICOC/RQs (slr/embed/snippets.py) or the first characters
+SNIPPET_MODES = ("relevant", "head")
+
+
+def build_taxonomy(
+    method: str = "single",
+    on_progress: Optional[Callable[[float, str], None]] = None,
+    snippets: str = "relevant",
+    **params: Any,
+) -> Dict[str, Any]:
+    """
+    Run the taxonomy engine `method` with generate_taxonomy()-style params.
+    With snippets="relevant", full_texts are first reduced to the passages
+    most relevant to the PICOC/RQs, within full_snip_len characters per paper.
+    """
+    if snippets not in SNIPPET_MODES:
+        raise ValueError(f"unknown snippet mode {snippets!r}; expected one of {SNIPPET_MODES}")
+    full_texts = params.get("full_texts")
+    snip_len = int(params.get("full_snip_len", 800))
+    if snippets == "relevant" and full_texts and any(full_texts) and snip_len > 0:
+        from slr.embed.snippets import CHARS_PER_TOKEN, relevant_snippets
+
+        params["full_texts"] = relevant_snippets(
+            full_texts, params.get("picoc"), params.get("rqs"),
+            max_tokens=snip_len // CHARS_PER_TOKEN, on_progress=on_progress,
+        )
+    if method == "cluster":
+        from slr.agents.taxonomy_cluster import generate_taxonomy_clustered
+
+        return generate_taxonomy_clustered(on_progress=on_progress, **params)
+    if method == "map_reduce":
+        return generate_taxonomy_map_reduce(on_progress=on_progress, **params)
+    if method != "single":
+        raise ValueError(f"unknown taxonomy method {method!r}; expected one of {METHODS}")
+    if on_progress:
+        on_progress(0.05, "Calling LLM to draft taxonomy…")
+    data = generate_taxonomy(**params)
+    if on_progress:
+        on_progress(1.0, "Taxonomy ready")
+    return data
@@ -0,0 +1,244 @@
+# slr/agents/taxonomy_assign.py
+"""
+Assign papers to an existing taxonomy (nearest leaf centroid + LLM fallback).
+
+Every leaf gets a prototype embedding: its path and description, blended
+with the centroid of the papers already mapped to it (exemplars). Each
+paper goes to the most similar prototype; the confidence is the softmax
+probability of that leaf over all leaves (temperature TAU on cosine
+similarities). Only papers below `min_confidence` are sent to the LLM, in
+batches that list the candidate leaves once, so thousands of papers need a
+handful of calls.
+
+    res = assign_to_taxonomy(tree, titles, paper_ids, abstracts, mapping=existing)
+    res["mapping"]  # [{paper_id, title, path, confidence, similarity, assigned_by}]
+"""
+from __future__ import annotations
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from slr.agents.taxonomy import fit_path, path_key
+from slr.llm.client import LLMClient
+
+# softmax temperature on cosine similarities (0.05: a 0.035 margin doubles the odds)
+TAU = 0.05
+# weight of the path/description text vs. the exemplar centroid in a leaf prototype
+DESC_WEIGHT = 0.4
+N_EXEMPLARS = 20
+
+SYSTEM_PROMPT = """You are an expert in systematic literature reviews and taxonomy design.
+You will receive the leaves of an existing taxonomy and a list of papers.
+Assign each paper to exactly one leaf, the one that fits its main contribution best.
+Return STRICT JSON that matches the required schema, with no extra text.
+"""
+
+
+def unwrap_tree(tree: Dict[str, Any]) -> Dict[str, Any]:
+    """d01 stores the tree under a topic-named root; the LLM tree is its only child."""
+    children = tree.get("children") or []
+    if len(children) == 1 and str(children[0].get("name", "")).strip().lower() == "root":
+        return children[0]
+    return tree
+
+
+def leaf_nodes(tree: Dict[str, Any]) -> List[Tuple[List[str], Dict[str, Any]]]:
+    out: List[Tuple[List[str], Dict[str, Any]]] = []
+
+    def walk(node: Dict[str, Any], path: List[str]) -> None:
+        children = [c for c in node.get("children") or [] if isinstance(c, dict)]
+        if not children:
+            if path:
+                out.append((path, node))
+            return
+        for ch in children:
+            walk(ch, path + [str(ch.get("name", "")).strip()])
+
+    walk(tree, [])
+    return out
+
+
+def _paper_text(title: str, abstract: str = "") -> str:
+    return f"{str(title or '').strip()}. {str(abstract or '').strip()}".strip(". ").strip()
+
+
+def leaf_prototypes(
+    tree: Dict[str, Any],
+    mapping: Optional[List[Dict[str, Any]]] = None,
+    texts_by_id: Optional[Dict[str, str]] = None,
+) -> Tuple[List[List[str]], np.ndarray]:
+    """(leaf paths, unit-length prototype matrix) for the leaves of `tree`."""
+    from slr.embed.sbert import encode_cached
+
+    leaves = leaf_nodes(tree)
+    paths = [p for p, _ in leaves]
+    descs = []
+    for path, node in leaves:
+        d = str(node.get("description", "") or "").strip()
+        descs.append(" > ".join(path) + (f": {d}" if d else ""))
+    P = encode_cached(descs)
+
+    by_key = {path_key(p): p for p in paths}
+    index = {path_key(p): k for k, p in enumerate(paths)}
+    exemplars: List[List[str]] = [[] for _ in paths]
+    for m in mapping or []:
+        path = fit_path(m.get("path"), tree, by_key)
+        if not path:
+            continue
+        k = index[path_key(path)]
+        if len(exemplars[k]) < N_EXEMPLARS:
+            pid = str(m.get("paper_id", ""))
+            exemplars[k].append((texts_by_id or {}).get(pid) or str(m.get("title", "")))
+
+    flat = [t for ex in exemplars for t in ex if t]
+    if flat:
+        E = encode_cached(flat)
+        pos = 0
+        for k, ex in enumerate(exemplars):
+            ex = [t for t in ex if t]
+            if ex:
+                c = E[pos:pos + len(ex)].mean(axis=0)
+                pos += len(ex)
+                P[k] = DESC_WEIGHT * P[k] + (1.0 - DESC_WEIGHT) * c / max(float(np.linalg.norm(c)), 1e-12)
+    P /= np.clip(np.linalg.norm(P, axis=1, keepdims=True), 1e-12, None)
+    return paths, P
+
+
+def nearest_leaves(
+    X: np.ndarray, P: np.ndarray, top: int = 3
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(best leaf per row, its confidence, its cosine similarity, top-`top` leaf indices per row)."""
+    sims = X @ P.T
+    z = (sims - sims.max(axis=1, keepdims=True)) / TAU
+    prob = np.exp(z)
+    prob /= prob.sum(axis=1, keepdims=True)
+    best = np.argmax(sims, axis=1)
+    order = np.argsort(-sims, axis=1)[:, :top]
+    rows = np.arange(len(best))
+    return best, prob[rows, best], sims[rows, best], order
+
+
+def _llm_batch(
+    client: LLMClient,
+    leaves: List[List[str]],
+    descs: List[str],
+    batch: List[Tuple[str, str, str, List[int]]],
+) -> Dict[str, int]:
+    """One call for a batch of (paper_id, title, abstract, candidate leaves); returns {paper_id: leaf index}."""
+    lines = ["Taxonomy leaves:"]
+    for k, path in enumerate(leaves, 1):
+        lines.append(f"L{k}: {' > '.join(path)}" + (f" — {descs[k - 1]}" if descs[k - 1] else ""))
+    lines.append("")
+    lines.append("Papers (closest leaves by embedding in brackets):")
+    for pid, title, abstract, cands in batch:
+        abs_snip = abstract.strip()[:300]
+        hint = ", ".join(f"L{c + 1}" for c in cands)
+        lines.append(f"- [{pid}] {title}" + (f" | abs: {abs_snip}" if abs_snip else "") + f" [{hint}]")
+    lines.append("")
+    lines.append('Return STRICT JSON: {"assignments": [{"paper_id": "...", "leaf": "L<k>"}]} with one item per paper.')
+
+    raw = client.chat(system=SYSTEM_PROMPT, user="\n".join(lines), max_retries=4, request_timeout=75.0, temperature=0.0)
+    text = raw.strip()
+    start, end = text.find("{"), text.rfind("}")
+    data = json.loads(text[start:end + 1] if start != -1 and end > start else text)
+    out: Dict[str, int] = {}
+    for item in data.get("assignments") or []:
+        if not isinstance(item, dict):
+            continue
+        leaf = str(item.get("leaf", "")).strip().upper().lstrip("L")
+        if leaf.isdigit() and 0 < int(leaf) <= len(leaves):
+            out[str(item.get("paper_id", ""))] = int(leaf) - 1
+    return out
+
+
+def assign_to_taxonomy(
+    tree: Dict[str, Any],
+    titles: List[str],
+    paper_ids: List[str],
+    abstracts: Optional[List[str]] = None,
+    mapping: Optional[List[Dict[str, Any]]] = None,
+    min_confidence: float = 0.5,
+    escalate: bool = True,
+    model: str = "gpt-oss-120b",
+    batch_size: int = 40,
+    workers: int = 4,
+    client: Optional[LLMClient] = None,
+    on_progress: Optional[Callable[[float, str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Map papers to leaves of `tree`. `mapping` (existing assignments) supplies
+    exemplars for the leaf prototypes. Papers below `min_confidence` go to
+    the LLM when `escalate` is set; if a batch fails, its papers keep their
+    nearest leaf. Returns {"mapping": [...], "stats": {...}, "notes": str}.
+    """
+    from slr.embed.sbert import encode_cached
+
+    def progress(frac: float, msg: str) -> None:
+        if on_progress:
+            on_progress(frac, msg)
+
+    tree = unwrap_tree(tree)
+    n = len(titles)
+    abstracts = abstracts or [""] * n
+    ids = [paper_ids[i] if i < len(paper_ids) else f"paper_{i}" for i in range(n)]
+    texts = [_paper_text(titles[i], abstracts[i] if i < len(abstracts) else "") for i in range(n)]
+    stats = {"papers": n, "by_centroid": 0, "by_llm": 0, "llm_calls": 0, "llm_failed": 0}
+    if not n:
+        return {"mapping": [], "stats": stats, "notes": "No papers."}
+
+    progress(0.05, "Embedding leaves and papers…")
+    leaves, P = leaf_prototypes(tree, mapping, dict(zip(ids, texts)))
+    if not leaves:
+        return {"mapping": [], "stats": stats, "notes": "Taxonomy has no leaves."}
+    X = encode_cached(texts)
+    best, conf, sim, cands = nearest_leaves(X, P)
+
+    out = [
+        {
+            "paper_id": ids[i],
+            "title": titles[i],
+            "path": list(leaves[int(best[i])]),
+            "confidence": round(float(conf[i]), 3),
+            "similarity": round(float(sim[i]), 3),
+            "assigned_by": "centroid",
+        }
+        for i in range(n)
+    ]
+    low = [i for i in range(n) if conf[i] < float(min_confidence)]
+    notes: List[str] = []
+
+    if escalate and low:
+        client = client or LLMClient(model=model)
+        descs = [str(node.get("description", "") or "").strip() for _, node in leaf_nodes(tree)]
+        batches = [low[k:k + int(batch_size)] for k in range(0, len(low), int(batch_size))]
+        progress(0.3, f"Asking the LLM about {len(low)} low-confidence papers ({len(batches)} calls)…")
+
+        def run(idx: List[int]) -> Tuple[List[int], Optional[Dict[str, int]], Optional[str]]:
+            batch = [(ids[i], str(titles[i]), str(abstracts[i] if i < len(abstracts) else ""),
+                      [int(c) for c in cands[i]]) for i in idx]
+            try:
+                return idx, _llm_batch(client, leaves, descs, batch), None
+            except Exception as e:
+                return idx, None, str(e)
+
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as ex:
+            for done, (idx, picked, err) in enumerate(ex.map(run, batches), 1):
+                stats["llm_calls"] += 1
+                if picked is None:
+                    stats["llm_failed"] += 1
+                    notes.append(f"LLM batch failed: {err}")
+                for i in idx:
+                    if picked and ids[i] in picked:
+                        out[i]["path"] = list(leaves[picked[ids[i]]])
+                        out[i]["assigned_by"] = "llm"
+                progress(0.3 + 0.7 * done / len(batches), f"LLM batches {done}/{len(batches)}")
+
+    stats["by_llm"] = sum(1 for m in out if m["assigned_by"] == "llm")
+    stats["by_centroid"] = n - stats["by_llm"]
+    stats["low_confidence"] = len(low)
+    progress(1.0, "Assignment ready")
+    summary = (f"Assigned {n} papers: {stats['by_centroid']} by nearest leaf, "
+               f"{stats['by_llm']} by the LLM ({stats['llm_calls']} calls).")
+    return {"mapping": out, "stats": stats, "notes": " ".join([summary] + notes)}
@@ -0,0 +1,288 @@
+# slr/agents/taxonomy_cluster.py
+"""
+Cluster-first taxonomy generation (no cap on the number of papers).
+
+1. embed all papers (title + abstract, cached in slr/store/embeddings.py)
+2. hierarchical clustering to the requested depth (slr/embed/cluster.py)
+3. the LLM only names clusters, from compact summaries (representative
+   titles + distinctive terms): one call for the top level, then one call
+   per top-level branch for everything below it, run concurrently
+4. papers are mapped to the leaf of the cluster they belong to
+
+So the number of LLM calls is at most 1 + max_children_per_node, whatever
+the corpus size. The result has the same shape as generate_taxonomy():
+{"taxonomy": tree, "mapping": [{paper_id, title, path}], "notes": str};
+nodes additionally carry "description" and "paper_count".
+If a naming call fails, the affected clusters are named from their top terms.
+"""
+from __future__ import annotations
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from slr.embed.cluster import TermIndex, cluster_tree, representatives
+from slr.llm.client import LLMClient
+
+SYSTEM_PROMPT = """You are an expert in systematic literature reviews and taxonomy design.
+You will receive: (a) PICOC, (b) optional research questions, and (c) clusters of papers that were
+grouped by embedding similarity. Each cluster is summarized by representative titles and distinctive terms.
+Your job: give every cluster a short, specific category name (2-6 words) and a one-sentence description.
+Names of sibling clusters must be distinct and should reflect what separates them.
+Return STRICT JSON that matches the required schema, with no extra text.
+"""
+
+JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+N_TITLES = 5
+N_TERMS = 8
+
+
+def _extract_json(text: str) -> Dict[str, Any]:
+    m = JSON_OBJECT_RE.search((text or "").strip())
+    if not m:
+        raise ValueError("Model did not return JSON.")
+    return json.loads(m.group(0))
+
+
+def _context_lines(picoc: Optional[Dict[str, str]], rqs: Optional[List[str]]) -> List[str]:
+    lines: List[str] = []
+    if picoc:
+        lines.append("PICOC:")
+        for k in ("population", "intervention", "comparison", "outcome", "context"):
+            if picoc.get(k):
+                lines.append(f"- {k.capitalize()}: {picoc[k]}")
+        lines.append("")
+    if rqs:
+        lines.append("Research Questions:")
+        for i, q in enumerate(rqs, 1):
+            lines.append(f"- RQ{i}: {q}")
+        lines.append("")
+    return lines
+
+
+def _summary_lines(node: Dict[str, Any], label: str, indent: str = "") -> List[str]:
+    s = node["summary"]
+    lines = [f"{indent}Cluster {label} ({len(node['members'])} papers)"]
+    lines.append(f"{indent}  terms: {', '.join(s['terms']) or '-'}")
+    for t in s["titles"]:
+        lines.append(f"{indent}  - {t}")
+    return lines
+
+
+def _schema_hint(labels: List[str]) -> str:
+    return (
+        'Return STRICT JSON: {"nodes": [{"id": "<cluster id>", "name": "...", "description": "..."}], "notes": "..."} '
+        f"with exactly one entry for each of these ids: {', '.join(labels)}."
+    )
+
+
+def _top_prompt(tree: Dict[str, Any], context: List[str]) -> Tuple[str, List[str]]:
+    lines = list(context)
+    lines.append("Top-level clusters of the review corpus:")
+    labels = []
+    for i, ch in enumerate(tree["children"], 1):
+        label = f"C{i}"
+        labels.append(label)
+        lines.extend(_summary_lines(ch, label))
+    lines.append("")
+    lines.append(_schema_hint(labels))
+    return "\n".join(lines), labels
+
+
+def _branch_prompt(branch: Dict[str, Any], label: str, context: List[str]) -> Tuple[str, List[str]]:
+    lines = list(context)
+    lines.append(f'Parent category: "{branch["name"]}" — {branch.get("description", "")}')
+    lines.append("Its sub-clusters (nested clusters are indented under their parent):")
+    labels: List[str] = []
+
+    def walk(node: Dict[str, Any], prefix: str, indent: str) -> None:
+        for i, ch in enumerate(node["children"], 1):
+            lab = f"{prefix}.{i}"
+            labels.append(lab)
+            lines.extend(_summary_lines(ch, lab, indent))
+            walk(ch, lab, indent + "    ")
+
+    walk(branch, label, "")
+    lines.append("")
+    lines.append("Name each sub-cluster relative to its parent; do not repeat the parent name.")
+    lines.append(_schema_hint(labels))
+    return "\n".join(lines), labels
+
+
+def _fallback_name(node: Dict[str, Any]) -> str:
+    terms = node["summary"]["terms"][:3]
+    return ", ".join(terms).capitalize() if terms else "Other"
+
+
+def _name_nodes(
+    client: LLMClient, user: str, labels: List[str], by_label: Dict[str, Dict[str, Any]]
+) -> Tuple[int, Optional[str]]:
+    """Apply one naming call; returns (number of clusters named, error or notes)."""
+    try:
+        raw = client.chat(system=SYSTEM_PROMPT, user=user, max_retries=4, request_timeout=75.0, temperature=0.2)
+        data = _extract_json(raw)
+    except Exception as e:
+        return 0, f"naming call failed: {e}"
+    named = 0
+    for item in data.get("nodes") or []:
+        node = by_label.get(str(item.get("id", "")).strip()) if isinstance(item, dict) else None
+        name = str(item.get("name", "")).strip() if node is not None else ""
+        if node is not None and name:
+            node["name"] = name
+            node["description"] = str(item.get("description", "")).strip()
+            named += 1
+    missing = [lab for lab in labels if not by_label[lab].get("name")]
+    notes = str(data.get("notes", "") or "").strip() or None
+    if missing:
+        notes = f"unnamed clusters {', '.join(missing)}" + (f"; {notes}" if notes else "")
+    return named, notes
+
+
+def _unique_siblings(node: Dict[str, Any]) -> None:
+    seen: Dict[str, int] = {}
+    for ch in node.get("children", []):
+        key = ch["name"].lower()
+        if key in seen:
+            seen[key] += 1
+            ch["name"] = f"{ch['name']} ({seen[key]})"
+        else:
+            seen[key] = 1
+        _unique_siblings(ch)
+
+
+def _export(node: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": node["name"],
+        "description": node.get("description", ""),
+        "paper_count": len(node["members"]),
+        "children": [_export(ch) for ch in node.get("children", [])],
+    }
+
+
+def generate_taxonomy_clustered(
+    titles: List[str],
+    paper_ids: List[str],
+    abstracts: Optional[List[str]] = None,
+    full_texts: Optional[List[str]] = None,
+    picoc: Optional[Dict[str, str]] = None,
+    rqs: Optional[List[str]] = None,
+    depth: int = 2,
+    max_children_per_node: int = 6,
+    model: str = "gpt-oss-120b",
+    min_cluster_size: int = 3,
+    workers: int = 4,
+    client: Optional[LLMClient] = None,
+    on_progress: Optional[Callable[[float, str], None]] = None,
+    **_: Any,
+) -> Dict[str, Any]:
+    """
+    Taxonomy for all papers with at most 1 + max_children_per_node LLM calls.
+    `full_texts` is accepted for signature compatibility with
+    generate_taxonomy(); clustering uses titles and abstracts. Extra keyword
+    arguments of the single-prompt engine (max_papers, snippet lengths) are ignored.
+    """
+    from slr.embed.sbert import encode_cached
+
+    def progress(frac: float, msg: str) -> None:
+        if on_progress:
+            on_progress(frac, msg)
+
+    n = len(titles)
+    if not n:
+        return {"taxonomy": {"name": "root", "children": []}, "mapping": [], "notes": "No papers."}
+
+    texts = []
+    for i, t in enumerate(titles):
+        a = abstracts[i] if abstracts and i < len(abstracts) and abstracts[i] else ""
+        texts.append(f"{str(t).strip()}. {str(a).strip()}".strip(". ").strip())
+
+    progress(0.05, f"Embedding {n} papers…")
+    X = encode_cached(texts)
+
+    progress(0.35, "Clustering…")
+    tree = cluster_tree(X, depth=int(depth), max_children=int(max_children_per_node), min_size=int(min_cluster_size))
+    index = TermIndex(texts)
+
+    def summarize(node: Dict[str, Any]) -> None:
+        node["summary"] = {
+            "titles": [str(titles[i]).strip() for i in representatives(X, node["members"], N_TITLES)],
+            "terms": index.top_terms(node["members"], N_TERMS),
+        }
+        node["name"] = ""
+        for ch in node["children"]:
+            summarize(ch)
+
+    summarize(tree)
+    if not tree["children"]:
+        # too few papers to split: a single category
+        tree["children"] = [{**tree, "children": [], "summary": tree["summary"], "name": ""}]
+
+    client = client or LLMClient(model=model)
+    context = _context_lines(picoc, rqs)
+    notes: List[str] = []
+    calls = 0
+
+    progress(0.5, "Naming top-level categories…")
+    user, labels = _top_prompt(tree, context)
+    by_label = {lab: ch for lab, ch in zip(labels, tree["children"])}
+    _, note = _name_nodes(client, user, labels, by_label)
+    calls += 1
+    if note:
+        notes.append(f"top level: {note}")
+    for ch in tree["children"]:
+        ch["name"] = ch["name"] or _fallback_name(ch)
+
+    branches = [(f"C{i}", ch) for i, ch in enumerate(tree["children"], 1) if ch["children"]]
+    if branches:
+        progress(0.65, f"Naming sub-categories of {len(branches)} branches…")
+
+        def name_branch(label: str, branch: Dict[str, Any]) -> Optional[str]:
+            user, labels = _branch_prompt(branch, label, context)
+            by_label: Dict[str, Dict[str, Any]] = {}
+
+            def index_labels(node: Dict[str, Any], prefix: str) -> None:
+                for i, ch in enumerate(node["children"], 1):
+                    by_label[f"{prefix}.{i}"] = ch
+                    index_labels(ch, f"{prefix}.{i}")
+
+            index_labels(branch, label)
+            _, note = _name_nodes(client, user, labels, by_label)
+            return f"{branch['name']}: {note}" if note else None
+
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as ex:
+            for note in ex.map(lambda b: name_branch(*b), branches):
+                calls += 1
+                if note:
+                    notes.append(note)
+
+        def fill(node: Dict[str, Any]) -> None:
+            for ch in node["children"]:
+                ch["name"] = ch["name"] or _fallback_name(ch)
+                fill(ch)
+
+        fill(tree)
+
+    tree["name"] = "root"
+    _unique_siblings(tree)
+
+    mapping: List[Dict[str, Any]] = [{} for _ in range(n)]
+
+    def assign(node: Dict[str, Any], path: List[str]) -> None:
+        if not node["children"]:
+            for i in node["members"]:
+                pid = paper_ids[i] if i < len(paper_ids) else f"paper_{i}"
+                mapping[i] = {"paper_id": pid, "title": titles[i], "path": path}
+            return
+        for ch in node["children"]:
+            assign(ch, path + [ch["name"]])
+
+    assign(tree, [])
+
+    progress(1.0, "Taxonomy ready")
+    summary = f"Cluster-first taxonomy of {n} papers with {calls} LLM call(s)."
+    return {
+        "taxonomy": _export(tree),
+        "mapping": mapping,
+        "notes": " ".join([summary] + notes),
+    }
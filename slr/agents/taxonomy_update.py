@@ -0,0 +1,367 @@
+# slr/agents/taxonomy_update.py
+"""
+Incremental taxonomy maintenance for living reviews.
+
+update_taxonomy() keeps the existing tree and every existing assignment and
+only touches what the new papers require:
+
+1. papers missing from `mapping` are placed into existing leaves
+   (nearest leaf centroid, LLM for low-confidence ones; taxonomy_assign.py)
+2. papers that fit no leaf (best similarity below `min_fit`) get new nodes
+   from one LLM call, if there are at least `min_new_node` of them
+3. leaves that received new papers and now hold more than `max_leaf_size`
+   papers are split by the LLM (one call per leaf, concurrently)
+
+Everything else keeps its name and path, so repeated delta harvests give
+a stable tree and each update costs a handful of small calls.
+"""
+from __future__ import annotations
+import copy
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from slr.agents.taxonomy_assign import assign_to_taxonomy, leaf_nodes, unwrap_tree
+from slr.llm.client import LLMClient
+
+SYSTEM_PROMPT = """You are an expert in systematic literature reviews and taxonomy design.
+You maintain an existing taxonomy while new papers are added to a review. Keep existing categories
+stable; only add or split nodes where the request asks for it, with short, specific names.
+Return STRICT JSON that matches the required schema, with no extra text.
+"""
+
+JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# at most this many paper titles are shown when asking for a split
+SPLIT_MAX_PAPERS = 300
+
+
+def _extract_json(text: str) -> Dict[str, Any]:
+    m = JSON_OBJECT_RE.search((text or "").strip())
+    if not m:
+        raise ValueError("Model did not return JSON.")
+    return json.loads(m.group(0))
+
+
+def _context_lines(picoc: Optional[Dict[str, str]], rqs: Optional[List[str]]) -> List[str]:
+    lines: List[str] = []
+    if picoc:
+        lines.append("PICOC:")
+        for k in ("population", "intervention", "comparison", "outcome", "context"):
+            if picoc.get(k):
+                lines.append(f"- {k.capitalize()}: {picoc[k]}")
+        lines.append("")
+    if rqs:
+        lines.append("Research Questions:")
+        for i, q in enumerate(rqs, 1):
+            lines.append(f"- RQ{i}: {q}")
+        lines.append("")
+    return lines
+
+
+def _child(node: Dict[str, Any], name: str) -> Optional[Dict[str, Any]]:
+    key = name.strip().lower()
+    for ch in node.get("children") or []:
+        if str(ch.get("name", "")).strip().lower() == key:
+            return ch
+    return None
+
+
+def _node_at(tree: Dict[str, Any], path: List[str]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """(parent, node) for a root-child..node path, or (None, None)."""
+    parent, node = None, tree
+    for name in path:
+        parent, node = node, _child(node, name)
+        if node is None:
+            return None, None
+    return parent, node
+
+
+def _unique_name(
+    parent: Dict[str, Any],
+    name: str,
+    skip: Optional[Dict[str, Any]] = None,
+    pending: Sequence[Dict[str, Any]] = (),
+) -> str:
+    """`name`, numbered if a child of `parent` (other than `skip`) or a `pending` sibling already has it."""
+    taken = {str(c.get("name", "")).strip().lower() for c in parent.get("children") or [] if c is not skip}
+    taken |= {str(c.get("name", "")).strip().lower() for c in pending}
+    out, k = name, 2
+    while out.lower() in taken:
+        out, k = f"{name} ({k})", k + 1
+    return out
+
+
+def _add_leaf(tree: Dict[str, Any], path: List[str], description: str, used: set) -> Optional[List[str]]:
+    """
+    Create the nodes of `path` that do not exist yet and return the path with
+    existing names. Refuses (None) to end on an inner node or to grow below
+    a leaf in `used` (its papers would end up on an inner node). The returned
+    leaf is added to `used`, as the caller is about to put papers on it.
+    """
+    node, names = tree, []
+    for i, name in enumerate(path):
+        nxt = _child(node, name)
+        if nxt is None:
+            break
+        names.append(nxt["name"])
+        last = i == len(path) - 1
+        if last and nxt.get("children"):
+            return None
+        if not last and not nxt.get("children") and " / ".join(names).lower() in used:
+            return None
+        node = nxt
+
+    node, out = tree, []
+    for name in path:
+        nxt = _child(node, name)
+        if nxt is None:
+            nxt = {"name": name, "children": []}
+            node.setdefault("children", []).append(nxt)
+        out.append(nxt["name"])
+        node = nxt
+    if description and not node.get("description"):
+        node["description"] = description
+    used.add(" / ".join(out).lower())
+    return out
+
+
+def _new_nodes(
+    client: LLMClient,
+    tree: Dict[str, Any],
+    papers: List[Tuple[str, str, str]],
+    context: List[str],
+    depth: int,
+) -> List[Dict[str, Any]]:
+    lines = list(context)
+    lines.append("Existing taxonomy (leaf paths):")
+    for path, _ in leaf_nodes(tree):
+        lines.append(f"- {' > '.join(path)}")
+    lines.append("")
+    lines.append("New papers that fit none of these leaves:")
+    for pid, title, abstract in papers:
+        snip = abstract.strip()[:250]
+        lines.append(f"- [{pid}] {title}" + (f" | abs: {snip}" if snip else ""))
+    lines.append("")
+    lines.append(
+        f"Create new leaves for these papers (paths of at most {depth} levels). A new leaf may sit under an "
+        "existing category (repeat its exact names in the path) or under a new top-level category. "
+        "A paper that does fit an existing leaf after all may be mapped to that existing path."
+    )
+    lines.append(
+        'Return STRICT JSON: {"nodes": [{"path": ["...", "..."], "description": "...", "paper_ids": ["..."]}], '
+        '"notes": "..."} with every paper_id in exactly one node.'
+    )
+    raw = client.chat(system=SYSTEM_PROMPT, user="\n".join(lines), max_retries=4, request_timeout=75.0, temperature=0.2)
+    return [n for n in _extract_json(raw).get("nodes") or [] if isinstance(n, dict)]
+
+
+def _split(
+    client: LLMClient,
+    path: List[str],
+    leaf: Dict[str, Any],
+    papers: List[Tuple[str, str]],
+    context: List[str],
+    max_children: int,
+) -> List[Dict[str, Any]]:
+    lines = list(context)
+    desc = str(leaf.get("description", "") or "").strip()
+    lines.append(f"Category to split: {' > '.join(path)}" + (f" — {desc}" if desc else ""))
+    lines.append(f"It holds {len(papers)} papers:")
+    for pid, title in papers[:SPLIT_MAX_PAPERS]:
+        lines.append(f"- [{pid}] {title}")
+    lines.append("")
+    lines.append(
+        f"Split it into 2-{max_children} sub-categories that separate these papers well. "
+        "Do not repeat the category name."
+    )
+    lines.append(
+        'Return STRICT JSON: {"children": [{"name": "...", "description": "...", "paper_ids": ["..."]}], '
+        '"notes": "..."} with every listed paper_id in exactly one child.'
+    )
+    raw = client.chat(system=SYSTEM_PROMPT, user="\n".join(lines), max_retries=4, request_timeout=75.0, temperature=0.2)
+    return [c for c in _extract_json(raw).get("children") or [] if isinstance(c, dict) and str(c.get("name", "")).strip()]
+
+
+def update_taxonomy(
+    tree: Dict[str, Any],
+    mapping: List[Dict[str, Any]],
+    titles: List[str],
+    paper_ids: List[str],
+    abstracts: Optional[List[str]] = None,
+    picoc: Optional[Dict[str, str]] = None,
+    rqs: Optional[List[str]] = None,
+    depth: int = 2,
+    max_children_per_node: int = 6,
+    max_leaf_size: int = 40,
+    min_fit: float = 0.3,
+    min_new_node: int = 3,
+    min_confidence: float = 0.5,
+    model: str = "gpt-oss-120b",
+    workers: int = 4,
+    client: Optional[LLMClient] = None,
+    on_progress: Optional[Callable[[float, str], None]] = None,
+    **_: Any,
+) -> Dict[str, Any]:
+    """
+    Add the papers missing from `mapping` to `tree`. Returns the same shape
+    as generate_taxonomy() plus "stats": {"taxonomy", "mapping", "notes", "stats"}.
+    """
+    from slr.embed.sbert import encode_cached
+
+    def progress(frac: float, msg: str) -> None:
+        if on_progress:
+            on_progress(frac, msg)
+
+    tree = copy.deepcopy(unwrap_tree(tree))
+    tree.setdefault("name", "root")
+    n = len(titles)
+    abstracts = abstracts or [""] * n
+    ids = [paper_ids[i] if i < len(paper_ids) else f"paper_{i}" for i in range(n)]
+    abs_of = {ids[i]: str(abstracts[i] if i < len(abstracts) else "") for i in range(n)}
+    title_of = {ids[i]: str(titles[i]) for i in range(n)}
+
+    by_id: Dict[str, Dict[str, Any]] = {}
+    for m in mapping or []:
+        pid = str(m.get("paper_id", ""))
+        if pid and isinstance(m.get("path"), list):
+            by_id[pid] = dict(m)
+    new = [i for i in range(n) if ids[i] not in by_id]
+    stats = {"new_papers": len(new), "new_nodes": 0, "splits": 0, "llm_calls": 0}
+    if not new:
+        return {"taxonomy": tree, "mapping": list(by_id.values()), "notes": "No new papers; taxonomy unchanged.",
+                "stats": stats}
+
+    client = client or LLMClient(model=model)
+    context = _context_lines(picoc, rqs)
+    notes: List[str] = []
+
+    # 1) nearest existing leaf for every new paper (no LLM yet)
+    progress(0.05, f"Placing {len(new)} new papers…")
+    placed = assign_to_taxonomy(
+        tree, [titles[i] for i in new], [ids[i] for i in new], [abs_of[ids[i]] for i in new],
+        mapping=list(by_id.values()), escalate=False,
+    )["mapping"]
+    misfits = [m for m in placed if m["similarity"] < float(min_fit)]
+    if len(misfits) < int(min_new_node):
+        misfits = []
+    misfit_ids = {m["paper_id"] for m in misfits}
+    for m in placed:
+        by_id[m["paper_id"]] = m
+
+    # 2) new nodes for papers that fit nowhere
+    if misfits:
+        progress(0.3, f"Creating nodes for {len(misfits)} papers that fit no leaf…")
+        used = {" / ".join(m["path"]).lower() for m in by_id.values() if m["paper_id"] not in misfit_ids}
+        try:
+            stats["llm_calls"] += 1
+            proposals = _new_nodes(
+                client, tree, [(m["paper_id"], m["title"], abs_of.get(m["paper_id"], "")) for m in misfits],
+                context, int(depth),
+            )
+        except Exception as e:
+            proposals = []
+            notes.append(f"new-node call failed, papers kept at their nearest leaf: {e}")
+        leaves_before = {" / ".join(p).lower() for p, _ in leaf_nodes(tree)}
+        for prop in proposals:
+            path = [str(p).strip() for p in prop.get("path") or [] if str(p).strip()][: int(depth)]
+            path = _add_leaf(tree, path, str(prop.get("description", "")).strip(), used) if path else None
+            if not path:
+                continue
+            if " / ".join(path).lower() not in leaves_before:
+                stats["new_nodes"] += 1
+            for pid in prop.get("paper_ids") or []:
+                pid = str(pid)
+                if pid in misfit_ids:
+                    by_id[pid].update(path=list(path), assigned_by="llm_new_node")
+                    misfit_ids.discard(pid)
+        # papers the LLM did not place stay at their nearest leaf
+
+    # 3) LLM for the remaining low-confidence placements
+    unsure = [m for m in placed if m["assigned_by"] == "centroid" and m["confidence"] < float(min_confidence)]
+    if unsure:
+        progress(0.5, f"Asking the LLM about {len(unsure)} low-confidence papers…")
+        res = assign_to_taxonomy(
+            tree, [m["title"] for m in unsure], [m["paper_id"] for m in unsure],
+            [abs_of.get(m["paper_id"], "") for m in unsure],
+            mapping=list(by_id.values()), min_confidence=1.01, client=client, workers=workers,
+        )
+        stats["llm_calls"] += res["stats"]["llm_calls"]
+        for m in res["mapping"]:
+            by_id[m["paper_id"]] = m
+
+    # 4) split leaves that grew past max_leaf_size
+    counts: Dict[str, int] = {}
+    for m in by_id.values():
+        key = " / ".join(m["path"]).lower()
+        counts[key] = counts.get(key, 0) + 1
+    grown = {" / ".join(by_id[ids[i]]["path"]).lower() for i in new}
+    to_split = []
+    for path, leaf in leaf_nodes(tree):
+        key = " / ".join(path).lower()
+        if key in grown and counts.get(key, 0) > int(max_leaf_size):
+            members = [(pid, m["title"]) for pid, m in by_id.items() if " / ".join(m["path"]).lower() == key]
+            to_split.append((path, leaf, members))
+
+    if to_split:
+        progress(0.7, f"Splitting {len(to_split)} oversized leaves…")
+
+        def ask(item):
+            path, leaf, members = item
+            try:
+                return item, _split(client, path, leaf, members, context, int(max_children_per_node)), None
+            except Exception as e:
+                return item, None, str(e)
+
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as ex:
+            results = list(ex.map(ask, to_split))
+
+        for (path, leaf, members), children, err in results:
+            stats["llm_calls"] += 1
+            if not children or len(children) < 2:
+                notes.append(f"could not split '{' > '.join(path)}'" + (f": {err}" if err else ""))
+                continue
+            parent = _node_at(tree, path[:-1])[1] if len(path) > 1 else tree
+            as_children = len(path) < int(depth)
+            holder = leaf if as_children else parent
+            new_nodes = []
+            for ch in children:
+                node = {"name": str(ch["name"]).strip(), "description": str(ch.get("description", "")).strip(),
+                        "children": []}
+                # at full depth the new nodes are inserted only below, so check them against each other too
+                node["name"] = _unique_name(holder, node["name"], skip=leaf, pending=new_nodes)
+                new_nodes.append(node)
+                if as_children:
+                    leaf.setdefault("children", []).append(node)
+            if not as_children:
+                # at full depth: the leaf is replaced by its parts (siblings)
+                pos = parent["children"].index(leaf)
+                parent["children"][pos:pos + 1] = new_nodes
+            base = path if as_children else path[:-1]
+            target = {}
+            for ch, node in zip(children, new_nodes):
+                for pid in ch.get("paper_ids") or []:
+                    target.setdefault(str(pid), base + [node["name"]])
+            # papers the LLM left out: nearest new node by embedding
+            member_ids = [pid for pid, _ in members]
+            rest = [pid for pid in member_ids if pid not in target]
+            if rest:
+                N = encode_cached([f"{nd['name']}: {nd['description']}" for nd in new_nodes])
+                X = encode_cached([
+                    f"{title_of.get(pid) or by_id[pid].get('title', '')}. {abs_of.get(pid, '')}".strip(". ").strip()
+                    for pid in rest
+                ])
+                for pid, k in zip(rest, np.argmax(X @ N.T, axis=1)):
+                    target[pid] = base + [new_nodes[int(k)]["name"]]
+            for pid in member_ids:
+                by_id[pid]["path"] = list(target[pid])
+            stats["splits"] += 1
+            stats["new_nodes"] += len(new_nodes)
+
+    progress(1.0, "Taxonomy updated")
+    summary = (f"Incremental update: {len(new)} new papers, {stats['new_nodes']} new nodes, "
+               f"{stats['splits']} split leaves, {stats['llm_calls']} LLM call(s).")
+    return {"taxonomy": tree, "mapping": list(by_id.values()), "notes": " ".join([summary] + notes), "stats": stats}
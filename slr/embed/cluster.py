@@ -0,0 +1,202 @@
+# slr/embed/cluster.py
+"""
+Hierarchical clustering of paper embeddings (cluster-first taxonomy).
+
+- cluster_tree(X, depth, max_children, min_size) -> nested dict tree of member indices
+- TermIndex(texts).top_terms(members, k)         -> distinctive terms of a cluster
+- representatives(X, members, k)                 -> members closest to the centroid
+- leaves(tree)                                   -> [(path of child positions, node)]
+
+Each node is split with Ward agglomerative clustering (scipy). The number
+of children is read off the dendrogram: the cut with the largest relative
+gap in merge heights between 3 and max_children clusters. Nodes larger than
+AGGLO_MAX points are first reduced to k-means micro-clusters, so memory stays
+bounded for tens of thousands of papers.
+"""
+from __future__ import annotations
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Ward on more points than this needs an O(n^2) distance matrix; above it,
+# cluster k-means centroids instead
+AGGLO_MAX = 2000
+
+STOPWORDS = frozenset("""
+a about above across after again against all also among an and any are as at be because been
+before being between both but by can could did do does doing during each either et etc for from
+further had has have having here how however i if in into is it its itself just may might more
+most much must no nor not of off on once one only or other our out over own per same several
+should so some such than that the their them then there these they this those through thus to
+too towards under until up upon us using via was we were what when where whether which while who
+whom why will with within without would yet paper study approach method methods based results
+new novel proposed propose show shows present presents use used uses two three first second also
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9\-]{2,}")
+
+Node = Dict[str, Any]
+
+
+def _kmeans(X: np.ndarray, k: int, seed: int = 0, iters: int = 25) -> np.ndarray:
+    """Plain Lloyd's k-means with k-means++ seeding; returns labels."""
+    rng = np.random.default_rng(seed)
+    n = X.shape[0]
+    centers = [X[int(rng.integers(n))]]
+    d2 = np.sum((X - centers[0]) ** 2, axis=1)
+    for _ in range(1, k):
+        p = d2 / d2.sum() if d2.sum() > 0 else None
+        c = X[int(rng.choice(n, p=p))]
+        centers.append(c)
+        d2 = np.minimum(d2, np.sum((X - c) ** 2, axis=1))
+    C = np.stack(centers)
+    labels = np.zeros(n, dtype=np.int64)
+    for it in range(iters):
+        # squared distances without materializing (n, k, dim)
+        dist = (X * X).sum(1)[:, None] - 2.0 * X @ C.T + (C * C).sum(1)[None, :]
+        new = np.argmin(dist, axis=1)
+        if it and np.array_equal(new, labels):
+            break
+        labels = new
+        for j in range(k):
+            sel = labels == j
+            if sel.any():
+                C[j] = X[sel].mean(axis=0)
+    return labels
+
+
+def _choose_k(heights: np.ndarray, max_k: int) -> int:
+    """Cut with the largest relative gap between consecutive merge heights."""
+    lo = min(3, max_k)
+    best_k, best_gap = max_k, -1.0
+    for k in range(lo, max_k + 1):
+        # k clusters = undo the last k-1 merges; the cut lies between h[-k] and h[-(k-1)]
+        below, above = float(heights[-k]), float(heights[-(k - 1)])
+        gap = above / max(below, 1e-9)
+        if gap > best_gap:
+            best_k, best_gap = k, gap
+    return best_k
+
+
+def split(X: np.ndarray, max_children: int, min_size: int = 2, seed: int = 0) -> List[np.ndarray]:
+    """Partition the rows of X into 2..max_children groups (arrays of row positions)."""
+    from scipy.cluster.hierarchy import fcluster, linkage
+
+    n = X.shape[0]
+    max_k = min(int(max_children), n // max(1, int(min_size)))
+    if max_k < 2:
+        return [np.arange(n)]
+
+    if n > AGGLO_MAX:
+        micro = _kmeans(X, AGGLO_MAX // 4, seed=seed)
+        ids = np.unique(micro)
+        points = np.stack([X[micro == m].mean(axis=0) for m in ids])
+        owner = np.searchsorted(ids, micro)
+    else:
+        points, owner = X, np.arange(n)
+    if points.shape[0] <= max_k:
+        groups = [np.where(owner == j)[0] for j in range(points.shape[0])]
+        return [g for g in groups if len(g)]
+
+    Z = linkage(points.astype(np.float64), method="ward")
+    k = _choose_k(Z[:, 2], max_k)
+    labels = fcluster(Z, k, criterion="maxclust")[owner]
+    groups = [np.where(labels == lab)[0] for lab in np.unique(labels)]
+    # largest first: stable, readable order for prompts and previews
+    return sorted(groups, key=len, reverse=True)
+
+
+def cluster_tree(
+    X: np.ndarray,
+    depth: int = 2,
+    max_children: int = 6,
+    min_size: int = 3,
+    seed: int = 0,
+) -> Node:
+    """
+    Recursive split of all rows of X (unit-length embeddings) into a tree of
+    at most `depth` levels below the root. Nodes: {"members": [row, ...],
+    "children": [node, ...]}; leaves have no children. Nodes smaller than
+    2 * min_size are not split further.
+    """
+    def build(members: np.ndarray, level: int) -> Node:
+        node: Node = {"members": [int(i) for i in members], "children": []}
+        if level >= depth or len(members) < 2 * min_size:
+            return node
+        parts = split(X[members], max_children, min_size=min_size, seed=seed + level)
+        if len(parts) > 1:
+            node["children"] = [build(members[p], level + 1) for p in parts]
+        return node
+
+    return build(np.arange(X.shape[0]), 0)
+
+
+def leaves(tree: Node) -> List[Tuple[Tuple[int, ...], Node]]:
+    out: List[Tuple[Tuple[int, ...], Node]] = []
+
+    def walk(node: Node, path: Tuple[int, ...]) -> None:
+        if not node.get("children"):
+            out.append((path, node))
+            return
+        for i, ch in enumerate(node["children"]):
+            walk(ch, path + (i,))
+
+    walk(tree, ())
+    return out
+
+
+def representatives(X: np.ndarray, members: Sequence[int], k: int = 5) -> List[int]:
+    """Members whose embeddings are closest to the cluster centroid."""
+    idx = np.asarray(members, dtype=np.int64)
+    if not len(idx):
+        return []
+    c = X[idx].mean(axis=0)
+    c /= max(float(np.linalg.norm(c)), 1e-12)
+    order = np.argsort(-(X[idx] @ c))[:k]
+    return [int(idx[i]) for i in order]
+
+
+def _terms(text: str) -> List[str]:
+    toks = [t.strip("-") for t in _TOKEN_RE.findall((text or "").lower())]
+    toks = [t for t in toks if len(t) > 2 and t not in STOPWORDS and not t.isdigit()]
+    bigrams = [f"{a} {b}" for a, b in zip(toks, toks[1:])]
+    return toks + bigrams
+
+
+class TermIndex:
+    """Document frequencies of unigrams/bigrams, for c-TF-IDF style cluster terms."""
+
+    def __init__(self, texts: Sequence[str]):
+        self.docs: List[frozenset] = [frozenset(_terms(t)) for t in texts]
+        self.df: Counter = Counter()
+        for d in self.docs:
+            self.df.update(d)
+        self.n = len(self.docs)
+
+    def top_terms(self, members: Sequence[int], k: int = 8, exclude: Optional[Sequence[str]] = None) -> List[str]:
+        local: Counter = Counter()
+        for i in members:
+            local.update(self.docs[i])
+        n_c = max(1, len(members))
+        min_df = 2 if n_c >= 4 else 1
+        skip = set(exclude or ())
+        scored = []
+        for term, c in local.items():
+            if c < min_df or term in skip:
+                continue
+            idf = math.log((self.n + 1) / (self.df[term] + 1)) + 1.0
+            bonus = 1.3 if " " in term else 1.0
+            scored.append((c / n_c * idf * bonus, term))
+        scored.sort(reverse=True)
+        out: List[str] = []
+        for _, term in scored:
+            # drop unigrams already covered by a chosen bigram (and vice versa)
+            if any(term in o.split() or o in term.split() for o in out):
+                continue
+            out.append(term)
+            if len(out) >= k:
+                break
+        return out
@@ -0,0 +1,162 @@
+# slr/embed/expansion.py
+"""
+Corpus-driven synonym expansion (no LLM round-trip).
+
+- mine_phrases(texts) -> Counter            1-3 word phrases of a harvested corpus
+- PhraseIndex(counts)                       phrase embeddings (persistent cache, embedded once)
+  .suggest(terms, k)                        nearest phrases to a set of facet terms
+- get_phrase_index(texts)                   one index per corpus and process
+- expand_facets(index, picoc, synonyms, k)  {facet: [(phrase, score, similarity, count)]}
+
+Suggestions are ranked by cosine similarity to the closest facet term, plus
+a small bonus for corpus frequency (FREQ_WEIGHT), so common phrasings of a
+concept rank above one-off wordings. After the index is built, a
+suggestion is one matrix-vector product per facet.
+"""
+from __future__ import annotations
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from slr.embed.cluster import STOPWORDS
+from slr.embed.synonyms import FACETS
+
+FREQ_WEIGHT = 0.08
+MAX_PHRASES = 5000
+
+_WORD_RE = re.compile(r"[a-z][a-z0-9\-]*[a-z0-9]|[a-z]")
+# stopwords allowed inside a 3-word phrase ("analysis of algorithms")
+_INNER_OK = frozenset({"of", "for", "in", "and", "on", "to", "with"})
+
+Suggestion = Tuple[str, float, float, int]
+
+
+def _norm(t: str) -> str:
+    """Lowercase, collapse spaces and fold plain plurals, for "already a synonym" checks."""
+    words = re.sub(r"\s+", " ", (t or "").strip().lower()).split(" ")
+    return " ".join(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words)
+
+
+def mine_phrases(texts: Iterable[str], max_n: int = 3, min_count: int = 2) -> Counter:
+    """Count 1..max_n word phrases (per document) that do not start or end with a stopword."""
+    counts: Counter = Counter()
+    for text in texts:
+        seen = set()
+        for sentence in re.split(r"[.;:!?()\[\]\n]", (text or "").lower()):
+            words = _WORD_RE.findall(sentence)
+            for n in range(1, max_n + 1):
+                for i in range(len(words) - n + 1):
+                    gram = words[i:i + n]
+                    if gram[0] in STOPWORDS or gram[-1] in STOPWORDS or len(gram[-1]) < 3:
+                        continue
+                    if any(w in STOPWORDS and w not in _INNER_OK for w in gram[1:-1]):
+                        continue
+                    if n == 1 and (len(gram[0]) < 4 or gram[0].isdigit()):
+                        continue
+                    seen.add(" ".join(gram))
+        counts.update(seen)
+    return Counter({p: c for p, c in counts.items() if c >= min_count})
+
+
+class PhraseIndex:
+    def __init__(self, counts: Counter, model_name: Optional[str] = None, max_phrases: int = MAX_PHRASES):
+        from slr.embed.sbert import encode_cached
+
+        top = counts.most_common(int(max_phrases))
+        self.phrases: List[str] = [p for p, _ in top]
+        self.counts = np.array([c for _, c in top], dtype=np.float32)
+        self.model_name = model_name
+        self.E = encode_cached(self.phrases, model_name=model_name) if self.phrases else np.zeros((0, 1), np.float32)
+        top_count = float(self.counts.max()) if len(self.counts) else 1.0
+        self.freq = np.log1p(self.counts) / math.log1p(top_count)
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def suggest(
+        self,
+        terms: Sequence[str],
+        k: int = 10,
+        exclude: Optional[Iterable[str]] = None,
+        min_sim: float = 0.45,
+    ) -> List[Suggestion]:
+        """Phrases closest to any of `terms`: [(phrase, score, similarity, corpus count)]."""
+        from slr.embed.sbert import encode_cached
+
+        terms = [t for t in (s.strip() for s in terms) if t]
+        if not terms or not self.phrases:
+            return []
+        Q = encode_cached(terms, model_name=self.model_name)
+        sims = (self.E @ Q.T).max(axis=1)
+        score = sims + FREQ_WEIGHT * self.freq
+        skip = {_norm(t) for t in terms} | {_norm(t) for t in exclude or ()}
+        out: List[Suggestion] = []
+        for i in np.argsort(-score):
+            if sims[i] < min_sim:
+                continue
+            p = self.phrases[i]
+            if _norm(p) in skip:
+                continue
+            out.append((p, round(float(score[i]), 4), round(float(sims[i]), 4), int(self.counts[i])))
+            if len(out) >= k:
+                break
+        return out
+
+
+def corpus_key(texts: Sequence[str], model_name: Optional[str] = None) -> str:
+    h = hashlib.sha1((model_name or "").encode("utf-8"))
+    for t in texts:
+        h.update((t or "").encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+_INDEXES: "OrderedDict[str, PhraseIndex]" = OrderedDict()
+_INDEXES_LOCK = threading.Lock()
+_KEEP = 4
+
+
+def get_phrase_index(texts: Sequence[str], model_name: Optional[str] = None, key: Optional[str] = None) -> PhraseIndex:
+    """
+    Phrase index for a corpus, built once per process (the last few corpora are kept).
+
+    `key` identifies the corpus when the caller already has a content key for it
+    (e.g. the memo fingerprint of its rows), so the texts are not hashed again.
+    """
+    key = f"{key}:{model_name or ''}" if key else corpus_key(texts, model_name)
+    with _INDEXES_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is not None:
+            _INDEXES.move_to_end(key)
+            return idx
+    idx = PhraseIndex(mine_phrases(texts), model_name=model_name)
+    with _INDEXES_LOCK:
+        _INDEXES[key] = idx
+        while len(_INDEXES) > _KEEP:
+            _INDEXES.popitem(last=False)
+    return idx
+
+
+def expand_facets(
+    index: PhraseIndex,
+    picoc: Dict[str, str],
+    synonyms: Dict[str, List[str]],
+    k: int = 10,
+    min_sim: float = 0.45,
+) -> Dict[str, List[Suggestion]]:
+    """
+    Suggestions per facet: neighbours of the facet's PICOC text and current
+    synonyms that are not synonyms already.
+    """
+    out: Dict[str, List[Suggestion]] = {}
+    for facet in FACETS:
+        base = (picoc.get(facet.lower(), "") or picoc.get(facet, "") or "").strip()
+        current = [t for t in synonyms.get(facet, []) or [] if isinstance(t, str)]
+        terms = ([base] if base else []) + current
+        out[facet] = index.suggest(terms, k=k, exclude=current, min_sim=min_sim) if terms else []
+    return out
@@ -0,0 +1,170 @@
+# slr/embed/onnx_backend.py
+"""
+ONNX Runtime CPU backend for SBERT models (SBERT_BACKEND=onnx).
+
+The first use exports the transformer of the SentenceTransformer model to
+ONNX (this step needs torch once) and applies dynamic int8 quantization of
+the weights; the files are kept under <data root>/onnx/<model>/. Later
+processes only need onnxruntime and the tokenizer, no torch.
+
+OnnxEncoder exposes the subset of SentenceTransformer used by
+slr/embed/sbert.py (`encode`, `get_sentence_embedding_dimension`), so both
+backends are interchangeable. Pooling (mean or CLS) and max_seq_length are
+taken from the SentenceTransformer config at export time.
+
+Env:
+- SBERT_ONNX_QUANTIZE=0    use the fp32 ONNX graph instead of int8
+- SBERT_ONNX_THREADS=N     intra-op threads (default: onnxruntime's choice)
+"""
+from __future__ import annotations
+import json
+import os
+import re
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from slr.store.paths import data_dir
+
+META_FILE = "slr_onnx.json"
+
+
+def quantize_enabled() -> bool:
+    return os.getenv("SBERT_ONNX_QUANTIZE", "1").strip().lower() not in ("0", "false", "no")
+
+
+def onnx_dir(model_name: str) -> str:
+    return data_dir("onnx", re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name).strip("_") or "default")
+
+
+def export_onnx(model_name: str, out_dir: Optional[str] = None, quantize: bool = True) -> str:
+    """Export `model_name` to ONNX (+ int8 copy) with its tokenizer; returns the directory."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = out_dir or onnx_dir(model_name)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    hf_model = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    pooling = "mean"
+    if len(st_model) > 1 and hasattr(st_model[1], "get_pooling_mode_str"):
+        pooling = st_model[1].get_pooling_mode_str()
+    if pooling not in ("mean", "cls"):
+        raise ValueError(f"unsupported pooling mode for ONNX export: {pooling}")
+
+    sample = tokenizer(["export sample"], return_tensors="pt", padding=True, truncation=True)
+    input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample]
+    dynamic = {k: {0: "batch", 1: "seq"} for k in input_names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "seq"}
+
+    class _LastHidden(torch.nn.Module):
+        # export only last_hidden_state; pooling runs in numpy
+        def __init__(self, m):
+            super().__init__()
+            self.m = m
+
+        def forward(self, *inputs):
+            return self.m(**dict(zip(input_names, inputs)), return_dict=False)[0]
+
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHidden(hf_model),
+            tuple(sample[k] for k in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=14,
+            do_constant_folding=True,
+        )
+    tokenizer.save_pretrained(out_dir)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, os.path.join(out_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+    meta = {
+        "model_name": model_name,
+        "pooling": pooling,
+        "max_seq_length": int(st_model.max_seq_length or 256),
+        "dim": int(st_model.get_sentence_embedding_dimension()),
+        "inputs": input_names,
+    }
+    with open(os.path.join(out_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return out_dir
+
+
+class OnnxEncoder:
+    def __init__(self, model_dir: str, quantized: bool = True, threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, META_FILE), "r", encoding="utf-8") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        path = os.path.join(model_dir, "model.int8.onnx" if quantized else "model.onnx")
+        if not os.path.exists(path):
+            path = os.path.join(model_dir, "model.onnx")
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.max_seq_length = int(self.meta.get("max_seq_length", 256))
+        self.model_path = path
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.meta["dim"])
+
+    def _embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        enc = self.tokenizer(
+            list(texts), padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        feeds = {k: enc[k].astype(np.int64) for k in self.input_names if k in enc}
+        if "token_type_ids" in self.input_names and "token_type_ids" not in feeds:
+            feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+        hidden = self.session.run(["last_hidden_state"], feeds)[0]
+        if self.meta.get("pooling") == "cls":
+            return hidden[:, 0]
+        mask = enc["attention_mask"].astype(np.float32)[:, :, None]
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 64,
+        normalize_embeddings: bool = False,
+        **_: Any,
+    ) -> np.ndarray:
+        """SentenceTransformer.encode-compatible: returns a float32 (n, dim) array."""
+        texts = [str(t) for t in sentences]
+        out = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        if not texts:
+            return out
+        # length-sorted batches: far less padding than input order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        bs = max(1, int(batch_size))
+        for start in range(0, len(order), bs):
+            idx = order[start:start + bs]
+            out[idx] = self._embed_batch([texts[i] for i in idx])
+        if normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out
+
+
+def load_onnx_encoder(model_name: str) -> OnnxEncoder:
+    """Encoder for `model_name`: an exported model directory, or a model id exported on first use."""
+    quantized = quantize_enabled()
+    threads = int(os.getenv("SBERT_ONNX_THREADS", "0") or 0) or None
+    if os.path.isfile(os.path.join(model_name, META_FILE)):
+        return OnnxEncoder(model_name, quantized=quantized, threads=threads)
+    model_dir = onnx_dir(model_name)
+    if not os.path.isfile(os.path.join(model_dir, META_FILE)):
+        export_onnx(model_name, model_dir, quantize=True)
+    return OnnxEncoder(model_dir, quantized=quantized, threads=threads)
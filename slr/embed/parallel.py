@@ -0,0 +1,197 @@
+# slr/embed/parallel.py
+"""
+Multi-process SBERT encoding for large corpora (CPU).
+
+encode_cached() only uses the pool when the model runs on the CPU
+(slr.embed.sbert.sbert_device); with a GPU one process encodes faster.
+
+- encode_many(texts, store=...) -> (X, stats)   encode every text in a process pool
+- encode_corpus(texts)          -> (X, stats)   same, but only texts missing from the
+                                                embedding store are encoded
+
+Each worker process loads one model copy with `threads` intra-op threads
+(torch.set_num_threads / SBERT_ONNX_THREADS), so processes x threads matches
+the core count instead of one encode call fighting over all cores. Texts are
+sorted by length and cut into chunks, so every batch pads to similar lengths;
+longest chunks are dispatched first to balance the tail. Finished chunks are
+written to the embedding store as they arrive, so an interrupted run keeps
+its progress.
+
+Env:
+- SBERT_PROCESSES=N            worker processes (default: cores // threads)
+- SBERT_THREADS_PER_PROCESS=N  threads per worker (default 2)
+- SBERT_PARALLEL_MIN=N         encode_cached() uses the pool from this many misses on
+                               (default 5000; 0 disables)
+"""
+from __future__ import annotations
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Progress = Callable[[int, int, float], None]
+
+_WORKER_MODEL: Any = None
+
+
+def threads_per_process() -> int:
+    return max(1, int(os.getenv("SBERT_THREADS_PER_PROCESS", "2") or 2))
+
+
+def default_processes(threads: Optional[int] = None) -> int:
+    env = int(os.getenv("SBERT_PROCESSES", "0") or 0)
+    if env > 0:
+        return env
+    return max(1, (os.cpu_count() or 1) // (threads or threads_per_process()))
+
+
+def parallel_min() -> int:
+    """Miss count from which encode_cached() switches to the pool (0 = never)."""
+    return int(os.getenv("SBERT_PARALLEL_MIN", "5000") or 0)
+
+
+def _init_worker(model_name: str, backend: str, threads: int, device: str = "cpu") -> None:
+    global _WORKER_MODEL
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "SBERT_ONNX_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    if backend == "torch":
+        import torch
+
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # already set in this process
+    from slr.embed.sbert import load_sbert
+
+    _WORKER_MODEL = load_sbert(model_name, device=device, backend=backend)
+
+
+def _encode_chunk(args: Tuple[int, List[str], int]) -> Tuple[int, np.ndarray, float]:
+    chunk_id, texts, batch_size = args
+    t0 = time.perf_counter()
+    X = _WORKER_MODEL.encode(
+        texts,
+        batch_size=int(batch_size),
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    return chunk_id, np.asarray(X, dtype=np.float32), time.perf_counter() - t0
+
+
+def encode_many(
+    texts: Sequence[str],
+    model_name: Optional[str] = None,
+    backend: Optional[str] = None,
+    processes: Optional[int] = None,
+    threads: Optional[int] = None,
+    chunk_size: int = 256,
+    batch_size: int = 64,
+    store: Any = None,
+    keep: bool = True,
+    on_progress: Optional[Progress] = None,
+    device: str = "cpu",
+) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+    """
+    Normalized float32 embeddings of all `texts` (input order), encoded by a
+    pool of worker processes on `device`. Each finished chunk is put into
+    `store` (an EmbeddingStore) when given. keep=False returns no matrix
+    (store-only runs).
+    """
+    from slr.embed.sbert import DEFAULT_SBERT_MODEL, sbert_backend
+
+    name = model_name or DEFAULT_SBERT_MODEL
+    backend = backend or sbert_backend()
+    threads = int(threads or threads_per_process())
+    procs = int(processes or default_processes(threads))
+    texts = [str(t) for t in texts]
+    n = len(texts)
+
+    order = sorted(range(n), key=lambda i: len(texts[i]), reverse=True)
+    chunks = [order[k:k + int(chunk_size)] for k in range(0, n, int(chunk_size))]
+    procs = max(1, min(procs, len(chunks)))
+
+    out: Optional[np.ndarray] = None
+    done, busy = 0, 0.0
+    t0 = time.perf_counter()
+    ctx = mp.get_context("spawn")  # no forked torch/OpenMP state in workers
+    with ProcessPoolExecutor(max_workers=procs, mp_context=ctx, initializer=_init_worker,
+                             initargs=(name, backend, threads, device)) as ex:
+        futures = [ex.submit(_encode_chunk, (k, [texts[i] for i in idx], batch_size)) for k, idx in enumerate(chunks)]
+        try:
+            for fut in as_completed(futures):
+                k, X, secs = fut.result()
+                busy += secs
+                idx = chunks[k]
+                if store is not None:
+                    store.put([texts[i] for i in idx], X)
+                if keep:
+                    if out is None:
+                        out = np.zeros((n, X.shape[1]), dtype=np.float32)
+                    out[idx] = X
+                done += len(idx)
+                if on_progress:
+                    on_progress(done, n, done / max(time.perf_counter() - t0, 1e-9))
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+    seconds = time.perf_counter() - t0
+    stats = {
+        "texts": n,
+        "processes": procs,
+        "threads_per_process": threads,
+        "chunks": len(chunks),
+        "seconds": round(seconds, 2),
+        "texts_per_s": round(n / max(seconds, 1e-9), 1),
+        # steady-state rate: worker time inside model.encode, without process start-up and model loading
+        "encode_texts_per_s": round(n * procs / max(busy, 1e-9), 1),
+    }
+    return out, stats
+
+
+def encode_corpus(
+    texts: Sequence[str],
+    model_name: Optional[str] = None,
+    backend: Optional[str] = None,
+    processes: Optional[int] = None,
+    threads: Optional[int] = None,
+    chunk_size: int = 256,
+    batch_size: int = 64,
+    keep: bool = True,
+    on_progress: Optional[Progress] = None,
+) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+    """
+    Embeddings for `texts` via the persistent store: cached texts are read,
+    the (de-duplicated) misses are encoded in parallel and streamed into the
+    store. Returns (matrix or None, stats incl. cached/encoded counts).
+    """
+    from slr.embed.sbert import DEFAULT_SBERT_MODEL, embedding_key
+    from slr.store.embeddings import get_embedding_store
+    from slr.store.keys import text_hash
+
+    name = model_name or DEFAULT_SBERT_MODEL
+    store = get_embedding_store(embedding_key(name, backend))
+    texts = [str(t) for t in texts]
+    rows, _ = store.lookup(texts)
+    missing = [i for i in range(len(texts)) if i not in rows]
+
+    todo: Dict[str, int] = {}
+    for i in missing:
+        todo.setdefault(text_hash(texts[i]), i)
+    fresh = [texts[i] for i in todo.values()]
+
+    stats: Dict[str, Any] = {"texts": len(texts), "cached": len(texts) - len(missing), "encoded": len(fresh)}
+    if fresh:
+        _, enc_stats = encode_many(
+            fresh, model_name=name, backend=backend, processes=processes, threads=threads,
+            chunk_size=chunk_size, batch_size=batch_size, store=store, keep=False, on_progress=on_progress,
+        )
+        stats.update({k: v for k, v in enc_stats.items() if k != "texts"})
+    X = store.get(texts)[0] if keep else None
+    return X, stats
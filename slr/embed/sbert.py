@@ -0,0 +1,160 @@
+# slr/embed/sbert.py
+"""
+Shared SBERT helpers for backend code (no Streamlit dependency).
+
+- load_sbert(model_name) -> SentenceTransformer   (one copy per process; OnnxEncoder with SBERT_BACKEND=onnx)
+- encode(texts, model_name=None) -> np.ndarray     (L2-normalized float32 rows)
+- encode_cached(texts, model_name=None)            (same, via the persistent store in slr/store/embeddings.py;
+                                                    large miss sets use the process pool in slr/embed/parallel.py)
+- warm_up(model_name=None)                         (load the model in a background thread)
+- sbert_device()                                   (device the torch backend encodes on)
+- paper_text(row) -> str                           (title + abstract used for paper embeddings)
+
+Backends (env SBERT_BACKEND): "torch" (default, sentence-transformers) or
+"onnx" (ONNX Runtime, int8-quantized, CPU; see slr/embed/onnx_backend.py).
+The torch device is SBERT_DEVICE if set, else "cuda" when available, else "cpu".
+"""
+from __future__ import annotations
+import os, threading
+from typing import Dict, List, Optional, Sequence, Any
+
+import numpy as np
+
+DEFAULT_SBERT_MODEL = os.getenv("SBERT_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+BACKENDS = ("torch", "onnx")
+
+
+def sbert_backend() -> str:
+    backend = (os.getenv("SBERT_BACKEND") or "torch").strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"SBERT_BACKEND must be one of {BACKENDS}, got {backend!r}")
+    return backend
+
+
+def sbert_device(backend: Optional[str] = None) -> str:
+    """Device encodes run on: always "cpu" for onnx; SBERT_DEVICE, else cuda if available, for torch."""
+    if (backend or sbert_backend()) == "onnx":
+        return "cpu"
+    env = (os.getenv("SBERT_DEVICE") or "").strip()
+    if env:
+        return env
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def embedding_key(model_name: Optional[str] = None, backend: Optional[str] = None) -> str:
+    """
+    Name the cached vectors are stored under. int8 ONNX vectors differ slightly
+    from the torch ones, so each backend gets its own store.
+    """
+    name = model_name or DEFAULT_SBERT_MODEL
+    backend = backend or sbert_backend()
+    if backend == "onnx":
+        from slr.embed.onnx_backend import quantize_enabled
+        return f"{name}@onnx-{'int8' if quantize_enabled() else 'fp32'}"
+    return name
+
+_MODELS: Dict[str, Any] = {}
+_LOCK = threading.Lock()
+_WARM: Dict[str, threading.Thread] = {}
+_WARM_LOCK = threading.Lock()
+
+
+def load_sbert(model_name: str = DEFAULT_SBERT_MODEL, device: Optional[str] = None, backend: Optional[str] = None):
+    """Load (once per process) and return a SentenceTransformer (or OnnxEncoder)."""
+    backend = backend or sbert_backend()
+    key = f"{model_name}@{backend}@{device or 'auto'}"
+    with _LOCK:
+        model = _MODELS.get(key)
+        if model is None and backend == "onnx":
+            from slr.embed.onnx_backend import load_onnx_encoder
+            model = load_onnx_encoder(model_name)
+            _MODELS[key] = model
+        elif model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name, device=device or sbert_device(backend))
+            _MODELS[key] = model
+    return model
+
+
+def warm_up(model_name: Optional[str] = None, backend: Optional[str] = None) -> Optional[threading.Thread]:
+    """
+    Start loading the model in a daemon thread (once per model and process),
+    so pages can call this after rendering and the first encode finds the
+    model ready. An encode that arrives earlier simply waits on the load lock.
+    Disabled with SBERT_WARMUP=0.
+    """
+    if os.getenv("SBERT_WARMUP", "1").strip().lower() in ("0", "false", "no"):
+        return None
+    name = model_name or DEFAULT_SBERT_MODEL
+    key = f"{name}@{backend or sbert_backend()}"
+    with _WARM_LOCK:
+        t = _WARM.get(key)
+        if t is None:
+            def _load() -> None:
+                try:
+                    load_sbert(name, backend=backend)
+                except Exception:
+                    pass  # the real encode call will surface the error
+            t = threading.Thread(target=_load, name=f"sbert-warmup:{name}", daemon=True)
+            t.start()
+            _WARM[key] = t
+    return t
+
+
+def encode(
+    texts: Sequence[str],
+    model_name: Optional[str] = None,
+    batch_size: int = 64,
+    normalize: bool = True,
+    backend: Optional[str] = None,
+) -> np.ndarray:
+    """Encode texts into a (n, dim) float32 matrix."""
+    model = load_sbert(model_name or DEFAULT_SBERT_MODEL, backend=backend)
+    if not texts:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    embs = model.encode(
+        list(texts),
+        batch_size=int(batch_size),
+        convert_to_numpy=True,
+        normalize_embeddings=normalize,
+        show_progress_bar=False,
+    )
+    return np.asarray(embs, dtype=np.float32)
+
+
+def encode_cached(
+    texts: Sequence[str],
+    model_name: Optional[str] = None,
+    batch_size: int = 64,
+) -> np.ndarray:
+    """
+    Normalized embeddings, read from the on-disk store where possible; only
+    texts never seen for this model are encoded (in one batched call). The
+    model is not even loaded when everything is cached. Large miss sets
+    (SBERT_PARALLEL_MIN) are encoded by a CPU process pool (slr/embed/parallel.py)
+    when the model runs on the CPU; on a GPU one process is faster.
+    """
+    from slr.embed.parallel import default_processes, encode_many, parallel_min
+    from slr.store.embeddings import get_embedding_store
+
+    name = model_name or DEFAULT_SBERT_MODEL
+    store = get_embedding_store(embedding_key(name))
+
+    def encode_fn(miss: List[str]) -> np.ndarray:
+        if 0 < parallel_min() <= len(miss) and default_processes() > 1 and sbert_device() == "cpu":
+            return encode_many(miss, model_name=name, batch_size=batch_size, store=store)[0]
+        return encode(miss, model_name=name, batch_size=batch_size, normalize=True)
+
+    return store.encode(texts, encode_fn)
+
+
+def paper_text(r: Dict) -> str:
+    """Text used to embed a paper row (title + abstract)."""
+    title = str(r.get("title", "") or "").strip()
+    abstract = str(r.get("summary", "") or r.get("abstract", "") or "").strip()
+    return f"{title}. {abstract}".strip(". ").strip()
+
+
+def paper_texts(rows: List[Dict]) -> List[str]:
+    return [paper_text(r) for r in rows]
@@ -0,0 +1,121 @@
+# slr/embed/snippets.py
+"""
+Relevance-targeted full-text snippets.
+
+Instead of the first N characters of a PDF (title page, author list,
+affiliations), each paper contributes the passages closest to the review's
+PICOC facets and research questions:
+
+- chunk_text(text) -> [str]                    sentence-aligned chunks of ~chunk_tokens
+- relevant_snippets(full_texts, picoc, rqs)    one snippet per paper, within max_tokens
+
+Chunks are embedded through the persistent embedding store (encode_cached),
+so re-running a stage on the same PDFs encodes nothing. A chunk's score is
+its best cosine similarity to any query (PICOC facet or RQ); the top chunks
+are taken greedily until the per-paper budget is used up and are then put
+back in document order, joined by " … ".
+"""
+from __future__ import annotations
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+CHARS_PER_TOKEN = 4  # same rough estimate as the taxonomy prompt budgeting
+MAX_CHUNKS = 80      # per paper; ~10 pages of text at the default chunk size
+
+_SENT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\[])")
+_REFS_RE = re.compile(r"\n\s*(?:\d+\.?\s*)?(?:references|bibliography)\s*\n", re.IGNORECASE)
+
+
+def _strip_references(text: str) -> str:
+    """Drop a trailing reference list (a References heading in the second half of the text)."""
+    m = _REFS_RE.search(text, len(text) // 2)
+    return text[:m.start()] if m else text
+
+
+def chunk_text(text: str, chunk_tokens: int = 100, max_chunks: int = MAX_CHUNKS) -> List[str]:
+    """Split `text` into whitespace-normalized chunks of about chunk_tokens, on sentence boundaries."""
+    limit = max(40, int(chunk_tokens) * CHARS_PER_TOKEN)
+    text = re.sub(r"-\n(?=[a-z])", "", _strip_references(text or ""))  # re-join hyphenated line breaks
+    chunks: List[str] = []
+    cur = ""
+    for sent in _SENT_RE.split(text):
+        sent = " ".join(sent.split())
+        while len(sent) > limit:  # tables, run-on extraction output
+            head, sent = sent[:limit], sent[limit:]
+            if cur:
+                chunks.append(cur)
+                cur = ""
+            chunks.append(head)
+        if cur and len(cur) + 1 + len(sent) > limit:
+            chunks.append(cur)
+            cur = ""
+        cur = f"{cur} {sent}".strip()
+        if len(chunks) >= max_chunks:
+            break
+    if cur and len(chunks) < max_chunks:
+        chunks.append(cur)
+    return [c for c in chunks if len(c) >= 40][:max_chunks]
+
+
+def review_queries(picoc: Optional[Dict[str, str]], rqs: Optional[Sequence[str]]) -> List[str]:
+    out: List[str] = []
+    for k in ("population", "intervention", "comparison", "outcome", "context"):
+        v = str((picoc or {}).get(k) or (picoc or {}).get(k.capitalize()) or "").strip()
+        if v:
+            out.append(v)
+    out.extend(str(q).strip() for q in rqs or [] if str(q).strip())
+    return out
+
+
+def relevant_snippets(
+    full_texts: Sequence[Optional[str]],
+    picoc: Optional[Dict[str, str]] = None,
+    rqs: Optional[Sequence[str]] = None,
+    max_tokens: int = 200,
+    chunk_tokens: int = 100,
+    model_name: Optional[str] = None,
+    on_progress: Optional[Callable[[float, str], None]] = None,
+) -> List[str]:
+    """
+    One snippet per text ("" for empty texts): the passages most similar to
+    the PICOC/RQ queries, at most max_tokens (~4 chars each). Without any
+    query the leading chunks are used, like the old head-of-text snippet.
+    """
+    from slr.embed.sbert import encode_cached
+
+    budget = max(1, int(max_tokens)) * CHARS_PER_TOKEN
+    per_paper = [chunk_text(t or "", chunk_tokens=chunk_tokens) for t in full_texts]
+    queries = review_queries(picoc, rqs)
+    flat = [c for chunks in per_paper for c in chunks]
+    if on_progress and flat:
+        on_progress(0.0, f"Ranking {len(flat)} full-text passages…")
+
+    scores: Optional[np.ndarray] = None
+    if queries and flat:
+        Q = encode_cached(queries, model_name=model_name)
+        C = encode_cached(flat, model_name=model_name)
+        scores = (C @ Q.T).max(axis=1)
+
+    out: List[str] = []
+    pos = 0
+    for chunks in per_paper:
+        n = len(chunks)
+        order = list(range(n)) if scores is None else list(np.argsort(-scores[pos:pos + n], kind="stable"))
+        pos += n
+        picked: List[int] = []
+        used = 0
+        for k in order:
+            cost = len(chunks[k]) + (3 if picked else 0)
+            if used + cost > budget:
+                if not picked:  # first chunk alone is over budget: cut it
+                    picked.append(int(k))
+                    used = budget
+                continue
+            picked.append(int(k))
+            used += cost
+        parts = [chunks[k] for k in sorted(picked)]
+        snippet = " … ".join(parts)
+        out.append(snippet[:budget])
+    return out
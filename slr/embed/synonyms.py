@@ -0,0 +1,87 @@
+# slr/embed/synonyms.py
+"""
+SBERT verification of facet synonyms (Planning Step 1).
+
+- score_facet_synonyms(picoc, synonyms, context) -> {facet: [(term, score), ...]}
+  scores every candidate of all five facets with one batched encode
+- filter_scored(scored, min_score) -> {facet: [term, ...]}
+  the threshold is a pure filter over those scores (no encoding)
+- scores_key(...) -> hash used to memoize scores per (picoc, synonyms)
+"""
+from __future__ import annotations
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from slr.embed.sbert import DEFAULT_SBERT_MODEL, encode_cached
+
+FACETS = ("Population", "Intervention", "Comparison", "Outcome", "Context")
+
+Scored = Dict[str, List[Tuple[str, float]]]
+
+
+def _norm(t: str) -> str:
+    return re.sub(r"\s+", " ", (t or "").strip())
+
+
+def scores_key(picoc: Dict, synonyms: Dict, context: str = "", model_name: Optional[str] = None) -> str:
+    blob = json.dumps(
+        {"picoc": picoc, "synonyms": synonyms, "context": context, "model": model_name or DEFAULT_SBERT_MODEL},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def score_facet_synonyms(
+    picoc: Dict[str, str],
+    synonyms: Dict[str, List[str]],
+    context: str = "",
+    alpha: float = 0.7,
+    model_name: Optional[str] = None,
+) -> Scored:
+    """
+    Cosine similarity of each facet's candidates to that facet's PICOC text,
+    blended with the overall context (alpha = weight of the facet text).
+    Facets without PICOC text or candidates get an empty list.
+    Returns per facet [(term, score)] sorted by score, descending.
+    """
+    ctx = _norm(context)
+    plan: List[Tuple[str, str, List[str]]] = []
+    for facet in FACETS:
+        base = _norm(picoc.get(facet.lower(), "") or picoc.get(facet, ""))
+        cands = [c.strip() for c in synonyms.get(facet, []) or [] if isinstance(c, str) and c.strip()]
+        if base and cands:
+            plan.append((facet, base, cands))
+
+    out: Scored = {f: [] for f in FACETS}
+    if not plan:
+        return out
+
+    # one encode for every reference text and candidate of all facets
+    texts: List[str] = ([ctx] if ctx else []) + [base for _, base, _ in plan]
+    for _, _, cands in plan:
+        texts.extend(cands)
+    embs = encode_cached(texts, model_name=model_name)
+
+    pos = 1 if ctx else 0
+    ctx_emb = embs[0] if ctx else None
+    base_embs = embs[pos:pos + len(plan)]
+    pos += len(plan)
+
+    for k, (facet, _, cands) in enumerate(plan):
+        ref = base_embs[k] if ctx_emb is None else alpha * base_embs[k] + (1.0 - alpha) * ctx_emb
+        cand_embs = embs[pos:pos + len(cands)]
+        pos += len(cands)
+        # candidates are unit-length, the blended reference may not be
+        sims = cand_embs @ ref / max(float(np.linalg.norm(ref)), 1e-12)
+        pairs = [(cands[i], float(sims[i])) for i in range(len(cands))]
+        pairs.sort(key=lambda x: x[1], reverse=True)
+        out[facet] = pairs
+    return out
+
+
+def filter_scored(scored: Scored, min_score: float) -> Dict[str, List[str]]:
+    return {f: [t for t, s in pairs if s >= float(min_score)] for f, pairs in scored.items()}
@@ -0,0 +1,168 @@
+# slr/jobs/runner.py
+"""
+Background job runner for long LLM stages.
+
+Jobs are submitted to the SQLite queue (slr/jobs/store.py) and executed by
+daemon worker threads that live for the whole server process, so Streamlit
+reruns, widget clicks and browser refreshes no longer kill a running stage.
+Pages poll `get_runner().store.get(job_id)` for progress and read results
+from the store once the job is done.
+
+Workers can also run in a separate process sharing the same queue:
+
+    python -m slr.jobs.runner --workers 4
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from slr.jobs.store import WORKER_BEAT_S, JobStore
+
+JobFn = Callable[[Dict[str, Any], "JobContext"], Any]
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a job when the user asked to cancel it.
+
+    Derives from BaseException so the broad `except Exception` blocks used
+    around LLM calls do not swallow it.
+    """
+
+
+class JobContext:
+    """
+    Handed to job functions for progress reporting and cancellation checks.
+
+    Both stop the job (JobCancelled) when the user cancelled it or when this
+    worker lost its claim, e.g. the job was requeued after a missed heartbeat.
+    """
+
+    def __init__(self, store: JobStore, job_id: str, claim: str):
+        self.store = store
+        self.job_id = job_id
+        self.claim = claim
+
+    def progress(self, fraction: float, message: str = "") -> None:
+        if self.store.update_progress(self.job_id, self.claim, fraction, message):
+            raise JobCancelled()
+
+    def check_cancelled(self) -> None:
+        if self.store.is_cancel_requested(self.job_id, self.claim):
+            raise JobCancelled()
+
+
+class JobRunner:
+    def __init__(self, store: Optional[JobStore] = None, workers: int = 4, poll_interval: float = 0.5):
+        self.store = store or JobStore()
+        self.workers = int(workers)
+        self.poll_interval = float(poll_interval)
+        self._registry: Dict[str, JobFn] = {}
+        self._threads = []
+        self._stop = threading.Event()
+        self._started = False
+        self._lock = threading.Lock()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def register(self, kind: str, fn: JobFn) -> None:
+        self._registry[kind] = fn
+
+    def submit(self, kind: str, params: Dict[str, Any], owner: str = "", fingerprint: str = "") -> str:
+        if kind not in self._registry:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.start()
+        return self.store.submit(kind, params, owner=owner, fingerprint=fingerprint)
+
+    def cancel(self, job_id: str) -> None:
+        self.store.request_cancel(job_id)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self.store.beat_worker(self.worker_id)
+            self.store.requeue_stale()
+            t = threading.Thread(target=self._liveness_loop, name="slr-job-liveness", daemon=True)
+            t.start()
+            self._threads.append(t)
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker_loop, name=f"slr-job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.store.remove_worker(self.worker_id)
+
+    def _liveness_loop(self) -> None:
+        """Beat for this process and requeue jobs of workers that are gone, while the runner lives."""
+        while not self._stop.wait(WORKER_BEAT_S):
+            try:
+                self.store.beat_worker(self.worker_id)
+                self.store.requeue_stale()
+            except Exception:
+                traceback.print_exc()
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            job = self.store.claim_next(self._registry.keys(), worker=self.worker_id)
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        ctx = JobContext(self.store, job["id"], job["claim"])
+        fn = self._registry[job["kind"]]
+        # the store ignores these if the claim was lost, so a requeued job is left to its new worker
+        try:
+            result = fn(job["params"], ctx)
+        except JobCancelled:
+            self.store.mark_cancelled(job["id"], job["claim"])
+        except Exception as e:
+            self.store.fail(job["id"], job["claim"], f"{e}\n\n{traceback.format_exc()}")
+        else:
+            self.store.finish(job["id"], job["claim"], result)
+
+
+_RUNNER: Optional[JobRunner] = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def get_runner() -> JobRunner:
+    """Process-wide runner with the default SLR tasks registered."""
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            from slr.jobs.tasks import register_default_tasks
+            runner = JobRunner(workers=int(os.getenv("SLR_JOB_WORKERS", "4")))
+            register_default_tasks(runner)
+            _RUNNER = runner
+    return _RUNNER
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Run SLR background job workers.")
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    from slr.jobs.tasks import register_default_tasks
+    runner = JobRunner(workers=args.workers)
+    register_default_tasks(runner)
+    runner.start()
+    print(f"SLR job workers running ({args.workers}); Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        runner.stop()
+
+
+if __name__ == "__main__":
+    main()
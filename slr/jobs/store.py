@@ -0,0 +1,269 @@
+# slr/jobs/store.py
+"""
+SQLite-backed job queue and result store.
+
+A job row moves through: queued -> running -> done | failed | cancelled.
+Workers claim queued jobs with a single atomic UPDATE, so several threads or
+processes can share one queue. Results are kept in a separate table and read
+by the pages once the job is done.
+
+Each runner process registers itself in `workers` and beats every few
+seconds; a running job records the worker that claimed it. Running jobs
+whose worker stopped beating (server restart, killed process) are put back
+in the queue by `requeue_stale`, or cancelled if a cancel was requested.
+"""
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from slr.store.db import connect
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+FINAL_STATUSES = {STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED}
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id               TEXT PRIMARY KEY,
+        kind             TEXT NOT NULL,
+        owner            TEXT NOT NULL DEFAULT '',
+        fingerprint      TEXT NOT NULL DEFAULT '',
+        status           TEXT NOT NULL,
+        progress         REAL NOT NULL DEFAULT 0,
+        message          TEXT NOT NULL DEFAULT '',
+        params           TEXT NOT NULL,
+        error            TEXT NOT NULL DEFAULT '',
+        cancel_requested INTEGER NOT NULL DEFAULT 0,
+        claim            TEXT NOT NULL DEFAULT '',
+        created_at       REAL NOT NULL,
+        started_at       REAL,
+        finished_at      REAL,
+        heartbeat        REAL,
+        worker           TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)",
+    "CREATE INDEX IF NOT EXISTS jobs_fp ON jobs (kind, fingerprint, created_at)",
+    """
+    CREATE TABLE IF NOT EXISTS job_results (
+        id     TEXT PRIMARY KEY,
+        result TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS workers (
+        id        TEXT PRIMARY KEY,
+        heartbeat REAL NOT NULL
+    )
+    """,
+]
+
+WORKER_BEAT_S = 5.0
+WORKER_TIMEOUT_S = 30.0  # a worker that has not beaten for this long is gone
+
+# running job whose worker is gone (jobs claimed before workers were tracked: by job heartbeat)
+_ORPHANED = (
+    "status='running' AND ((worker != '' AND worker NOT IN (SELECT id FROM workers WHERE heartbeat >= ?)) "
+    "OR (worker = '' AND COALESCE(heartbeat, 0) < ?))"
+)
+
+_PUBLIC_COLS = (
+    "id, kind, owner, fingerprint, status, progress, message, error, cancel_requested, "
+    "created_at, started_at, finished_at, heartbeat"
+)
+
+
+class JobStore:
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._conn = connect("jobs.sqlite", path=path)
+        with self._lock:
+            for stmt in _SCHEMA:
+                self._conn.execute(stmt)
+            cols = {r["name"] for r in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "worker" not in cols:  # databases created before workers were tracked
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN worker TEXT NOT NULL DEFAULT ''")
+            self._conn.commit()
+
+    # ---------------- submit / query ----------------
+    def submit(self, kind: str, params: Dict[str, Any], owner: str = "", fingerprint: str = "") -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, owner, fingerprint, status, params, created_at) "
+                "VALUES (?,?,?,?,?,?,?)",
+                (job_id, kind, owner, fingerprint, STATUS_QUEUED, json.dumps(params, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_PUBLIC_COLS} FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def params(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT params FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return json.loads(row["params"]) if row else {}
+
+    def result(self, job_id: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM job_results WHERE id=?", (job_id,)).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def list_jobs(self, owner: Optional[str] = None, kind: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        q = f"SELECT {_PUBLIC_COLS} FROM jobs WHERE 1=1"
+        args: List[Any] = []
+        if owner is not None:
+            q += " AND owner=?"
+            args.append(owner)
+        if kind is not None:
+            q += " AND kind=?"
+            args.append(kind)
+        q += " ORDER BY created_at DESC LIMIT ?"
+        args.append(int(limit))
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(q, args)]
+
+    def find_latest(self, kind: str, fingerprint: str, statuses: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """Most recent job of `kind` with this input fingerprint (optionally filtered by status)."""
+        q = f"SELECT {_PUBLIC_COLS} FROM jobs WHERE kind=? AND fingerprint=?"
+        args: List[Any] = [kind, fingerprint]
+        sts = list(statuses or [])
+        if sts:
+            q += f" AND status IN ({','.join('?' * len(sts))})"
+            args += sts
+        q += " ORDER BY created_at DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(q, args).fetchone()
+        return dict(row) if row else None
+
+    # ---------------- worker side ----------------
+    def claim_next(self, kinds: Iterable[str], worker: str = "") -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job of one of `kinds` to running, owned by `worker`."""
+        kinds = list(kinds)
+        if not kinds:
+            return None
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status=?, claim=?, worker=?, started_at=?, heartbeat=? "
+                "WHERE id = (SELECT id FROM jobs WHERE status=? "
+                f"AND kind IN ({','.join('?' * len(kinds))}) ORDER BY created_at LIMIT 1) AND status=?",
+                (STATUS_RUNNING, token, worker, now, now, STATUS_QUEUED, *kinds, STATUS_QUEUED),
+            )
+            self._conn.commit()
+            if cur.rowcount != 1:
+                return None
+            row = self._conn.execute("SELECT id, kind, params FROM jobs WHERE claim=?", (token,)).fetchone()
+        if not row:
+            return None
+        return {"id": row["id"], "kind": row["kind"], "params": json.loads(row["params"]), "claim": token}
+
+    # Progress and final states are written only while the job is still running
+    # under the caller's claim: once a job is requeued (and maybe claimed by
+    # another worker) or cancelled, the old worker can no longer touch it.
+    def update_progress(self, job_id: str, claim: str, progress: float, message: str = "") -> bool:
+        """Record progress; returns True if the job should stop (cancel requested or claim lost)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET progress=?, message=?, heartbeat=? WHERE id=? AND claim=? AND status=?",
+                (max(0.0, min(1.0, float(progress))), message, time.time(), job_id, claim, STATUS_RUNNING),
+            )
+            self._conn.commit()
+            if cur.rowcount != 1:
+                return True
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def is_cancel_requested(self, job_id: str, claim: Optional[str] = None) -> bool:
+        """True if cancellation was requested (or, given a claim, the job is no longer running under it)."""
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested, claim, status FROM jobs WHERE id=?", (job_id,)).fetchone()
+        if row is None:
+            return claim is not None
+        if claim is not None and (row["claim"] != claim or row["status"] != STATUS_RUNNING):
+            return True
+        return bool(row["cancel_requested"])
+
+    def _finalize(self, job_id: str, claim: str, status: str, error: str = "", result: Any = None) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status=?, error=?, finished_at=?, "
+                "progress=CASE WHEN ?='done' THEN 1.0 ELSE progress END "
+                "WHERE id=? AND claim=? AND status=?",
+                (status, error, time.time(), status, job_id, claim, STATUS_RUNNING),
+            )
+            done = cur.rowcount == 1
+            if done and result is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO job_results (id, result) VALUES (?, ?)",
+                    (job_id, json.dumps(result, ensure_ascii=False)),
+                )
+            self._conn.commit()
+        return done
+
+    def finish(self, job_id: str, claim: str, result: Any) -> bool:
+        """Returns False if the claim was lost (the job was requeued or cancelled meanwhile)."""
+        return self._finalize(job_id, claim, STATUS_DONE, result=result)
+
+    def fail(self, job_id: str, claim: str, error: str) -> bool:
+        return self._finalize(job_id, claim, STATUS_FAILED, error=error)
+
+    def mark_cancelled(self, job_id: str, claim: str) -> bool:
+        return self._finalize(job_id, claim, STATUS_CANCELLED, error="cancelled")
+
+    def request_cancel(self, job_id: str, max_silence_s: float = 900.0) -> None:
+        """
+        Queued jobs, and running jobs whose worker is gone, are cancelled at once;
+        running jobs stop at their next progress report.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET status=?, finished_at=?, error='cancelled' WHERE id=? AND (status=? OR ({_ORPHANED}))",
+                (STATUS_CANCELLED, now, job_id, STATUS_QUEUED, now - WORKER_TIMEOUT_S, now - float(max_silence_s)),
+            )
+            self._conn.execute("UPDATE jobs SET cancel_requested=1 WHERE id=?", (job_id,))
+            self._conn.commit()
+
+    # ---------------- worker liveness ----------------
+    def beat_worker(self, worker: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO workers (id, heartbeat) VALUES (?, ?)", (worker, time.time()))
+            self._conn.commit()
+
+    def remove_worker(self, worker: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM workers WHERE id=?", (worker,))
+            self._conn.commit()
+
+    def requeue_stale(self, max_silence_s: float = 900.0) -> int:
+        """
+        Put running jobs whose worker is gone (server restart, killed process)
+        back in the queue; those with a pending cancel are cancelled instead.
+        Jobs without a recorded worker count as gone after `max_silence_s`
+        without a progress report. Returns the number of jobs requeued.
+        """
+        now = time.time()
+        args = (now - WORKER_TIMEOUT_S, now - float(max_silence_s))
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET status=?, finished_at=?, error='cancelled' WHERE cancel_requested=1 AND {_ORPHANED}",
+                (STATUS_CANCELLED, now, *args),
+            )
+            cur = self._conn.execute(
+                f"UPDATE jobs SET status=?, claim='', worker='' WHERE {_ORPHANED}",
+                (STATUS_QUEUED, *args),
+            )
+            self._conn.execute("DELETE FROM workers WHERE heartbeat < ?", (args[0],))
+            self._conn.commit()
+        return cur.rowcount
@@ -0,0 +1,131 @@
+# slr/jobs/tasks.py
+"""
+Job functions for the long LLM stages (run by slr/jobs/runner.py).
+
+Every task takes JSON-serializable `params` plus a JobContext and returns a
+JSON-serializable result that the pages read back from the job store.
+
+- "screening"        c02 AI refinement (full / active learning / per-criterion)
+- "quality_scoring"  c03 checklist scoring
+- "taxonomy"         d01 taxonomy generation (single prompt, cluster-first or map-reduce)
+- "taxonomy_assign"  d01/d02 assignment of papers to an existing taxonomy
+- "taxonomy_update"  d01 incremental update of a taxonomy with new papers
+- "pdf_fetch"        d01 bulk PDF download (resumable, see slr/pdf/fetch.py)
+- "data_extraction"  c04 LLM pre-fill of the extraction form (see slr/agents/data_extraction.py)
+"""
+from typing import Any, Dict
+
+from slr.jobs.runner import JobContext, JobRunner
+
+
+def run_screening(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    from slr.llm.client import LLMClient
+    from slr.screening.refinement import refine_papers
+
+    return refine_papers(
+        params.get("papers") or [],
+        params.get("mode", "full"),
+        policy_text=params.get("policy_text", ""),
+        client=LLMClient(model=params["model"]) if params.get("model") else LLMClient(),
+        batch_size=int(params.get("batch_size", 10)),
+        temperature=float(params.get("temperature", 0.2)),
+        resume=bool(params.get("resume", True)),
+        active=params.get("active") or {},
+        inclusion=params.get("inclusion") or [],
+        exclusion=params.get("exclusion") or [],
+        require_all_inclusion=bool(params.get("require_all_inclusion", True)),
+        on_progress=ctx.progress,
+        on_batch=ctx.check_cancelled,
+    )
+
+
+def run_quality_scoring(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    from slr.llm.client import LLMClient
+    from slr.screening.resumable import score_papers
+
+    rows, stats = score_papers(
+        params.get("papers") or [],
+        params["questions"],
+        params["weights"],
+        params.get("scheme", "Y/P/N"),
+        client=LLMClient(model=params.get("model") or "gpt-oss-120b"),
+        cut_off=float(params.get("cut_off", 0.0)),
+        temperature=float(params.get("temperature", 0.2)),
+        resume=bool(params.get("resume", True)),
+        on_progress=lambda done, total: ctx.progress(done / max(1, total), f"Scored {done}/{total}"),
+    )
+    return {"rows": rows, "errors": stats.pop("errors", []), "stats": stats}
+
+
+def run_taxonomy(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    from slr.agents.taxonomy import build_taxonomy
+
+    params = dict(params)
+    pdf_ids = params.pop("pdf_ids", None)
+    max_pages = int(params.pop("pdf_max_pages", 10))
+    if pdf_ids:
+        # stored PDFs (aligned with the papers) -> full text; parsed once, then served from the text cache
+        from slr.pdf.extract import full_texts
+
+        params["full_texts"] = full_texts(pdf_ids, max_pages=max_pages, on_progress=ctx.progress)
+    return build_taxonomy(params.pop("method", "single"), on_progress=ctx.progress, **params)
+
+
+def run_taxonomy_assign(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    from slr.agents.taxonomy_assign import assign_to_taxonomy
+
+    return assign_to_taxonomy(**params, on_progress=ctx.progress)
+
+
+def run_taxonomy_update(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    from slr.agents.taxonomy_update import update_taxonomy
+
+    return update_taxonomy(**params, on_progress=ctx.progress)
+
+
+def run_pdf_fetch(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    """Download [paper_id, url] items into the PDF store; papers already stored are skipped."""
+    from slr.pdf.fetch import fetch_pdfs
+    from slr.store.paths import data_dir
+    from slr.store.pdfs import get_pdf_store
+
+    params = dict(params)
+    store = get_pdf_store()
+    items = params.pop("items", None) or []
+    have = store.shas([pid for pid, _ in items])
+
+    def to_store(pid: str, info: Dict[str, Any]) -> Dict[str, Any]:
+        sha = store.add_file(pid, info["path"], url=info.get("url", ""))
+        return {**{k: v for k, v in info.items() if k != "path"}, "sha256": sha}
+
+    res = fetch_pdfs([it for it in items if it[0] not in have], data_dir("pdfs", "incoming"),
+                     on_progress=ctx.progress, check_cancelled=ctx.check_cancelled, on_file=to_store, **params)
+    res["stats"]["stored"] = len(have)
+    return res
+
+
+def run_data_extraction(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    from slr.agents.data_extraction import extract_papers
+    from slr.llm.client import LLMClient
+
+    return extract_papers(
+        params.get("papers") or [],
+        params.get("fields") or [],
+        client=LLMClient(model=params.get("model") or "gpt-oss-120b"),
+        pdf_ids=params.get("pdf_ids"),
+        max_pages=int(params.get("max_pages", 10)),
+        temperature=float(params.get("temperature", 0.0)),
+        resume=bool(params.get("resume", True)),
+        workers=int(params.get("workers", 4)),
+        on_progress=ctx.progress,
+    )
+
+
+def register_default_tasks(runner: JobRunner) -> None:
+    runner.register("screening", run_screening)
+    runner.register("quality_scoring", run_quality_scoring)
+    runner.register("taxonomy", run_taxonomy)
+    runner.register("taxonomy_assign", run_taxonomy_assign)
+    runner.register("taxonomy_update", run_taxonomy_update)
+    runner.register("pdf_fetch", run_pdf_fetch)
+    runner.register("data_extraction", run_data_extraction)
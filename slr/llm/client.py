@@ -2,7 +2,6 @@
 import os
 import time
 from typing import Optional
-from openai import OpenAI, APIStatusError
 
 _BASE_URL = os.getenv("OPENAI_BASE_URL", "https://kiste.informatik.tu-chemnitz.de/v1")
 
@@ -17,6 +16,8 @@ class LLMClient:
         self.model = model
         self.api_key = api_key or _get_api_key()
         self.base_url = base_url or _BASE_URL
+        # openai is imported on first client creation, not when pages import the agents
+        from openai import OpenAI
         self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
 
     def chat(
@@ -31,6 +32,7 @@ class LLMClient:
         stop: Optional[object] = None,
     ) -> str:
         """Chat with retries for flaky upstream (502/503/504)."""
+        from openai import APIStatusError
         delay = 1.0
         for attempt in range(max_retries):
             try:
@@ -0,0 +1,98 @@
+# slr/pdf/extract.py
+"""
+PDF -> page text for stored PDFs (slr/store/pdfs.py), in a process pool.
+
+- extraction_available() -> bool                   PyPDF2 importable
+- extract_pages(paper_ids, max_pages) -> {id: [page texts]}
+- full_texts(paper_ids, max_pages) -> [str]         joined pages, aligned with paper_ids ("" if none)
+
+Results are cached per PDF sha256 and extractor settings (see
+slr/store/pdf_text.py), so a PDF is parsed once per max_pages setting no
+matter how often a stage is re-run or how many papers share the file. Only
+cache misses go to the pool; each worker parses whole files and sends back
+their page texts.
+"""
+from __future__ import annotations
+import importlib.util
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+EXTRACTOR_VERSION = "pypdf2-1"
+
+
+def extraction_available() -> bool:
+    return importlib.util.find_spec("PyPDF2") is not None
+
+
+def extract_settings(max_pages: int) -> str:
+    return f"{EXTRACTOR_VERSION};max_pages={int(max_pages)}"
+
+
+def _extract_file(args: Tuple[str, str, int]) -> Tuple[str, List[str], str]:
+    """Worker: (sha, path, max_pages) -> (sha, page texts, error)."""
+    sha, path, max_pages = args
+    try:
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(path)
+        pages = [(page.extract_text() or "") for page in reader.pages[:int(max_pages)]]
+        return sha, pages, ""
+    except Exception as e:
+        return sha, [], f"{type(e).__name__}: {e}"
+
+
+def extract_pages(
+    paper_ids: Sequence[str],
+    max_pages: int = 10,
+    workers: Optional[int] = None,
+    on_progress: Optional[Callable[[float, str], None]] = None,
+) -> Dict[str, List[str]]:
+    """
+    Page texts for the papers that have a stored PDF: {paper_id: [page texts]}.
+    Papers without a PDF are left out; unreadable PDFs map to [].
+    """
+    from slr.store.pdf_text import get_pdf_text_cache
+    from slr.store.pdfs import get_pdf_store
+
+    store = get_pdf_store()
+    cache = get_pdf_text_cache()
+    settings = extract_settings(max_pages)
+    shas = store.shas(paper_ids)
+    texts = cache.get_many(shas.values(), settings)
+
+    todo = [sha for sha in dict.fromkeys(shas.values()) if sha not in texts]
+    if todo and extraction_available():
+        procs = max(1, min(int(workers or os.cpu_count() or 1), len(todo)))
+        if on_progress:
+            on_progress(0.0, f"Extracting text from {len(todo)} PDFs ({procs} processes)…")
+        jobs = [(sha, store.blob_path(sha), int(max_pages)) for sha in todo]
+
+        def collect(done: int, result: Tuple[str, List[str], str]) -> None:
+            sha, pages, error = result
+            cache.put(sha, settings, pages, error)
+            texts[sha] = pages
+            if on_progress:
+                on_progress(done / len(todo), f"Extracted {done}/{len(todo)} PDFs")
+
+        if procs == 1:  # not worth starting a process
+            for done, j in enumerate(jobs, 1):
+                collect(done, _extract_file(j))
+        else:
+            with ProcessPoolExecutor(max_workers=procs, mp_context=mp.get_context("spawn")) as ex:
+                futures = [ex.submit(_extract_file, j) for j in jobs]
+                for done, fut in enumerate(as_completed(futures), 1):
+                    collect(done, fut.result())
+    return {pid: texts[sha] for pid, sha in shas.items() if sha in texts}
+
+
+def full_texts(
+    paper_ids: Sequence[str],
+    max_pages: int = 10,
+    workers: Optional[int] = None,
+    on_progress: Optional[Callable[[float, str], None]] = None,
+) -> List[str]:
+    """Joined page text per paper id, in input order ("" where there is no usable PDF)."""
+    pages = extract_pages(paper_ids, max_pages=max_pages, workers=workers, on_progress=on_progress)
+    return ["\n\n".join(pages.get(pid) or []).strip() for pid in paper_ids]
@@ -0,0 +1,313 @@
+# slr/pdf/fetch.py
+"""
+PDF downloads for d01 (bulk, as the "pdf_fetch" job) and c04 (per paper).
+
+- guess_pdf_url(paper) -> str                    explicit pdf_url, arXiv abs/id -> pdf, or a *.pdf link
+- fetch_pdf(url, path) -> Dict                   one download with retries
+- fetch_pdfs(items, dest_dir) -> Dict            many downloads in a thread pool
+
+Finished downloads are handed to the PDF store (slr/store/pdfs.py) by the
+callers; dest_dir only holds files in flight.
+
+All requests go through one pooled requests.Session. Politeness is per
+host: at most `per_host` downloads run against a host at the same time and
+request starts are spaced by `min_interval` seconds, so a batch of arXiv
+papers does not hammer arxiv.org while other hosts proceed in parallel.
+Connection errors, timeouts, 429 and 5xx are retried with exponential
+backoff (Retry-After is honoured). Bodies are written to "<file>.part" and
+renamed when complete; finished files are skipped and partial ones are
+continued with a Range request, so an interrupted batch resumes where it
+stopped.
+
+Bodies are streamed to disk in CHUNK_BYTES pieces, never held in memory.
+Before anything is written the first bytes are sniffed for the %PDF header,
+so HTML landing pages and paywalls (often served from a "pdf" URL) are
+skipped instead of stored. Files above `max_bytes` are skipped as well:
+up front when Content-Length (or Content-Range) announces the size,
+otherwise as soon as the stream passes the cap. A cut-off PDF is not kept,
+because its cross-reference table sits at the end and it would not parse.
+Skips raise SkipDownload and are not retried.
+"""
+from __future__ import annotations
+import hashlib
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+USER_AGENT = "automated-slr/1.0 (systematic literature review; PDF fetch)"
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+CHUNK_BYTES = 1 << 16
+# the PDF header may be preceded by some junk bytes (PDF 1.7, 7.5.2); look this far for it
+SNIFF_BYTES = 1024
+# files larger than this are skipped (env SLR_PDF_MAX_MB; 0 = no cap)
+MAX_BYTES = int(float(os.getenv("SLR_PDF_MAX_MB", "25") or 0) * 1024 * 1024)
+
+_ARXIV_ID_RE = re.compile(r"^(?:arxiv:)?(\d{4}\.\d{4,5}(?:v\d+)?|[a-z\-]+(?:\.[A-Z]{2})?/\d{7}(?:v\d+)?)$", re.IGNORECASE)
+
+
+def guess_pdf_url(paper: Dict[str, Any]) -> str:
+    """
+    Heuristic PDF URL for a paper row: explicit `pdf_url`, else an arXiv
+    abs link or bare arXiv id turned into its pdf link, else any link that
+    already ends with .pdf. Empty string if nothing fits.
+    """
+    pdf = str(paper.get("pdf_url") or "").strip()
+    if pdf:
+        return pdf
+    candidates = [str(paper.get(k) or "").strip() for k in ("url", "link", "id", "arxiv_id")]
+    for s in candidates:
+        if "arxiv.org" in s:
+            s = s.replace("/abs/", "/pdf/")
+            if not s.endswith(".pdf"):
+                s = s.rstrip("/") + ".pdf"
+            return s
+        m = _ARXIV_ID_RE.match(s)
+        if m:
+            return f"https://arxiv.org/pdf/{m.group(1)}.pdf"
+    for s in candidates:
+        if s.lower().startswith("http") and s.lower().endswith(".pdf"):
+            return s
+    return ""
+
+
+# ----------------------------- session -----------------------------
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session(pool_size: int = 16):
+    """Process-wide requests.Session with a connection pool of `pool_size` per host."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=int(pool_size), pool_maxsize=int(pool_size), max_retries=0)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers.update({"User-Agent": USER_AGENT, "Accept": "application/pdf,*/*;q=0.8"})
+            _SESSION = s
+    return _SESSION
+
+
+class HostLimiter:
+    """At most `per_host` concurrent requests per host, starts spaced by `min_interval` seconds."""
+
+    def __init__(self, per_host: int = 2, min_interval: float = 0.5):
+        self.per_host = max(1, int(per_host))
+        self.min_interval = max(0.0, float(min_interval))
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Tuple[threading.Semaphore, List[float]]] = {}
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        host = (urlparse(url).hostname or "").lower()
+        with self._lock:
+            sem, last = self._hosts.setdefault(host, (threading.Semaphore(self.per_host), [0.0]))
+        with sem:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, last[0] + self.min_interval)
+                last[0] = start
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+class RetryableError(Exception):
+    def __init__(self, msg: str, retry_after: Optional[float] = None):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+class SkipDownload(Exception):
+    """The response is not wanted (not a PDF, or larger than the byte cap)."""
+
+
+def _announced_size(resp, have: int) -> Optional[int]:
+    total = (resp.headers.get("Content-Range") or "").rpartition("/")[2]
+    if total.isdigit():
+        return int(total)
+    length = resp.headers.get("Content-Length") or ""
+    if length.isdigit():
+        return int(length) + (have if resp.status_code == 206 else 0)
+    return None
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None  # HTTP-date form; fall back to our own backoff
+
+
+def _download(session, url: str, path: str, timeout: float, max_bytes: int = MAX_BYTES) -> Dict[str, Any]:
+    """
+    One attempt: stream the body into <path>.part (continuing a partial file),
+    then rename. Raises SkipDownload for non-PDF bodies and files above max_bytes.
+    """
+    import requests
+
+    part = path + ".part"
+    have = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = {"Range": f"bytes={have}-"} if have else {}
+    try:
+        with session.get(url, stream=True, timeout=timeout, headers=headers, allow_redirects=True) as resp:
+            if resp.status_code == 416 and have:
+                os.remove(part)  # server disagrees about the partial file: start over
+                raise RetryableError("range not satisfiable", 0.0)
+            if resp.status_code in RETRY_STATUS:
+                raise RetryableError(f"HTTP {resp.status_code}", _retry_after(resp.headers.get("Retry-After")))
+            resp.raise_for_status()
+            resumed = bool(have) and resp.status_code == 206
+            content_type = resp.headers.get("Content-Type", "")
+            final_url = resp.url
+            size = _announced_size(resp, have)
+            if max_bytes and size is not None and size > max_bytes:
+                raise SkipDownload(f"too large ({_mb(size)} > {_mb(max_bytes)})")
+
+            chunks = resp.iter_content(CHUNK_BYTES)
+            head = b""
+            if not resumed:
+                for chunk in chunks:
+                    head += chunk
+                    if len(head) >= SNIFF_BYTES:
+                        break
+                if b"%PDF-" not in head[:SNIFF_BYTES]:
+                    raise SkipDownload(f"not a PDF (Content-Type: {content_type or 'unknown'})")
+            written = have if resumed else 0
+            with open(part, "ab" if resumed else "wb") as f:
+                for chunk in itertools.chain([head], chunks):
+                    if not chunk:
+                        continue
+                    written += len(chunk)
+                    if max_bytes and written > max_bytes:
+                        raise SkipDownload(f"too large (over {_mb(max_bytes)})")
+                    f.write(chunk)
+    except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+        raise RetryableError(f"{type(e).__name__}: {e}") from e
+    except SkipDownload:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    os.replace(part, path)
+    return {"url": url, "final_url": final_url, "path": path, "size": os.path.getsize(path),
+            "content_type": content_type, "resumed": resumed}
+
+
+def fetch_pdf(
+    url: str,
+    path: str,
+    timeout: float = 30.0,
+    retries: int = 3,
+    backoff: float = 1.0,
+    limiter: Optional[HostLimiter] = None,
+    session: Any = None,
+    max_bytes: int = MAX_BYTES,
+) -> Dict[str, Any]:
+    """
+    Download `url` to `path` (skipped if the file exists). Returns
+    {url, path, size, content_type, ...}; raises SkipDownload for unwanted
+    bodies and RuntimeError after `retries` failed retries.
+    """
+    if os.path.exists(path):
+        return {"url": url, "path": path, "size": os.path.getsize(path), "content_type": "", "cached": True}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    session = session or get_session()
+    limiter = limiter or HostLimiter()
+    for attempt in range(int(retries) + 1):
+        try:
+            with limiter.slot(url):
+                return _download(session, url, path, timeout, max_bytes=max_bytes)
+        except RetryableError as e:
+            if attempt >= int(retries):
+                raise RuntimeError(f"{e} (after {attempt + 1} attempts)") from e
+            wait = e.retry_after if e.retry_after is not None else backoff * (2 ** attempt)
+            time.sleep(min(60.0, wait) + random.uniform(0, 0.25 * backoff))
+    raise RuntimeError("unreachable")
+
+
+def pdf_filename(key: str) -> str:
+    return hashlib.sha1(key.encode("utf-8")).hexdigest() + ".pdf"
+
+
+def fetch_pdfs(
+    items: Sequence[Tuple[str, str]],
+    dest_dir: str,
+    workers: int = 8,
+    per_host: int = 2,
+    min_interval: float = 0.5,
+    timeout: float = 30.0,
+    retries: int = 3,
+    max_bytes: int = MAX_BYTES,
+    on_progress: Optional[Callable[[float, str], None]] = None,
+    check_cancelled: Optional[Callable[[], None]] = None,
+    on_file: Optional[Callable[[str, Dict[str, Any]], Optional[Dict[str, Any]]]] = None,
+) -> Dict[str, Any]:
+    """
+    Download (key, url) pairs into dest_dir/<sha1(key)>.pdf. Files already
+    present are not downloaded again. `on_file(key, info)` is called (in the
+    calling thread) for each finished file, e.g. to move it into the PDF
+    store; a dict it returns replaces the file's info. Returns
+    {"files": {key: {url, path, size, ...}}, "failed": {key: error},
+     "skipped": {key: reason}, "stats": {...}}.
+    """
+    items = [(str(k), str(u)) for k, u in items if u]
+    limiter = HostLimiter(per_host=per_host, min_interval=min_interval)
+    session = get_session(pool_size=max(16, int(workers)))
+    files: Dict[str, Dict[str, Any]] = {}
+    failed: Dict[str, str] = {}
+    skipped: Dict[str, str] = {}
+    stats = {"requested": len(items), "fetched": 0, "cached": 0, "resumed": 0, "failed": 0, "skipped": 0, "bytes": 0}
+    t0 = time.perf_counter()
+
+    def run(key: str, url: str) -> Dict[str, Any]:
+        return fetch_pdf(url, os.path.join(dest_dir, pdf_filename(key)), timeout=timeout,
+                         retries=retries, limiter=limiter, session=session, max_bytes=max_bytes)
+
+    ex = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+    try:
+        futures = {ex.submit(run, k, u): k for k, u in items}
+        for done, fut in enumerate(as_completed(futures), 1):
+            key = futures[fut]
+            try:
+                info = fut.result()
+                if on_file:
+                    info = on_file(key, info) or info
+                files[key] = info
+                if info.get("cached"):
+                    stats["cached"] += 1
+                else:
+                    stats["fetched"] += 1
+                    stats["bytes"] += int(info.get("size") or 0)
+                    stats["resumed"] += int(bool(info.get("resumed")))
+            except SkipDownload as e:
+                skipped[key] = str(e)
+                stats["skipped"] += 1
+            except Exception as e:
+                failed[key] = str(e)
+                stats["failed"] += 1
+            if on_progress:
+                rate = stats["bytes"] / 1e6 / max(time.perf_counter() - t0, 1e-9)
+                on_progress(done / max(1, len(items)),
+                            f"{done}/{len(items)} PDFs ({stats['failed']} failed, {stats['skipped']} skipped, "
+                            f"{rate:.1f} MB/s)")
+            if check_cancelled:
+                check_cancelled()
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+    stats["seconds"] = round(time.perf_counter() - t0, 2)
+    return {"files": files, "failed": failed, "skipped": skipped, "stats": stats}
@@ -0,0 +1,116 @@
+# slr/pipeline/__main__.py
+"""
+Headless SLR pipeline (no Streamlit):
+
+    python -m slr.pipeline protocol.json --out runs/
+    python -m slr.pipeline reviews/*.json --out runs/ --jobs 4 --workers 8
+    python -m slr.pipeline protocol.json --stages refine,quality --input screened.json
+
+Each protocol gets its own directory under --out (named after the file) with
+the stage artifacts and summary.json (see slr/pipeline/stages.py). A JSON
+summary per review is printed to stdout, one per line; progress goes to stderr.
+Exit status is 1 if any stage failed.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from slr.pipeline.protocol import load_protocol
+from slr.pipeline.stages import STAGE_INPUTS, STAGES, run_review
+
+_print_lock = threading.Lock()
+
+
+def _parse_stages(args: argparse.Namespace) -> List[str]:
+    if args.stages:
+        chosen = [s.strip() for s in args.stages.split(",") if s.strip()]
+    else:
+        lo = STAGES.index(args.from_stage) if args.from_stage else 0
+        hi = STAGES.index(args.to_stage) if args.to_stage else len(STAGES) - 1
+        chosen = STAGES[lo:hi + 1]
+    unknown = [s for s in chosen if s not in STAGES]
+    if unknown:
+        raise SystemExit(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    return chosen
+
+
+def _run_one(path: str, args: argparse.Namespace, stages: List[str], multi: bool) -> Dict[str, Any]:
+    name = os.path.splitext(os.path.basename(path))[0]
+    out_dir = os.path.join(args.out, name) if multi else args.out
+
+    def log(msg: str) -> None:
+        if not args.quiet:
+            with _print_lock:
+                print(f"[{name}] {msg}", file=sys.stderr, flush=True)
+
+    try:
+        proto = load_protocol(path)
+    except Exception as e:
+        return {"protocol": path, "ok": False, "error": f"cannot read protocol: {e}"}
+    if args.model:
+        proto["model"] = args.model
+    if args.mode:
+        proto["screening"]["mode"] = args.mode
+    if args.batch_size:
+        proto["screening"]["batch_size"] = args.batch_size
+
+    summary = run_review(
+        proto,
+        out_dir,
+        stages,
+        workers=args.workers,
+        resume=not args.no_resume,
+        input_path=args.input,
+        keep_going=args.keep_going,
+        log=log,
+    )
+    summary["protocol"] = path
+    return summary
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="python -m slr.pipeline",
+        description="Run query → harvest → dedup → auto-screen → AI refinement → QA → taxonomy from protocol files.",
+    )
+    ap.add_argument("protocols", nargs="+", help="protocol JSON file(s), one review each")
+    ap.add_argument("--out", default="slr_runs", help="output directory (default: slr_runs)")
+    ap.add_argument("--stages", help=f"comma-separated subset of: {','.join(STAGES)}")
+    ap.add_argument("--from", dest="from_stage", choices=STAGES, help="first stage to run")
+    ap.add_argument("--to", dest="to_stage", choices=STAGES, help="last stage to run")
+    ap.add_argument("--input", help="rows (.json/.jsonl) for the first selected stage instead of a previous artifact")
+    ap.add_argument("--workers", type=int, default=4, help="concurrent LLM requests per review (default: 4)")
+    ap.add_argument("--jobs", type=int, default=1, help="reviews processed concurrently (default: 1)")
+    ap.add_argument("--batch-size", type=int, help="papers per screening prompt (overrides protocol)")
+    ap.add_argument("--mode", choices=["full", "active", "rules"], help="screening mode (overrides protocol)")
+    ap.add_argument("--model", help="LLM model for all stages (overrides protocol)")
+    ap.add_argument("--no-resume", action="store_true", help="ignore saved LLM checkpoints and start fresh")
+    ap.add_argument("--keep-going", action="store_true", help="continue with later stages after a failure")
+    ap.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    args = ap.parse_args(argv)
+
+    stages = _parse_stages(args)
+    if args.input and len(args.protocols) > 1:
+        ap.error("--input can only be used with a single protocol")
+    first = next((s for s in STAGES if s in stages), None)
+    if args.input and first not in STAGE_INPUTS:
+        ap.error(f"--input needs a first stage that reads rows ({', '.join(STAGE_INPUTS)}), not '{first}'")
+    multi = len(args.protocols) > 1
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as ex:
+        futures = [ex.submit(_run_one, p, args, stages, multi) for p in args.protocols]
+        ok = True
+        for fut in futures:
+            summary = fut.result()
+            ok = ok and bool(summary.get("ok"))
+            with _print_lock:
+                print(json.dumps(summary, ensure_ascii=False), flush=True)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
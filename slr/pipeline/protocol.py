@@ -0,0 +1,115 @@
+# slr/pipeline/protocol.py
+"""
+Review protocol for the headless pipeline.
+
+A protocol is one JSON file describing a review. Missing keys fall back to
+the same defaults the Streamlit pages use. The planning exports from the UI
+are accepted as well (the c01 query bundle: "selected_synonyms", "arxiv";
+criteria in either schema; "rqs"/"rq_list"; the Step 5 checklist).
+
+    {
+      "topic": "sorting algorithms",
+      "picoc": {...},
+      "synonyms": {"Intervention": [...], "Population": [...]},
+      "facets": ["Intervention", "Population"],
+      "fields": ["ti", "abs"],
+      "search_query": "",                      # optional override
+      "harvest":   {"cap": 1000, "page_size": 100, "sort_by": "relevance", "delay_ms": 200},
+      "dedup":     {"key": "normalized title", "keep": "first occurrence"},
+      "criteria":  {"inclusion": [...], "exclusion": [...], "years": {"from": 2015, "to": 2025}},
+      "categories": ["cs.DS"],
+      "research_questions": [...],
+      "screening": {"mode": "full", "batch_size": 10, "temperature": 0.2,
+                    "include_unsure": false, "active": {...}, "require_all_inclusion": true},
+      "quality_checklist": {"questions": [...], "scheme": "Y/P/N", "cutoff": 3},
+      "quality":   {"temperature": 0.2},
+      "taxonomy":  {"method": "single", "depth": 2, "max_children": 6, "max_papers": 60,
+                    "abs_snip_len": 220,           # method: single | cluster | map_reduce
+                    "update": false, "max_leaf_size": 40},   # update: extend an existing taxonomy.json
+      "model": "gpt-oss-120b"
+    }
+"""
+import copy
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+from slr.screening.filters import normalize_criteria_keys
+
+DEFAULTS: Dict[str, Any] = {
+    "topic": "",
+    "picoc": {},
+    "synonyms": {},
+    "facets": ["Intervention", "Population"],
+    "fields": ["ti", "abs"],
+    "search_query": "",
+    "harvest": {"cap": 1000, "page_size": 100, "sort_by": "relevance", "delay_ms": 200},
+    "dedup": {"key": "normalized title", "keep": "first occurrence"},
+    "criteria": {},
+    "categories": [],
+    "research_questions": [],
+    "screening": {
+        "mode": "full",
+        "batch_size": 10,
+        "temperature": 0.2,
+        "include_unsure": False,
+        "active": {"seed_size": 20, "round_size": 10, "target_recall": 0.95},
+        "require_all_inclusion": True,
+    },
+    "quality_checklist": {},
+    "quality": {"temperature": 0.2},
+    "taxonomy": {"method": "single", "depth": 2, "max_children": 6, "max_papers": 60, "abs_snip_len": 220,
+                 "update": False, "max_leaf_size": 40},
+    "model": "gpt-oss-120b",
+}
+
+
+def _merge(base: Dict[str, Any], over: Dict[str, Any]) -> Dict[str, Any]:
+    out = copy.deepcopy(base)
+    for k, v in (over or {}).items():
+        if isinstance(v, dict) and isinstance(out.get(k), dict):
+            out[k] = _merge(out[k], v)
+        elif v is not None:
+            out[k] = v
+    return out
+
+
+def normalize_protocol(raw: Dict[str, Any]) -> Dict[str, Any]:
+    raw = dict(raw or {})
+
+    # UI export aliases
+    from_bundle = not raw.get("synonyms") and bool(raw.get("selected_synonyms"))
+    if from_bundle:
+        raw["synonyms"] = raw["selected_synonyms"]
+    if not raw.get("picoc") and raw.get("ai_picoc"):
+        raw["picoc"] = raw["ai_picoc"]
+    if not raw.get("research_questions"):
+        raw["research_questions"] = raw.get("rqs") or raw.get("rq_list") or []
+    arxiv = raw.get("arxiv") if isinstance(raw.get("arxiv"), dict) else {}
+    if arxiv:
+        raw.setdefault("fields", arxiv.get("fields"))
+        if not raw.get("search_query"):
+            raw["search_query"] = arxiv.get("search_query", "")
+    if not raw.get("categories") and isinstance(raw.get("sources"), dict):
+        src = raw["sources"]
+        raw["categories"] = src.get("arxiv_categories") or src.get("categories") or []
+
+    proto = _merge(DEFAULTS, {k: v for k, v in raw.items() if k in DEFAULTS})
+    if from_bundle and "facets" not in raw:
+        # a bundle's synonyms are already the chosen facets
+        proto["facets"] = [f for f, terms in raw["synonyms"].items() if terms]
+
+    crit = normalize_criteria_keys(proto.get("criteria") or {})
+    years = crit.get("years") or {}
+    crit["years"] = {
+        "from": int(years.get("from") or 1900),
+        "to": int(years.get("to") or datetime.now().year),
+    }
+    proto["criteria"] = crit
+    proto["categories"] = [str(c).strip() for c in proto.get("categories") or [] if str(c).strip()]
+    return proto
+
+
+def load_protocol(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return normalize_protocol(json.load(f))
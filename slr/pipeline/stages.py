@@ -0,0 +1,389 @@
+# slr/pipeline/stages.py
+"""
+Pipeline stages: query -> harvest -> dedup -> auto_screen -> refine -> quality -> taxonomy.
+
+Each stage reads the previous stage's rows (from this run, or from the
+artifact a previous run left in the review's output directory) and writes
+its own artifacts there, so any contiguous or non-contiguous selection of
+stages can be run and re-run:
+
+    query.json                     PICOC, synonyms, strict + recall queries (c01 bundle format)
+    raw.jsonl                      harvested arXiv records
+    deduped.jsonl
+    auto_included.jsonl / auto_excluded.jsonl
+    screened.jsonl / ai_excluded.jsonl / ai_unsure.jsonl
+    quality_scored.jsonl / quality_included.jsonl / quality_excluded.jsonl / quality_unsure.jsonl
+    taxonomy.json
+    summary.json                   per-stage status, counts and timings
+
+The LLM stages are checkpointed (slr/store/checkpoints.py), so re-running
+after a failure only sends what is missing.
+"""
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+STAGES = ["query", "harvest", "dedup", "auto_screen", "refine", "quality", "taxonomy"]
+
+# where each stage finds its input rows, in order of preference
+STAGE_INPUTS: Dict[str, List[str]] = {
+    "dedup": ["raw"],
+    "auto_screen": ["deduped", "raw"],
+    "refine": ["auto_included"],
+    "quality": ["screened", "auto_included"],
+    "taxonomy": ["quality_included", "screened", "auto_included"],
+}
+
+Log = Callable[[str], Any]
+
+
+class StageError(RuntimeError):
+    pass
+
+
+# ----------------------------- artifacts -----------------------------
+def write_json(path: str, data: Any) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def write_jsonl(path: str, rows: List[Dict]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def read_rows(path: str) -> List[Dict]:
+    """Rows from a .jsonl file (one object per line) or a .json array."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    if isinstance(data, dict):
+        # e.g. {"rows": [...]} exports
+        data = data.get("rows") or data.get("papers") or []
+    return list(data)
+
+
+class ReviewRun:
+    """State of one review: rows produced so far plus the output directory."""
+
+    def __init__(self, proto: Dict[str, Any], out_dir: str, log: Optional[Log] = None):
+        self.proto = proto
+        self.out_dir = out_dir
+        self.log = log or (lambda msg: None)
+        self.sets: Dict[str, List[Dict]] = {}
+        self.query: Optional[Dict[str, Any]] = None
+        os.makedirs(out_dir, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.out_dir, name)
+
+    def put(self, name: str, rows: List[Dict]) -> None:
+        self.sets[name] = rows
+        write_jsonl(self.path(f"{name}.jsonl"), rows)
+
+    def rows_for(self, stage: str) -> List[Dict]:
+        for name in STAGE_INPUTS[stage]:
+            if name in self.sets:
+                return self.sets[name]
+            p = self.path(f"{name}.jsonl")
+            if os.path.exists(p):
+                self.sets[name] = read_rows(p)
+                return self.sets[name]
+        raise StageError(
+            f"no input for '{stage}': run an earlier stage or pass --input "
+            f"(looked for {', '.join(n + '.jsonl' for n in STAGE_INPUTS[stage])} in {self.out_dir})"
+        )
+
+
+# ------------------------------- stages -------------------------------
+def stage_query(run: ReviewRun, **_) -> Dict[str, Any]:
+    from slr.query.builder import build_boolean_query
+    from slr.query.adapters.arxiv import build_recall_terms, build_recall_search_query, join_recall_terms
+
+    proto = run.proto
+    topic = proto["topic"]
+    picoc = proto.get("picoc") or {}
+    synonyms = proto.get("synonyms") or {}
+
+    if not any(synonyms.values()) and not proto.get("search_query"):
+        if not topic:
+            raise StageError("protocol needs 'topic', 'synonyms' or 'search_query'")
+        from slr.agents.define_picoc import define_picoc
+
+        run.log("No synonyms in protocol: generating PICOC + synonyms with the LLM…")
+        gen = define_picoc(topic)
+        picoc = picoc or gen.get("picoc", {})
+        synonyms = gen.get("synonyms", {})
+
+    selected = {f: synonyms.get(f, []) for f in proto["facets"]}
+    strict_query, strict_parts = build_boolean_query(selected, topic=topic)
+    recall_terms = build_recall_terms(topic, selected)
+    search_query = proto.get("search_query") or build_recall_search_query(recall_terms, proto["fields"])
+    if not search_query:
+        raise StageError("empty arXiv search_query (no terms for the chosen facets/fields)")
+
+    run.query = {
+        "topic": topic,
+        "picoc": picoc,
+        "selected_synonyms": selected,
+        "strict_query": {"boolean": strict_query, "parts": strict_parts},
+        "broad_recall_query": {"boolean": join_recall_terms(recall_terms), "terms": recall_terms},
+        "arxiv": {"fields": proto["fields"], "search_query": search_query},
+    }
+    write_json(run.path("query.json"), run.query)
+    return {"search_query": search_query, "terms": len(recall_terms)}
+
+
+def stage_harvest(run: ReviewRun, **_) -> Dict[str, Any]:
+    from slr.query.arxiv_api import fetch_all
+
+    if run.query is None:
+        p = run.path("query.json")
+        if os.path.exists(p):
+            with open(p, "r", encoding="utf-8") as f:
+                run.query = json.load(f)
+        else:
+            stage_query(run)
+    h = run.proto["harvest"]
+    rows, total, err = fetch_all(
+        run.query["arxiv"]["search_query"],
+        cap=int(h["cap"]),
+        page_size=int(h["page_size"]),
+        sort_by=h.get("sort_by") or None,
+        sleep_s=float(h.get("delay_ms", 200)) / 1000.0,
+        on_page=lambda n, target: run.log(f"harvest: {n}/{target} records"),
+    )
+    if err and not rows:
+        raise StageError(err)
+    run.put("raw", rows)
+    return {"records": len(rows), "total_results": total, "error": err}
+
+
+def stage_dedup(run: ReviewRun, **_) -> Dict[str, Any]:
+    from slr.screening.filters import perform_dedup
+
+    d = run.proto["dedup"]
+    deduped, dropped = perform_dedup(run.rows_for("dedup"), d["key"], d["keep"])
+    run.put("deduped", deduped)
+    return {"records": len(deduped), "dropped": dropped}
+
+
+def stage_auto_screen(run: ReviewRun, **_) -> Dict[str, Any]:
+    from slr.screening.filters import auto_screen
+
+    years = run.proto["criteria"]["years"]
+    inc, exc = auto_screen(run.rows_for("auto_screen"), years["from"], years["to"], run.proto["categories"])
+    run.put("auto_included", inc)
+    run.put("auto_excluded", exc)
+    return {"included": len(inc), "excluded": len(exc)}
+
+
+def stage_refine(run: ReviewRun, workers: int = 1, resume: bool = True, **_) -> Dict[str, Any]:
+    from slr.agents.screening import build_policy_text
+    from slr.llm.client import LLMClient
+    from slr.screening.refinement import refine_papers
+
+    proto = run.proto
+    sc = proto["screening"]
+    papers = run.rows_for("refine")
+    crit = proto["criteria"]
+    policy_text = build_policy_text(crit, proto["research_questions"])
+
+    if not policy_text and sc["mode"] != "rules":
+        raise StageError("no research questions or I/E criteria in protocol for AI refinement")
+
+    result = refine_papers(
+        papers,
+        sc["mode"],
+        policy_text=policy_text,
+        client=LLMClient(model=sc.get("model") or proto["model"]),
+        batch_size=int(sc["batch_size"]),
+        temperature=float(sc["temperature"]),
+        resume=resume,
+        workers=workers,
+        active=sc.get("active") or {},
+        inclusion=crit["inclusion"],
+        exclusion=crit["exclusion"],
+        require_all_inclusion=bool(sc.get("require_all_inclusion", True)),
+        on_progress=lambda frac, msg: run.log(f"refine: {msg}"),
+    )
+    for w in result["warnings"][:5]:
+        run.log(f"refine warning: {w}")
+
+    stats = result["stats"]
+    if stats.get("error"):
+        # checkpoints keep the finished batches; the next run resumes from there
+        raise StageError(f"LLM error after {stats.get('llm_calls', 0)} calls: {stats['error']}")
+
+    inc, exc, unsure = result["included"], result["excluded"], result["unsure"]
+    if sc.get("include_unsure"):
+        run.put("screened", inc + unsure)
+        run.put("ai_excluded", exc)
+    else:
+        run.put("screened", inc)
+        run.put("ai_excluded", exc + unsure)
+    run.put("ai_unsure", unsure)
+    return {
+        "included": len(inc),
+        "excluded": len(exc),
+        "unsure": len(unsure),
+        "mode": sc["mode"],
+        "stats": {k: v for k, v in stats.items() if not isinstance(v, (list, dict))},
+    }
+
+
+def stage_quality(run: ReviewRun, workers: int = 1, resume: bool = True, **_) -> Dict[str, Any]:
+    from slr.agents.quality_assess import checklist_items, quality_buckets
+    from slr.llm.client import LLMClient
+    from slr.screening.resumable import score_papers
+
+    proto = run.proto
+    questions, weights, scheme, cut_off = checklist_items(proto.get("quality_checklist") or {})
+    if not questions:
+        return {"skipped": "no quality checklist questions in protocol"}
+    if cut_off <= 0:
+        cut_off = sum(weights) * 0.5  # same default as the c03 page
+
+    qa = proto["quality"]
+    rows, stats = score_papers(
+        run.rows_for("quality"),
+        questions,
+        weights,
+        scheme,
+        client=LLMClient(model=qa.get("model") or proto["model"]),
+        cut_off=cut_off,
+        temperature=float(qa.get("temperature", 0.2)),
+        resume=resume,
+        workers=workers,
+        on_progress=lambda done, total: run.log(f"quality: scored {done}/{total}"),
+    )
+    for err in stats["errors"][:5]:
+        run.log(f"quality: {err}")
+    if stats["remaining"]:
+        raise StageError(
+            f"{stats['remaining']} papers not scored ({len(stats['errors'])} LLM errors); re-run to resume"
+        )
+
+    incl, excl, unsure = quality_buckets(rows, cut_off)
+    run.put("quality_scored", rows)
+    run.put("quality_included", incl)
+    run.put("quality_excluded", excl)
+    run.put("quality_unsure", unsure)
+    return {"included": len(incl), "excluded": len(excl), "unsure": len(unsure), "cut_off": cut_off}
+
+
+def stage_taxonomy(run: ReviewRun, workers: int = 1, **_) -> Dict[str, Any]:
+    from slr.agents.taxonomy import build_taxonomy
+
+    proto = run.proto
+    tx = proto["taxonomy"]
+    papers = run.rows_for("taxonomy")
+    if not papers:
+        return {"skipped": "no included papers"}
+
+    method = tx.get("method") or "single"
+    common = dict(
+        titles=[str(r.get("title", "")) for r in papers],
+        paper_ids=[str(r.get("id", "")) or f"paper_{i}" for i, r in enumerate(papers)],
+        picoc=proto.get("picoc") or (run.query or {}).get("picoc") or {},
+        rqs=proto["research_questions"],
+        depth=int(tx["depth"]),
+        max_children_per_node=int(tx["max_children"]),
+        model=tx.get("model") or proto["model"],
+    )
+    previous = None
+    if tx.get("update") and os.path.exists(run.path("taxonomy.json")):
+        with open(run.path("taxonomy.json"), "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    if previous and previous.get("taxonomy", {}).get("children"):
+        # living review: keep the tree and mapping, only add the new papers
+        from slr.agents.taxonomy_update import update_taxonomy
+
+        method = "update"
+        data = update_taxonomy(
+            previous["taxonomy"],
+            previous.get("mapping") or [],
+            abstracts=[str(r.get("summary", "")) for r in papers],
+            max_leaf_size=int(tx.get("max_leaf_size", 40)),
+            workers=int(workers),
+            **common,
+        )
+    else:
+        extra = {"workers": int(workers)} if method != "single" else {}
+        data = build_taxonomy(
+            method,
+            abstracts=[str(r.get("summary", "")) for r in papers] if int(tx["abs_snip_len"]) > 0 else None,
+            max_papers=int(tx["max_papers"]),
+            abs_snip_len=int(tx["abs_snip_len"]),
+            **common,
+            **extra,
+        )
+    write_json(run.path("taxonomy.json"), data)
+    if not data.get("taxonomy", {}).get("children"):
+        raise StageError(f"empty taxonomy: {data.get('notes')}")
+    return {"papers": len(papers), "mapped": len(data.get("mapping", [])), "method": method}
+
+
+STAGE_FUNCS = {
+    "query": stage_query,
+    "harvest": stage_harvest,
+    "dedup": stage_dedup,
+    "auto_screen": stage_auto_screen,
+    "refine": stage_refine,
+    "quality": stage_quality,
+    "taxonomy": stage_taxonomy,
+}
+
+
+def run_review(
+    proto: Dict[str, Any],
+    out_dir: str,
+    stages: List[str],
+    *,
+    workers: int = 1,
+    resume: bool = True,
+    input_path: Optional[str] = None,
+    keep_going: bool = False,
+    log: Optional[Log] = None,
+) -> Dict[str, Any]:
+    """
+    Run the selected stages in pipeline order and write summary.json.
+    Stops at the first failed stage unless keep_going is set.
+    `input_path` feeds the first stage; query and harvest take no rows, so
+    it is rejected (StageError) when one of them comes first.
+    """
+    order = [s for s in STAGES if s in stages]
+    if input_path and order and order[0] not in STAGE_INPUTS:
+        raise StageError(f"--input does not apply to '{order[0]}'; only {', '.join(STAGE_INPUTS)} read input rows")
+    run = ReviewRun(proto, out_dir, log=log)
+    if input_path and order:
+        run.sets[STAGE_INPUTS[order[0]][0]] = read_rows(input_path)
+
+    summary: Dict[str, Any] = {"topic": proto.get("topic", ""), "out_dir": out_dir, "ok": True, "stages": {}}
+    for name in order:
+        run.log(f"== {name}")
+        t0 = time.time()
+        try:
+            info = STAGE_FUNCS[name](run, workers=workers, resume=resume)
+            status = "skipped" if "skipped" in info else "ok"
+        except StageError as e:
+            info, status = {"error": str(e)}, "failed"
+        except Exception as e:
+            info, status = {"error": f"{type(e).__name__}: {e}"}, "failed"
+        info.update(status=status, seconds=round(time.time() - t0, 2))
+        summary["stages"][name] = info
+        run.log(f"{name}: {status} ({info['seconds']}s)")
+        if status == "failed":
+            summary["ok"] = False
+            if not keep_going:
+                break
+
+    write_json(run.path("summary.json"), summary)
+    return summary
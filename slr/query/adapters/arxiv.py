@@ -75,3 +75,50 @@ def _per_term_field_group(term: str, fields: Iterable[str]) -> str:
     t = _sanitize(_strip_quotes(term)).replace('"', '\\"')
     pieces = [f'{f}:"{t}"' for f in fields]
     return "(" + " OR ".join(pieces) + ")"
+
+# ----- Broad recall query (c01 "Fetch ALL" and the headless pipeline) -----
+RECALL_FACET_PRIORITY = ["Intervention", "Population", "Comparison", "Outcome", "Context"]
+
+def _quote_term(t: str) -> str:
+    t = (t or "").strip()
+    if not t:
+        return ""
+    t = t.replace('"', '\\"')
+    return f"\"{t}\""
+
+def build_recall_terms(topic: str, facet_terms: Dict[str, List[str]]) -> List[str]:
+    """
+    Single OR bucket: topic first, then facet terms in priority order,
+    each quoted, de-duplicated case-insensitively.
+    """
+    pool: List[str] = []
+    if topic:
+        pool.append(topic)
+    for facet in RECALL_FACET_PRIORITY:
+        for term in facet_terms.get(facet, []) or []:
+            pool.append(term)
+    out, seen = [], set()
+    for raw in pool:
+        qt = _quote_term(raw)
+        if qt and qt.lower() not in seen:
+            seen.add(qt.lower())
+            out.append(qt)
+    return out
+
+def join_recall_terms(terms: List[str]) -> str:
+    if not terms:
+        return ""
+    return terms[0] if len(terms) == 1 else "(" + " OR ".join(terms) + ")"
+
+def build_recall_search_query(terms: List[str], fields: Fields) -> str:
+    """
+    arXiv search_query for the recall bucket: every term on every chosen field, all OR-ed.
+    """
+    fields = list(fields or [])
+    if not terms or not fields:
+        return ""
+    per_term_chunks = []
+    for term in terms:
+        field_queries = [f"{fld}:{term}" for fld in fields]
+        per_term_chunks.append(field_queries[0] if len(field_queries) == 1 else "(" + " OR ".join(field_queries) + ")")
+    return per_term_chunks[0] if len(per_term_chunks) == 1 else "(" + " OR ".join(per_term_chunks) + ")"
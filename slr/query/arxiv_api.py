@@ -6,6 +6,7 @@ Public functions:
 - build_url(search_query, start=0, max_results=50, sort_by=None) -> str
 - fetch_page(search_query, start=0, max_results=50, sort_by=None) -> (rows, total_results)
 - fetch(search_query, start=0, max_results=50, sort_by=None) -> rows   (compat wrapper)
+- fetch_all(search_query, cap=1000, page_size=100, ...) -> (rows, total_results, error)
 
 Features:
 - Uses HTTPS and follows redirects (fixes 301 errors).
@@ -15,7 +16,8 @@ Features:
 - If `feedparser` is unavailable, uses a stdlib XML fallback.
 """
 
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
+import time
 import urllib.parse
 import httpx
 
@@ -196,3 +198,46 @@ def fetch(
     """Backward-compatible wrapper returning only rows."""
     rows, _ = fetch_page(search_query, start=start, max_results=max_results, sort_by=sort_by)
     return rows
+
+
+def fetch_all(
+    search_query: str,
+    cap: int = 1000,
+    page_size: int = 100,
+    sort_by: Optional[str] = None,
+    sleep_s: float = 0.2,
+    on_page: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[List[Dict], int, Optional[str]]:
+    """
+    Page through results until `cap`, the feed's totalResults, or an empty page.
+
+    on_page(collected, target) is called after every page. A fetch error stops
+    paging; rows collected so far are returned together with the error text.
+    """
+    all_rows: List[Dict] = []
+    start, cap, size = 0, int(cap), int(page_size)
+    total_seen: Optional[int] = None
+
+    while start < cap:
+        try:
+            rows, total_results = fetch_page(search_query, start=start, max_results=size, sort_by=sort_by)
+        except Exception as e:
+            return all_rows, total_seen or 0, f"Fetch error at start={start}: {e}"
+
+        if total_seen is None:
+            total_seen = total_results
+        if not rows:
+            break
+
+        all_rows.extend(rows)
+        start += len(rows)
+
+        target = min(cap, total_seen or cap)
+        if on_page:
+            on_page(len(all_rows), target)
+        if len(all_rows) >= target:
+            break
+        if sleep_s > 0:
+            time.sleep(sleep_s)
+
+    return all_rows, total_seen or 0, None
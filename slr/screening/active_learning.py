@@ -0,0 +1,201 @@
+# slr/screening/active_learning.py
+"""
+Active-learning screening loop.
+
+Instead of sending every auto-included paper to the LLM, a lightweight local
+classifier (logistic regression on SBERT embeddings) is trained on the LLM
+decisions as they arrive. Each round only the papers the classifier is least
+sure about are sent to the LLM. The loop stops once the estimated recall of
+relevant papers reaches `target_recall` (or the LLM budget is used up).
+
+Recall estimate: found / (found + sum of P(relevant) over unscreened papers).
+Papers never sent to the LLM are marked 'exclude' (or 'unsure' when the
+classifier still leans towards include) with `ai_source = "classifier"`.
+"""
+from __future__ import annotations
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from slr.agents.screening import split_by_decision
+from slr.embed.sbert import paper_texts
+
+# LLM labels that count as "relevant" for training; unsure is kept on the
+# include side so recall is protected.
+POSITIVE_DECISIONS = {"include", "unsure"}
+
+
+def _fit_predict(
+    X: np.ndarray,
+    lab_idx: List[int],
+    y: np.ndarray,
+    unl_idx: List[int],
+    prior: np.ndarray,
+    random_state: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (probs, priority) for the unlabeled papers.
+    priority: higher = ask the LLM sooner.
+    """
+    pos = int(y.sum())
+    if pos == 0 or pos == len(y):
+        # Single class so far: no classifier yet. Use a smoothed prevalence
+        # for the recall estimate and the policy similarity for ordering.
+        rate = (pos + 1.0) / (len(y) + 2.0)
+        probs = np.full(len(unl_idx), rate, dtype=np.float64)
+        pr = prior[unl_idx]
+        priority = pr if pos == 0 else -pr
+        return probs, priority
+
+    from sklearn.linear_model import LogisticRegression
+
+    clf = LogisticRegression(max_iter=1000, C=1.0, random_state=random_state)
+    clf.fit(X[lab_idx], y)
+    probs = clf.predict_proba(X[unl_idx])[:, 1]
+    priority = -np.abs(probs - 0.5)  # uncertainty sampling
+    return probs, priority
+
+
+def run_active_screening(
+    papers: List[Dict],
+    label_fn: Callable[[List[Dict]], List[Dict]],
+    *,
+    policy_text: str = "",
+    embed_fn: Optional[Callable[[Sequence[str]], np.ndarray]] = None,
+    seed_size: int = 20,
+    round_size: int = 10,
+    target_recall: float = 0.95,
+    min_rounds: int = 2,
+    max_llm_fraction: float = 1.0,
+    random_state: int = 42,
+    on_round: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> Tuple[List[Dict], List[Dict], List[Dict], Dict[str, Any]]:
+    """
+    Screen `papers` with as few LLM calls as possible.
+
+    label_fn: takes a list of papers and returns the same papers (same order)
+              with `ai_decision` / `ai_reason` / `ai_matched_rules` attached,
+              e.g. a wrapper around `slr.agents.screening.screen_batch`.
+
+    Returns (included, excluded, unsure, stats).
+    """
+    n = len(papers)
+    stats: Dict[str, Any] = {
+        "total": n,
+        "llm_screened": 0,
+        "rounds": 0,
+        "found_relevant": 0,
+        "est_remaining": None,
+        "est_recall": None,
+        "stopped": None,
+        "error": None,
+    }
+    if n == 0:
+        return [], [], [], stats
+
+    if embed_fn is None:
+        from slr.embed.sbert import encode_cached as embed_fn  # type: ignore[no-redef]
+
+    X = np.asarray(embed_fn(paper_texts(papers)), dtype=np.float32)
+    if policy_text:
+        pv = np.asarray(embed_fn([policy_text]), dtype=np.float32)[0]
+        prior = X @ pv
+    else:
+        prior = np.zeros(n, dtype=np.float32)
+
+    budget = max(int(seed_size), int(math.ceil(float(max_llm_fraction) * n)))
+    rng = np.random.default_rng(random_state)
+
+    # Seed: half the papers closest to the policy text, half random.
+    k_top = min(n, (int(seed_size) + 1) // 2)
+    seed = [int(i) for i in np.argsort(-prior)[:k_top]]
+    taken = set(seed)
+    rest = np.array([i for i in range(n) if i not in taken], dtype=np.int64)
+    rng.shuffle(rest)
+    seed += [int(i) for i in rest[: max(0, int(seed_size) - k_top)]]
+
+    labeled: Dict[int, Dict] = {}
+    prob_by_idx: Dict[int, float] = {}
+    pending = seed
+
+    while pending:
+        try:
+            rows = label_fn([papers[i] for i in pending])
+        except Exception as e:
+            stats["error"] = str(e)
+            stats["stopped"] = "llm_error"
+            break
+
+        for i, rr in zip(pending, rows):
+            rr = dict(rr)
+            rr["ai_source"] = "llm"
+            labeled[i] = rr
+        stats["rounds"] += 1
+        stats["llm_screened"] = len(labeled)
+
+        unl = [i for i in range(n) if i not in labeled]
+        lab = sorted(labeled)
+        y = np.array(
+            [1 if labeled[i].get("ai_decision") in POSITIVE_DECISIONS else 0 for i in lab],
+            dtype=np.int64,
+        )
+        found = int(y.sum())
+        stats["found_relevant"] = found
+
+        if not unl:
+            stats["est_remaining"] = 0.0
+            stats["est_recall"] = 1.0
+            stats["stopped"] = "all_screened"
+            if on_round:
+                on_round(dict(stats))
+            break
+
+        probs, priority = _fit_predict(X, lab, y, unl, prior, random_state)
+        prob_by_idx = {i: float(p) for i, p in zip(unl, probs)}
+
+        est_remaining = float(probs.sum())
+        denom = found + est_remaining
+        est_recall = (found / denom) if denom > 0 else 1.0
+        stats["est_remaining"] = round(est_remaining, 2)
+        stats["est_recall"] = round(est_recall, 4)
+        if on_round:
+            on_round(dict(stats))
+
+        if stats["rounds"] >= int(min_rounds) and est_recall >= float(target_recall):
+            stats["stopped"] = "target_recall"
+            break
+
+        left = budget - len(labeled)
+        if left <= 0:
+            stats["stopped"] = "budget"
+            break
+
+        k = min(int(round_size), left, len(unl))
+        pick = np.argsort(-priority, kind="stable")[:k]
+        pending = [unl[int(j)] for j in pick]
+
+    # Compose final decisions
+    out: List[Dict] = []
+    for i, r in enumerate(papers):
+        if i in labeled:
+            out.append(labeled[i])
+            continue
+        p = prob_by_idx.get(i)
+        rr = dict(r)
+        rr["ai_source"] = "classifier"
+        rr["ai_include_prob"] = round(p, 4) if p is not None else None
+        rr["ai_matched_rules"] = []
+        if stats["error"] or p is None:
+            rr["ai_decision"] = "unsure"
+            rr["ai_reason"] = "Not screened (LLM error before this paper was reached)."
+        elif p >= 0.5:
+            rr["ai_decision"] = "unsure"
+            rr["ai_reason"] = f"Active learning: classifier leans include (p={p:.2f}); not sent to LLM."
+        else:
+            rr["ai_decision"] = "exclude"
+            rr["ai_reason"] = f"Active learning: predicted irrelevant (p={p:.2f}); not sent to LLM."
+        out.append(rr)
+
+    inc, exc, unsure = split_by_decision(out)
+    return inc, exc, unsure, stats
@@ -0,0 +1,121 @@
+# slr/screening/filters.py
+"""
+Deterministic pre-LLM screening steps (used by c02 and the headless pipeline).
+
+- normalize_criteria_keys(crit) -> {"inclusion", "exclusion", "years"}
+- perform_dedup(rows, dedup_key, keep_rule) -> (rows, dropped)
+- auto_screen(rows, y_from, y_to, categories) -> (included, excluded)
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from slr.agents.screening import parse_year
+
+DEDUP_KEYS = ["normalized title", "id", "title + year"]
+KEEP_RULES = ["first occurrence", "latest by year"]
+
+
+def normalize_title(t: str) -> str:
+    if not t:
+        return ""
+    t = t.lower()
+    t = re.sub(r"[^a-z0-9\s]", " ", t)
+    t = re.sub(r"\s+", " ", t).strip()
+    return t
+
+
+# -------- Accept BOTH naming styles from earlier steps --------
+def normalize_criteria_keys(crit: Dict) -> Dict:
+    """
+    Accept both:
+      - {"include","exclude","year_from","year_to"}
+      - {"inclusion","exclusion","years":{"from","to"}}
+    Return unified keys: {"inclusion":[], "exclusion":[], "years":{"from":..,"to":..}}
+    """
+    inclusion = crit.get("inclusion")
+    exclusion = crit.get("exclusion")
+    years     = crit.get("years")
+
+    if inclusion is None and "include" in crit:
+        inclusion = crit.get("include", [])
+    if exclusion is None and "exclude" in crit:
+        exclusion = crit.get("exclude", [])
+    if years is None and ("year_from" in crit or "year_to" in crit):
+        years = {"from": crit.get("year_from"), "to": crit.get("year_to")}
+
+    return {
+        "inclusion": inclusion or [],
+        "exclusion": exclusion or [],
+        "years": years or {},
+    }
+
+
+def dedup_key_for(r: Dict, dedup_key: str = "normalized title") -> str:
+    if dedup_key == "id":
+        return (r.get("id", "") or "").strip().lower()
+    if dedup_key == "title + year":
+        yr = parse_year(r.get("published", "")) or 0
+        return f"{normalize_title(r.get('title',''))}::{yr}"
+    return normalize_title(r.get("title", ""))
+
+
+def perform_dedup(
+    items: List[Dict],
+    dedup_key: str = "normalized title",
+    keep_rule: str = "first occurrence",
+) -> Tuple[List[Dict], int]:
+    seen: Dict[str, Dict] = {}
+    drops = 0
+    for r in items:
+        k = dedup_key_for(r, dedup_key)
+
+        if k not in seen:
+            seen[k] = r
+        else:
+            if keep_rule == "latest by year":
+                y_old = parse_year(seen[k].get("published", "")) or 0
+                y_new = parse_year(r.get("published", "")) or 0
+                if y_new > y_old:
+                    seen[k] = r
+            drops += 1
+    return list(seen.values()), drops
+
+
+def auto_screen(
+    items: List[Dict],
+    y_from: int,
+    y_to: int,
+    categories: Optional[Iterable[str]] = None,
+) -> Tuple[List[Dict], List[Dict]]:
+    included: List[Dict] = []
+    excluded: List[Dict] = []
+    cat_allow: Optional[set] = set(categories) if categories else None
+
+    for r in items:
+        yr = parse_year(r.get("published", ""))
+        cat = (r.get("category", "") or "").strip()
+
+        # Year filter
+        if yr is not None and (yr < int(y_from) or yr > int(y_to)):
+            rr = dict(r)
+            rr["reason"] = f"year {yr} outside [{y_from}-{y_to}]"
+            excluded.append(rr)
+            continue
+
+        # Computer Science only
+        if not cat.startswith("cs."):
+            rr = dict(r)
+            rr["reason"] = f"non-CS category: {cat or 'N/A'}"
+            excluded.append(rr)
+            continue
+
+        # Enforce selected categories if provided
+        if cat_allow and cat not in cat_allow:
+            rr = dict(r)
+            rr["reason"] = f"category not in selected sources: {cat}"
+            excluded.append(rr)
+            continue
+
+        included.append(r)
+
+    return included, excluded
@@ -0,0 +1,114 @@
+# slr/screening/refinement.py
+"""
+AI refinement of the auto-included set, shared by the c02 background job
+(slr/jobs/tasks.py) and the headless pipeline (slr/pipeline).
+
+Modes:
+- "full"    every paper to the LLM in batches (slr/screening/resumable.py)
+- "active"  classifier + uncertain papers only (slr/screening/active_learning.py)
+- "rules"   one verdict per I/E rule, cached (slr/screening/rule_screening.py)
+
+Returns {"included", "excluded", "unsure", "stats", "warnings"}.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+from slr.agents.screening import split_by_decision
+from slr.llm.client import LLMClient
+
+MODES = ("full", "active", "rules")
+
+
+def refine_papers(
+    papers: List[Dict],
+    mode: str = "full",
+    *,
+    policy_text: str = "",
+    client: Optional[LLMClient] = None,
+    batch_size: int = 10,
+    temperature: float = 0.2,
+    resume: bool = True,
+    workers: int = 1,
+    active: Optional[Dict[str, Any]] = None,
+    inclusion: Optional[List[str]] = None,
+    exclusion: Optional[List[str]] = None,
+    require_all_inclusion: bool = True,
+    on_progress: Optional[Callable[[float, str], Any]] = None,
+    on_batch: Optional[Callable[[], Any]] = None,
+) -> Dict[str, Any]:
+    """
+    on_progress(fraction, message) is called as work completes; on_batch() is
+    called before every active-learning LLM batch (the job runner uses both to
+    check for cancellation). `workers` only applies to the full mode.
+    """
+    client = client or LLMClient()
+    progress = on_progress or (lambda frac, msg: None)
+    warnings: List[str] = []
+
+    if mode == "rules":
+        from slr.screening.rule_screening import run_rule_screening
+
+        inc, exc, unsure, stats = run_rule_screening(
+            papers,
+            inclusion or [],
+            exclusion or [],
+            client=client,
+            batch_size=batch_size,
+            temperature=temperature,
+            require_all_inclusion=require_all_inclusion,
+            on_progress=lambda done, planned, label: progress(
+                done / max(1, planned), f"Rule {label}: {done}/{planned} LLM calls"
+            ),
+            on_warning=warnings.append,
+        )
+        return {"included": inc, "excluded": exc, "unsure": unsure, "stats": stats, "warnings": warnings}
+
+    if mode == "active":
+        from slr.screening.active_learning import run_active_screening
+        from slr.screening.resumable import CheckpointedLabeler
+
+        al = active or {}
+        labeler = CheckpointedLabeler(
+            client, policy_text,
+            batch_size=batch_size,
+            temperature=temperature,
+            resume=resume,
+            on_batch=on_batch,
+            on_warning=warnings.append,
+        )
+
+        def _on_round(stats: Dict[str, Any]) -> None:
+            rec = stats.get("est_recall")
+            msg = f"Round {stats['rounds']}: {stats['llm_screened']}/{stats['total']} papers sent to LLM"
+            if rec is not None:
+                msg += f", estimated recall {rec:.0%}"
+            progress(max(stats["llm_screened"] / max(1, stats["total"]), float(rec or 0.0)), msg)
+
+        inc, exc, unsure, stats = run_active_screening(
+            papers,
+            labeler,
+            policy_text=policy_text,
+            seed_size=int(al.get("seed_size", 20)),
+            round_size=int(al.get("round_size", 10)),
+            target_recall=float(al.get("target_recall", 0.95)),
+            on_round=_on_round,
+        )
+        stats["resumed"] = labeler.resumed
+        stats["run_id"] = labeler.run_id
+        return {"included": inc, "excluded": exc, "unsure": unsure, "stats": stats, "warnings": warnings}
+
+    # full: every paper to the LLM, batch by batch, checkpointed
+    from slr.screening.resumable import screen_papers
+
+    screened, stats = screen_papers(
+        papers,
+        policy_text,
+        client=client,
+        batch_size=batch_size,
+        temperature=temperature,
+        resume=resume,
+        workers=workers,
+        on_progress=lambda done, total: progress(done / max(1, total), f"Screened {done}/{total} papers"),
+        on_warning=warnings.append,
+    )
+    inc, exc, unsure = split_by_decision(screened)
+    return {"included": inc, "excluded": exc, "unsure": unsure, "stats": stats, "warnings": warnings}
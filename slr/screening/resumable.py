@@ -0,0 +1,265 @@
+# slr/screening/resumable.py
+"""
+Checkpointed, resumable per-paper LLM runs.
+
+- screen_papers(...)   c02 AI refinement (batch prompts, one decision per paper)
+- score_papers(...)    c03 quality scoring (one prompt per paper)
+- CheckpointedLabeler  label function for the active-learning loop that reuses
+                       and records the same screening checkpoints
+
+Every finished batch is persisted in slr/store/checkpoints.py before the next
+one is sent, so an endpoint outage only loses the batches in flight. Running
+the same configuration again resumes: papers with a stored result are not
+sent to the LLM. `workers > 1` keeps that many LLM requests in flight (the
+headless pipeline uses this; the pages keep the default of one).
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from slr.agents.screening import batched, screen_batch
+from slr.llm.client import LLMClient
+from slr.store.checkpoints import CheckpointStore, run_id_for
+from slr.store.keys import canonical_paper_id
+
+SCREEN_FIELDS = ("ai_decision", "ai_reason", "ai_matched_rules")
+QA_FIELDS = ("qa", "total_score", "total_score_pct", "decision", "ai_decision_raw")
+
+# c03: give up after this many failed papers in a row (endpoint is down)
+MAX_CONSECUTIVE_ERRORS = 3
+
+
+def paper_ids(papers: List[Dict]) -> List[str]:
+    return [canonical_paper_id(r) or f"row:{i}" for i, r in enumerate(papers)]
+
+
+def screening_run_id(policy_text: str, temperature: float, model: str) -> Tuple[str, Dict[str, Any]]:
+    settings = {"policy_text": policy_text, "temperature": float(temperature), "model": model}
+    return run_id_for("screening", settings), settings
+
+
+def _answered(idx_batch: List[int], rows: List[Dict]) -> List[Tuple[int, Dict]]:
+    """(index, row) pairs the model actually answered; padded rows (ai_missing) are dropped."""
+    return [(i, rr) for i, rr in zip(idx_batch, rows) if not rr.pop("ai_missing", False)]
+
+
+def _merge(paper: Dict, saved: Dict, fields) -> Dict:
+    rr = dict(paper)
+    for k in fields:
+        if k in saved:
+            rr[k] = saved[k]
+    return rr
+
+
+class CheckpointedLabeler:
+    """
+    Callable label function: papers with a saved screening decision are
+    answered from the checkpoint, the rest are screened in batches and saved.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        policy_text: str,
+        batch_size: int = 10,
+        temperature: float = 0.2,
+        store: Optional[CheckpointStore] = None,
+        resume: bool = True,
+        on_batch: Optional[Callable[[], Any]] = None,
+        on_warning: Optional[Callable[[str], Any]] = None,
+    ):
+        self.client = client
+        self.policy_text = policy_text
+        self.batch_size = int(batch_size)
+        self.temperature = float(temperature)
+        self.store = store or CheckpointStore()
+        self.on_batch = on_batch
+        self.on_warning = on_warning
+        self.run_id, settings = screening_run_id(policy_text, self.temperature, client.model)
+        self.store.open_run(self.run_id, "screening", settings, fresh=not resume)
+        self.resumed = 0
+        self.llm_calls = 0
+
+    def __call__(self, papers: List[Dict]) -> List[Dict]:
+        pids = paper_ids(papers)
+        saved = self.store.load(self.run_id, pids)
+        self.resumed += len(saved)
+        out: Dict[int, Dict] = {i: _merge(p, saved[pid], SCREEN_FIELDS) for i, (p, pid) in enumerate(zip(papers, pids)) if pid in saved}
+        todo = [i for i, pid in enumerate(pids) if pid not in saved]
+        for idx_batch in batched(todo, self.batch_size):
+            if self.on_batch:
+                self.on_batch()
+            rows = screen_batch(
+                self.client, self.policy_text, [papers[i] for i in idx_batch],
+                temperature=self.temperature, on_warning=self.on_warning,
+            )
+            # padded 'unsure' rows still label this round but are not checkpointed
+            self.store.save_many(self.run_id, [
+                (pids[i], {k: rr.get(k) for k in SCREEN_FIELDS}) for i, rr in _answered(idx_batch, rows)
+            ])
+            self.llm_calls += 1
+            out.update(zip(idx_batch, rows))
+        return [out[i] for i in range(len(papers))]
+
+
+def screen_papers(
+    papers: List[Dict],
+    policy_text: str,
+    *,
+    client: Optional[LLMClient] = None,
+    batch_size: int = 10,
+    temperature: float = 0.2,
+    resume: bool = True,
+    workers: int = 1,
+    store: Optional[CheckpointStore] = None,
+    on_progress: Optional[Callable[[int, int], Any]] = None,
+    on_warning: Optional[Callable[[str], Any]] = None,
+) -> Tuple[List[Dict], Dict[str, Any]]:
+    """
+    Screen every paper, resuming from saved decisions.
+
+    Stops sending at the first LLM error (the endpoint is most likely down);
+    all decisions made so far are already saved. Papers the model skipped in its
+    reply come back 'unsure' but are not saved and count as `remaining`.
+    Returns (screened rows in input order — unfinished papers are left out, stats).
+    """
+    client = client or LLMClient()
+    store = store or CheckpointStore()
+    run_id, settings = screening_run_id(policy_text, temperature, client.model)
+    store.open_run(run_id, "screening", settings, fresh=not resume)
+
+    pids = paper_ids(papers)
+    saved = store.load(run_id, pids)
+    results: Dict[int, Dict] = {i: _merge(p, saved[pid], SCREEN_FIELDS) for i, (p, pid) in enumerate(zip(papers, pids)) if pid in saved}
+    todo = [i for i, pid in enumerate(pids) if pid not in saved]
+    stats: Dict[str, Any] = {
+        "run_id": run_id,
+        "total": len(papers),
+        "resumed": len(results),
+        "llm_calls": 0,
+        "remaining": len(todo),
+        "error": None,
+    }
+    unanswered: set = set()
+    if on_progress:
+        on_progress(len(results), len(papers))
+
+    def _screen(idx_batch: List[int]) -> Tuple[List[int], List[Dict]]:
+        return idx_batch, screen_batch(
+            client, policy_text, [papers[i] for i in idx_batch],
+            temperature=temperature, on_warning=on_warning,
+        )
+
+    ex = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+    try:
+        futures = [ex.submit(_screen, b) for b in batched(todo, int(batch_size))]
+        for fut in as_completed(futures):
+            if fut.cancelled():
+                continue
+            try:
+                idx_batch, rows = fut.result()
+            except Exception as e:
+                # endpoint is most likely down: keep what is in flight, send nothing new
+                stats["error"] = stats["error"] or str(e)
+                for f in futures:
+                    f.cancel()
+                continue
+            # papers the model skipped are shown as 'unsure' but not saved, so a resume sends them again
+            answered = _answered(idx_batch, rows)
+            store.save_many(run_id, [(pids[i], {k: rr.get(k) for k in SCREEN_FIELDS}) for i, rr in answered])
+            results.update(zip(idx_batch, rows))
+            unanswered.update(set(idx_batch) - {i for i, _ in answered})
+            stats["llm_calls"] += 1
+            stats["remaining"] = len(papers) - len(results) + len(unanswered)
+            if on_progress:
+                on_progress(len(results), len(papers))
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+    return [results[i] for i in range(len(papers)) if i in results], stats
+
+
+def score_papers(
+    papers: List[Dict],
+    questions: List[str],
+    weights: List[float],
+    scheme: str = "Y/P/N",
+    *,
+    client: Optional[LLMClient] = None,
+    cut_off: float = 0.0,
+    temperature: float = 0.2,
+    resume: bool = True,
+    workers: int = 1,
+    store: Optional[CheckpointStore] = None,
+    on_progress: Optional[Callable[[int, int], Any]] = None,
+) -> Tuple[List[Dict], Dict[str, Any]]:
+    """
+    Quality-score every paper, resuming from saved scores.
+
+    Failed papers are not checkpointed (a resume retries them); after
+    MAX_CONSECUTIVE_ERRORS failures in a row the run stops. Returns
+    (scored rows in input order, stats with `errors`).
+    """
+    from slr.agents.quality_assess import apply_quality_reply, build_user_prompt_for_paper, SYSTEM
+
+    client = client or LLMClient(model="gpt-oss-120b")
+    store = store or CheckpointStore()
+    settings = {
+        "questions": questions,
+        "weights": weights,
+        "scheme": scheme,
+        "temperature": float(temperature),
+        "model": client.model,
+    }
+    run_id = run_id_for("quality", settings)
+    store.open_run(run_id, "quality", settings, fresh=not resume)
+
+    pids = paper_ids(papers)
+    saved = store.load(run_id, pids)
+    results: Dict[int, Dict] = {i: _merge(p, saved[pid], QA_FIELDS) for i, (p, pid) in enumerate(zip(papers, pids)) if pid in saved}
+    stats: Dict[str, Any] = {
+        "run_id": run_id,
+        "total": len(papers),
+        "resumed": len(results),
+        "llm_calls": 0,
+        "errors": [],
+        "stopped_early": False,
+    }
+    consecutive = 0
+    done = len(results)
+    if on_progress:
+        on_progress(done, len(papers))
+
+    def _score(idx: int) -> Tuple[int, str]:
+        user = build_user_prompt_for_paper(papers[idx], questions, weights, scheme)
+        return idx, client.chat(system=SYSTEM, user=user, temperature=temperature)
+
+    ex = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+    try:
+        futures = {ex.submit(_score, idx): idx for idx in range(len(papers)) if idx not in results}
+        for fut in as_completed(futures):
+            if fut.cancelled():
+                continue
+            try:
+                idx, resp = fut.result()
+            except Exception as e:
+                stats["errors"].append(f"LLM error on paper {futures[fut] + 1}: {e}")
+                consecutive += 1
+                if consecutive >= MAX_CONSECUTIVE_ERRORS and not stats["stopped_early"]:
+                    stats["stopped_early"] = True
+                    for f in futures:
+                        f.cancel()
+                continue
+            consecutive = 0
+            stats["llm_calls"] += 1
+            enriched = apply_quality_reply(papers[idx], resp, questions, weights, scheme, cut_off)
+            store.save_many(run_id, [(pids[idx], {k: enriched.get(k) for k in QA_FIELDS})])
+            results[idx] = enriched
+            done += 1
+            if on_progress:
+                on_progress(done, len(papers))
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+    stats["remaining"] = len(papers) - len(results)
+    return [results[i] for i in range(len(papers)) if i in results], stats
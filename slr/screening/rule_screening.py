@@ -0,0 +1,117 @@
+# slr/screening/rule_screening.py
+"""
+Per-criterion screening.
+
+Each paper is judged against each inclusion/exclusion rule separately
+(batched across papers per rule) and the final decision is composed from the
+rule verdicts. Verdicts are cached per (canonical paper id, rule text hash),
+so adding or rewording one rule only costs one LLM pass for that rule.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from slr.agents.screening import batched, compose_rule_decision, judge_rule_batch, split_by_decision
+from slr.llm.client import LLMClient
+from slr.store.keys import canonical_paper_id, text_hash
+from slr.store.rule_cache import RuleVerdictCache
+
+
+def _rule_list(kind: str, prefix: str, rules: List[str]) -> List[Tuple[str, str, str, str]]:
+    """[(label, kind, rule text, rule hash), ...] for non-empty rules."""
+    out = []
+    for i, r in enumerate(rules, 1):
+        r = str(r or "").strip()
+        if r:
+            out.append((f"{prefix}{i}", kind, r, text_hash(f"{kind}:{r}")))
+    return out
+
+
+def run_rule_screening(
+    papers: List[Dict],
+    inclusion: List[str],
+    exclusion: List[str],
+    *,
+    client: Optional[LLMClient] = None,
+    cache: Optional[RuleVerdictCache] = None,
+    batch_size: int = 20,
+    temperature: float = 0.0,
+    require_all_inclusion: bool = True,
+    on_progress: Optional[Callable[[int, int, str], Any]] = None,
+    on_warning: Optional[Callable[[str], Any]] = None,
+) -> Tuple[List[Dict], List[Dict], List[Dict], Dict[str, Any]]:
+    """
+    Returns (included, excluded, unsure, stats).
+
+    Each returned row carries `ai_decision`, `ai_reason`, `ai_matched_rules`
+    and `ai_rule_verdicts` ({"I1": "yes", "E2": "no", ...}).
+    on_progress(done_calls, planned_calls, rule_label) is called after each LLM call.
+    """
+    client = client or LLMClient()
+    cache = cache or RuleVerdictCache()
+    model = client.model
+
+    rules = _rule_list("inclusion", "I", inclusion) + _rule_list("exclusion", "E", exclusion)
+    pids = [canonical_paper_id(r) or f"row:{i}" for i, r in enumerate(papers)]
+
+    # 1) cache lookup per rule; figure out which (rule, paper) pairs are missing
+    verdicts: Dict[str, Dict[str, Dict[str, str]]] = {}
+    todo: List[Tuple[Tuple[str, str, str, str], List[int]]] = []
+    hits = 0
+    for rule in rules:
+        label, _, _, rh = rule
+        cached = cache.get_many(rh, model, pids)
+        verdicts[label] = cached
+        hits += len([p for p in pids if p in cached])
+        missing = [i for i, p in enumerate(pids) if p not in cached]
+        if missing:
+            todo.append((rule, missing))
+
+    planned = sum((len(m) + batch_size - 1) // batch_size for _, m in todo)
+    stats: Dict[str, Any] = {
+        "papers": len(papers),
+        "rules": len(rules),
+        "cached_verdicts": hits,
+        "llm_calls": 0,
+        "planned_calls": planned,
+        "error": None,
+    }
+
+    # 2) one pass per rule with missing verdicts; persist as each batch completes
+    for (label, kind, text, rh), missing in todo:
+        if stats["error"]:
+            break
+        for idx_batch in batched(missing, int(batch_size)):
+            try:
+                res = judge_rule_batch(
+                    client, kind, text, [papers[i] for i in idx_batch],
+                    temperature=temperature, on_warning=on_warning,
+                )
+            except Exception as e:
+                stats["error"] = str(e)
+                break
+            # verdicts the model did not return stay uncached (and missing), so a rerun asks again
+            items = [(pids[i], v["verdict"], v["reason"]) for i, v in zip(idx_batch, res) if not v.get("missing")]
+            cache.put_many(rh, model, items)
+            for pid, v, reason in items:
+                verdicts[label][pid] = {"verdict": v, "reason": reason}
+            stats["llm_calls"] += 1
+            if on_progress:
+                on_progress(stats["llm_calls"], planned, label)
+
+    # 3) compose decisions
+    inc_rules = [r for r in rules if r[1] == "inclusion"]
+    exc_rules = [r for r in rules if r[1] == "exclusion"]
+    out: List[Dict] = []
+    for r, pid in zip(papers, pids):
+        inc_v = [(lbl, verdicts[lbl].get(pid)) for (lbl, _, _, _) in inc_rules]
+        exc_v = [(lbl, verdicts[lbl].get(pid)) for (lbl, _, _, _) in exc_rules]
+        d = compose_rule_decision(inc_v, exc_v, require_all_inclusion=require_all_inclusion)
+        rr = dict(r)
+        rr["ai_decision"] = d["decision"]
+        rr["ai_reason"] = d["reason"]
+        rr["ai_matched_rules"] = d["matched_rules"]
+        rr["ai_rule_verdicts"] = {lbl: (v or {}).get("verdict", "missing") for lbl, v in inc_v + exc_v}
+        out.append(rr)
+
+    inc, exc, unsure = split_by_decision(out)
+    return inc, exc, unsure, stats
@@ -0,0 +1,99 @@
+# slr/store/checkpoints.py
+"""
+Checkpoints for long per-paper LLM runs (c02 screening, c03 quality scoring).
+
+Each completed paper result is written as soon as its batch finishes, keyed
+by (run id, canonical paper id). A run id is derived from the stage and its
+settings (policy, checklist, model, temperature, ...) but not from the paper
+list, so re-running the same configuration resumes: only papers without a
+stored result are sent to the LLM again, including papers added later.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from slr.store.db import connect
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id     TEXT PRIMARY KEY,
+        kind       TEXT NOT NULL,
+        settings   TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS run_results (
+        run_id   TEXT NOT NULL,
+        paper_id TEXT NOT NULL,
+        result   TEXT NOT NULL,
+        saved_at REAL NOT NULL,
+        PRIMARY KEY (run_id, paper_id)
+    )
+    """,
+]
+
+
+def run_id_for(kind: str, settings: Dict[str, Any]) -> str:
+    blob = json.dumps({"kind": kind, "settings": settings}, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{kind}-" + hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+
+class CheckpointStore:
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._conn = connect("checkpoints.sqlite", path=path)
+        with self._lock:
+            for stmt in _SCHEMA:
+                self._conn.execute(stmt)
+            self._conn.commit()
+
+    def open_run(self, run_id: str, kind: str, settings: Dict[str, Any], fresh: bool = False) -> None:
+        """Register a run; `fresh=True` drops results saved under this run id."""
+        now = time.time()
+        with self._lock:
+            if fresh:
+                self._conn.execute("DELETE FROM run_results WHERE run_id=?", (run_id,))
+            self._conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, kind, settings, created_at, updated_at) VALUES (?,?,?,?,?)",
+                (run_id, kind, json.dumps(settings, ensure_ascii=False, default=str), now, now),
+            )
+            self._conn.commit()
+
+    def load(self, run_id: str, paper_ids: Iterable[str]) -> Dict[str, Any]:
+        """Saved results for the given papers: {paper_id: result}."""
+        ids = list(dict.fromkeys(p for p in paper_ids if p))
+        out: Dict[str, Any] = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                q = (
+                    "SELECT paper_id, result FROM run_results "
+                    f"WHERE run_id=? AND paper_id IN ({','.join('?' * len(chunk))})"
+                )
+                for row in self._conn.execute(q, [run_id, *chunk]):
+                    out[row["paper_id"]] = json.loads(row["result"])
+        return out
+
+    def save_many(self, run_id: str, items: List[Tuple[str, Any]]) -> None:
+        """items: [(paper_id, result), ...] — committed immediately."""
+        now = time.time()
+        rows = [(run_id, pid, json.dumps(res, ensure_ascii=False), now) for pid, res in items if pid]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO run_results (run_id, paper_id, result, saved_at) VALUES (?,?,?,?)",
+                rows,
+            )
+            self._conn.execute("UPDATE runs SET updated_at=? WHERE run_id=?", (now, run_id))
+            self._conn.commit()
+
+    def count(self, run_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) AS n FROM run_results WHERE run_id=?", (run_id,)).fetchone()
+        return int(row["n"]) if row else 0
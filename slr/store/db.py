@@ -0,0 +1,21 @@
+# slr/store/db.py
+"""Small SQLite helper shared by the on-disk stores."""
+import sqlite3
+from typing import Optional
+
+from slr.store.paths import data_path
+
+
+def connect(name: str, path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open (or create) a SQLite database below the data root.
+
+    Connections may be shared between threads (callers serialize writes with
+    their own lock); WAL mode lets readers in other processes proceed while a
+    writer is active.
+    """
+    conn = sqlite3.connect(path or data_path(name), timeout=30.0, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,209 @@
+# slr/store/embeddings.py
+"""
+Persistent embedding store, one per model.
+
+Vectors are kept as float16 rows in a flat memory-mapped file
+(<data root>/embeddings/<model>/vectors.f16); a SQLite index maps
+text_hash(normalized text) -> row. Reopening a project therefore needs no
+re-encoding, and every page, job worker and pipeline process shares the same
+vectors.
+
+Appends are serialized across processes with a SQLite write transaction:
+vectors are written past the committed row count first, the index rows are
+committed afterwards, so readers never see an index entry for an unwritten
+vector. A crashed writer only leaves an uncommitted tail that the next
+writer overwrites.
+
+    store = get_embedding_store("sentence-transformers/all-MiniLM-L6-v2")
+    X = store.encode(texts, encode_fn)     # hits from disk, misses in one encode_fn call
+"""
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from slr.store.db import connect
+from slr.store.keys import text_hash
+from slr.store.paths import data_dir
+
+EncodeFn = Callable[[Sequence[str]], np.ndarray]
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS vectors (text_hash TEXT PRIMARY KEY, row INTEGER NOT NULL)",
+]
+
+
+def _model_dir_name(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name).strip("_") or "default"
+
+
+class EmbeddingStore:
+    def __init__(self, model_name: str, root: Optional[str] = None):
+        self.model_name = model_name
+        self.root = root or data_dir("embeddings", _model_dir_name(model_name))
+        os.makedirs(self.root, exist_ok=True)
+        self.vec_path = os.path.join(self.root, "vectors.f16")
+        self._lock = threading.Lock()
+        self._conn = connect("index.sqlite", path=os.path.join(self.root, "index.sqlite"))
+        with self._lock:
+            for stmt in _SCHEMA:
+                self._conn.execute(stmt)
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('model', ?)", (model_name,))
+            self._conn.commit()
+        self._mm: Optional[np.memmap] = None
+        self._mm_rows = 0
+
+    # ----------------------------- meta -----------------------------
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    @property
+    def dim(self) -> Optional[int]:
+        with self._lock:
+            v = self._meta("dim")
+        return int(v) if v else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            v = self._meta("rows")
+        return int(v or 0)
+
+    # ----------------------------- reads -----------------------------
+    def _matrix(self, need_rows: int, dim: int) -> np.memmap:
+        """Read-only map covering at least `need_rows` rows (re-mapped when the file grew)."""
+        with self._lock:
+            if self._mm is None or self._mm_rows < need_rows:
+                rows = int(self._meta("rows") or 0)
+                self._mm = np.memmap(self.vec_path, dtype=np.float16, mode="r", shape=(rows, dim))
+                self._mm_rows = rows
+            return self._mm
+
+    def lookup(self, texts: Sequence[str]) -> Tuple[Dict[int, int], int]:
+        """
+        Map input positions to stored rows: ({i: row}, dim). Positions whose
+        text is not stored are missing from the dict.
+        """
+        hashes = [text_hash(t) for t in texts]
+        uniq = list(dict.fromkeys(hashes))
+        found: Dict[str, int] = {}
+        with self._lock:
+            dim = int(self._meta("dim") or 0)
+            for i in range(0, len(uniq), 500):
+                chunk = uniq[i:i + 500]
+                q = f"SELECT text_hash, row FROM vectors WHERE text_hash IN ({','.join('?' * len(chunk))})"
+                for r in self._conn.execute(q, chunk):
+                    found[r["text_hash"]] = int(r["row"])
+        return {i: found[h] for i, h in enumerate(hashes) if h in found}, dim
+
+    def get(self, texts: Sequence[str]) -> Tuple[np.ndarray, List[int]]:
+        """(float32 matrix with zero rows for misses, positions of the misses)."""
+        rows, dim = self.lookup(texts)
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+        if rows:
+            idx = np.fromiter(rows.keys(), dtype=np.int64, count=len(rows))
+            src = np.fromiter(rows.values(), dtype=np.int64, count=len(rows))
+            mm = self._matrix(int(src.max()) + 1, dim)
+            out[idx] = mm[src].astype(np.float32)
+        return out, [i for i in range(len(texts)) if i not in rows]
+
+    # ----------------------------- writes -----------------------------
+    def put(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        """Append vectors for texts not stored yet (first writer wins)."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(texts):
+            return
+        if vectors.ndim != 2 or vectors.shape[0] != len(texts):
+            raise ValueError(f"expected ({len(texts)}, dim) vectors, got {vectors.shape}")
+        pending: Dict[str, int] = {}
+        for i, t in enumerate(texts):
+            pending.setdefault(text_hash(t), i)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # cross-process writer lock
+            try:
+                dim = int(self._meta("dim") or 0)
+                if not dim:
+                    dim = int(vectors.shape[1])
+                    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(dim),))
+                elif dim != vectors.shape[1]:
+                    raise ValueError(f"store for {self.model_name} has dim {dim}, got {vectors.shape[1]}")
+
+                hashes = list(pending)
+                for i in range(0, len(hashes), 500):
+                    chunk = hashes[i:i + 500]
+                    q = f"SELECT text_hash FROM vectors WHERE text_hash IN ({','.join('?' * len(chunk))})"
+                    for r in self._conn.execute(q, chunk):
+                        pending.pop(r["text_hash"], None)
+                if not pending:
+                    self._conn.rollback()
+                    return
+
+                start = int(self._meta("rows") or 0)
+                block = vectors[list(pending.values())].astype(np.float16)
+                if not os.path.exists(self.vec_path):
+                    open(self.vec_path, "wb").close()
+                with open(self.vec_path, "r+b") as f:
+                    f.seek(start * dim * 2)
+                    f.write(block.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._conn.executemany(
+                    "INSERT INTO vectors (text_hash, row) VALUES (?, ?)",
+                    [(h, start + k) for k, h in enumerate(pending)],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('rows', ?)", (str(start + len(pending)),)
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def encode(self, texts: Sequence[str], encode_fn: EncodeFn) -> np.ndarray:
+        """
+        Vectors for all texts as float32 (n, dim). Stored texts are read from
+        disk; the misses (de-duplicated) go to `encode_fn` in a single call and
+        are stored for next time.
+        """
+        texts = list(texts)
+        if not texts:
+            dim = self.dim or 0
+            return np.zeros((0, dim), dtype=np.float32)
+        out, missing = self.get(texts)
+        if not missing:
+            return out
+
+        todo: Dict[str, int] = {}
+        for i in missing:
+            todo.setdefault(text_hash(texts[i]), i)
+        fresh_texts = [texts[i] for i in todo.values()]
+        fresh = np.asarray(encode_fn(fresh_texts), dtype=np.float32)
+        self.put(fresh_texts, fresh)
+        # same float16 rounding as vectors read back later, so results do not depend on cache state
+        fresh = fresh.astype(np.float16).astype(np.float32)
+
+        if out.shape[1] != fresh.shape[1]:
+            # empty store: nothing was a hit
+            out = np.zeros((len(texts), fresh.shape[1]), dtype=np.float32)
+        by_hash = {h: fresh[k] for k, h in enumerate(todo)}
+        for i in missing:
+            out[i] = by_hash[text_hash(texts[i])]
+        return out
+
+
+_STORES: Dict[str, EmbeddingStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_embedding_store(model_name: str) -> EmbeddingStore:
+    """One store object per model and process."""
+    with _STORES_LOCK:
+        store = _STORES.get(model_name)
+        if store is None:
+            store = EmbeddingStore(model_name)
+            _STORES[model_name] = store
+    return store
@@ -0,0 +1,138 @@
+# slr/store/exports.py
+"""
+Streaming exports of paper lists: CSV, JSON, JSONL and Parquet.
+
+Rows come from any iterable (a session list, a generator over the project
+store) and are written to a file in chunks, so an export never exists as
+one Python string. CSV and Parquet use a flat table given by `header` and
+`to_row(row) -> [values]`; JSON and JSONL write the rows as they are.
+
+    path = export_to_temp(rows, "csv", header=COLS, to_row=csv_row)
+"""
+import csv
+import importlib.util
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from slr.store.paths import data_dir
+
+FORMATS = ("csv", "json", "jsonl", "parquet")
+MIME = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+CHUNK_ROWS = 1000
+
+Row = Dict[str, Any]
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def available_formats(formats: Iterable[str] = FORMATS) -> List[str]:
+    return [f for f in formats if f != "parquet" or parquet_available()]
+
+
+def _chunks(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    chunk: List[Row] = []
+    for r in rows:
+        chunk.append(r)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _flat(header: Optional[List[str]], to_row: Optional[Callable[[Row], List[Any]]], first: Optional[Row]):
+    header = list(header or (first or {}).keys())
+    return header, to_row or (lambda r: [r.get(c, "") for c in header])
+
+
+def _cell(v: Any) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, (list, tuple)):
+        return ", ".join(map(str, v))
+    if isinstance(v, dict):
+        return json.dumps(v, ensure_ascii=False)
+    return str(v)
+
+
+def write_export(
+    rows: Iterable[Row],
+    path: str,
+    fmt: str,
+    header: Optional[List[str]] = None,
+    to_row: Optional[Callable[[Row], List[Any]]] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> int:
+    """Write `rows` to `path` in format `fmt`; returns the number of rows written."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    n = 0
+    it = iter(rows)
+    first = next(it, None)
+    rows = it if first is None else _prepend(first, it)
+
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        header, to_row = _flat(header, to_row, first)
+        schema = pa.schema([(c, pa.string()) for c in header])
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in _chunks(rows, chunk_rows):
+                cols = list(zip(*[[_cell(v) for v in to_row(r)] for r in chunk]))
+                writer.write_table(pa.Table.from_arrays([pa.array(c, pa.string()) for c in cols], schema=schema))
+                n += len(chunk)
+        return n
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            header, to_row = _flat(header, to_row, first)
+            w = csv.writer(f)
+            w.writerow(header)
+            for chunk in _chunks(rows, chunk_rows):
+                w.writerows([[_cell(v) for v in to_row(r)] for r in chunk])
+                n += len(chunk)
+        elif fmt == "jsonl":
+            for chunk in _chunks(rows, chunk_rows):
+                f.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in chunk))
+                n += len(chunk)
+        else:  # json: same layout as json.dumps(rows, indent=2), written row by row
+            f.write("[")
+            for chunk in _chunks(rows, chunk_rows):
+                for r in chunk:
+                    body = json.dumps(r, ensure_ascii=False, indent=2, default=str).replace("\n", "\n  ")
+                    f.write(("," if n else "") + "\n  " + body)
+                    n += 1
+            f.write("\n]" if n else "]")
+    return n
+
+
+def _prepend(first: Row, rest: Iterator[Row]) -> Iterator[Row]:
+    yield first
+    yield from rest
+
+
+def export_to_temp(
+    rows: Iterable[Row],
+    fmt: str,
+    header: Optional[List[str]] = None,
+    to_row: Optional[Callable[[Row], List[Any]]] = None,
+) -> str:
+    """Write the export to a new file below <data root>/exports and return its path (caller removes it)."""
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}", dir=data_dir("exports"))
+    os.close(fd)
+    try:
+        write_export(rows, path, fmt, header=header, to_row=to_row)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
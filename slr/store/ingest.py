@@ -0,0 +1,177 @@
+# slr/store/ingest.py
+"""
+Streaming ingest of uploaded paper lists (CSV, JSON array, JSONL).
+
+Uploads are parsed incrementally and every row is normalized as it is read,
+so a large harvest export goes into the project store (slr/store/project.py)
+chunk by chunk instead of as a decoded string plus a parsed copy:
+
+- CSV     csv.DictReader over a text stream
+- JSONL   one object per line
+- JSON    a top-level array, item by item (ijson when installed, else an
+          incremental json.JSONDecoder.raw_decode loop)
+
+    stats = ingest(uploaded_file, uploaded_file.name, get_project_store(), "gathered_rows")
+"""
+import codecs
+import csv
+import importlib.util
+import io
+import json
+import os
+import sys
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+READ_BYTES = 1 << 16
+
+Row = Dict[str, Any]
+
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))  # abstracts and author lists can be long
+
+
+class IngestError(ValueError):
+    pass
+
+
+def detect_format(name: str) -> str:
+    ext = os.path.splitext(name or "")[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if ext == ".json":
+        return "json"
+    return "csv"
+
+
+# ----------------------------- readers -----------------------------
+def iter_csv(f: BinaryIO) -> Iterator[Row]:
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        text.detach()  # leave the caller's file open
+
+
+def iter_jsonl(f: BinaryIO) -> Iterator[Row]:
+    for n, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise IngestError(f"line {n}: {e.msg}") from e
+
+
+def iter_json_array(f: BinaryIO) -> Iterator[Any]:
+    """Items of a top-level JSON array, without reading the whole document."""
+    if importlib.util.find_spec("ijson") is not None:
+        import ijson
+
+        yield from ijson.items(f, "item")
+        return
+
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buf, pos, eof = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        block = f.read(READ_BYTES)
+        eof = not block
+        buf = buf[pos:] + utf8.decode(block or b"", final=eof)
+        pos = 0
+        return not eof
+
+    def skip_ws() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or not fill():
+                return buf[pos] if pos < len(buf) else ""
+
+    if skip_ws() != "[":
+        raise IngestError("expected a JSON array of papers")
+    pos += 1
+    first = True
+    while True:
+        c = skip_ws()
+        if c == "]":
+            return
+        if not first:
+            if c != ",":
+                raise IngestError(f"expected ',' or ']' in the JSON array, got {c!r}")
+            pos += 1
+            skip_ws()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                # a number or literal cut at the buffer end would decode short; make sure it is complete
+                if end == len(buf) and not eof:
+                    raise json.JSONDecodeError("truncated", buf, end)
+                break
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise IngestError(f"invalid JSON: {e.msg}") from e
+                fill()
+        pos = end
+        first = False
+        yield item
+
+
+# ----------------------------- normalization -----------------------------
+def _split_authors(v: Any) -> List[str]:
+    if isinstance(v, list):
+        return [str(a.get("name", "") if isinstance(a, dict) else a).strip() for a in v if a]
+    sep = ";" if ";" in str(v or "") else ","
+    return [a.strip() for a in str(v or "").split(sep) if a.strip()]
+
+
+def normalize_row(r: Any) -> Optional[Row]:
+    """
+    Canonical paper row (id, title, summary, published, updated, authors, category,
+    link, plus any other columns), or None when the row has neither a title nor an id.
+    """
+    if not isinstance(r, dict):
+        return None
+    row = {str(k).strip(): v for k, v in r.items() if k is not None}
+    for k, v in row.items():
+        if isinstance(v, str):
+            row[k] = v.strip()
+    out: Row = {
+        "id": row.get("id") or row.get("arxiv_id") or row.get("doi") or "",
+        "title": " ".join(str(row.get("title") or "").split()),
+        "summary": row.get("summary") or row.get("abstract") or "",
+        "published": row.get("published") or str(row.get("year") or ""),
+        "updated": row.get("updated") or "",
+        "authors": _split_authors(row.get("authors")),
+        "category": row.get("category") or "",
+        "link": row.get("link") or row.get("url") or "",
+    }
+    for k, v in row.items():
+        out.setdefault(k, v)
+    if not out["title"] and not out["id"]:
+        return None
+    return out
+
+
+def iter_upload(f: BinaryIO, name: str, stats: Optional[Dict[str, Any]] = None) -> Iterator[Row]:
+    """Normalized rows of an uploaded file; `stats` counts read / skipped rows as they stream."""
+    fmt = detect_format(name)
+    stats = stats if stats is not None else {}
+    stats.update(format=fmt, rows=0, skipped=0)
+    reader = {"csv": iter_csv, "jsonl": iter_jsonl, "json": iter_json_array}[fmt]
+    for raw in reader(f):
+        row = normalize_row(raw)
+        if row is None:
+            stats["skipped"] += 1
+            continue
+        stats["rows"] += 1
+        yield row
+
+
+def ingest(f: BinaryIO, name: str, store: Any, list_name: str) -> Dict[str, Any]:
+    """Stream an upload into `store` as list `list_name`; returns {"format", "rows", "skipped"}."""
+    stats: Dict[str, Any] = {}
+    store.put_rows(list_name, iter_upload(f, name, stats))
+    return stats
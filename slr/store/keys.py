@@ -0,0 +1,50 @@
+# slr/store/keys.py
+"""
+Stable keys for papers and texts.
+
+- canonical_paper_id(row) -> "arxiv:2101.00001" | "doi:10.1/x" | "title:<sha1>"
+- text_hash(text) -> sha1 hex of the whitespace/case-normalized text
+"""
+import hashlib
+import re
+from typing import Dict
+
+_ARXIV_RE = re.compile(r"arxiv\.org/(?:abs|pdf)/([^\s?#]+?)(?:v\d+)?(?:\.pdf)?$", re.IGNORECASE)
+_ARXIV_BARE_RE = re.compile(r"^(?:arxiv:)?(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?$", re.IGNORECASE)
+_DOI_RE = re.compile(r"(10\.\d{4,9}/\S+)", re.IGNORECASE)
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WS.sub(" ", (text or "").strip()).lower()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _norm_title(t: str) -> str:
+    t = (t or "").lower()
+    t = re.sub(r"[^a-z0-9\s]", " ", t)
+    return re.sub(r"\s+", " ", t).strip()
+
+
+def canonical_paper_id(r: Dict) -> str:
+    """Version-free arXiv id, else DOI, else a hash of the normalized title."""
+    for field in ("id", "arxiv_id", "link", "url", "pdf_url"):
+        s = str(r.get(field) or "").strip()
+        if not s:
+            continue
+        m = _ARXIV_RE.search(s) or _ARXIV_BARE_RE.match(s)
+        if m:
+            return f"arxiv:{m.group(1).lower()}"
+    for field in ("doi", "id", "link", "url"):
+        s = str(r.get(field) or "").strip()
+        m = _DOI_RE.search(s)
+        if m:
+            return f"doi:{m.group(1).lower().rstrip('.')}"
+    title = _norm_title(str(r.get("title") or ""))
+    if title:
+        return "title:" + hashlib.sha1(title.encode("utf-8")).hexdigest()[:16]
+    s = str(r.get("id") or "").strip()
+    return f"id:{s}" if s else ""
@@ -0,0 +1,226 @@
+# slr/store/memo.py
+"""
+In-process memo for pipeline stages, keyed on content hashes.
+
+Streamlit reruns a page top to bottom on every widget change. Pages run their
+pure stages (dedup, filters, policy text, quality buckets, previews) through
+`get_memo().run(stage, fn, *args)`; the result is reused for as long as the
+stage, the function and the content of the arguments are the same.
+
+- keys: sha1 over the arguments (slr.store.project.fingerprint). Lists the
+  memo returned, and lists registered with a known fingerprint (project_state
+  does this for the row lists it loads and saves), are keyed without being
+  re-hashed, so a rerun with unchanged inputs does not depend on corpus size
+- results are shared, not copied: treat them and registered lists as
+  read-only and build a new list to change one
+- None results are not cached
+- least recently used entries are dropped beyond max_bytes (estimated size,
+  $SLR_MEMO_MB, default 256)
+- stats() gives hits / misses / compute time per stage
+
+    deduped, dropped = get_memo().run("dedup", perform_dedup, rows, key, rule)
+"""
+import hashlib
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from slr.store.project import fingerprint
+
+MEMO_ENV = "SLR_MEMO_MB"
+DEFAULT_MAX_MB = 256
+MAX_KNOWN = 256  # registered lists that are not memo results
+_SAMPLE = 32
+
+
+def approx_size(value: Any, shared: Optional[Set[int]] = None) -> int:
+    """
+    Rough deep size in bytes; large containers are sampled. Objects whose id is
+    in `shared` (rows passed through from the arguments) count as a pointer.
+    """
+    if shared and id(value) in shared:
+        return 8
+    if isinstance(value, str):
+        return 50 + len(value)
+    if isinstance(value, (list, tuple)):
+        n = len(value)
+        if not n:
+            return 64
+        part = value[:: max(1, n // _SAMPLE)][:_SAMPLE]
+        return 64 + 8 * n + sum(approx_size(v, shared) for v in part) * n // len(part)
+    if isinstance(value, dict):
+        n = len(value)
+        if not n:
+            return 64
+        part = list(itertools.islice(value.items(), _SAMPLE))
+        return 64 + 100 * n + sum(approx_size(k) + approx_size(v, shared) for k, v in part) * n // len(part)
+    return sys.getsizeof(value)
+
+
+class StageMemo:
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or int(float(os.getenv(MEMO_ENV) or DEFAULT_MAX_MB) * 1e6)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        # id(obj) -> [obj, key, fingerprint or None, owning entry key or ""]
+        self._known: "OrderedDict[int, List[Any]]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    # ----------------------------- keys -----------------------------
+    def register(self, value: Any, fp: str) -> None:
+        """Mark `value` (a list that will not be mutated) as having content fingerprint `fp`."""
+        if not isinstance(value, list):
+            return
+        with self._lock:
+            known = self._known.get(id(value))
+            if known is not None and known[0] is value:  # keep its key so downstream memo keys stay stable
+                known[2] = known[2] or fp
+                return
+            self._known[id(value)] = [value, fp, fp, ""]
+            loose = [k for k, v in self._known.items() if not v[3]]
+            for k in loose[:max(0, len(loose) - MAX_KNOWN)]:
+                del self._known[k]
+
+    def _lookup(self, value: Any) -> Optional[List[Any]]:
+        with self._lock:
+            known = self._known.get(id(value))
+            if known is None or known[0] is not value:
+                return None
+            self._known.move_to_end(id(value))
+            return known
+
+    def key_of(self, value: Any) -> str:
+        """Content key of an argument."""
+        known = self._lookup(value)
+        if known is not None:
+            return known[1]
+        if isinstance(value, dict):
+            h = hashlib.sha1(b"dict")
+            for k in sorted(value, key=str):
+                h.update(repr(k).encode() + b"=" + self.key_of(value[k]).encode() + b"\n")
+            return h.hexdigest()
+        if isinstance(value, tuple):
+            h = hashlib.sha1(b"tuple")
+            for v in value:
+                h.update(self.key_of(v).encode() + b"\n")
+            return h.hexdigest()
+        return fingerprint(value)
+
+    def fingerprint(self, value: Any) -> str:
+        """fingerprint(value), reused for memo results and registered lists."""
+        known = self._lookup(value)
+        if known is None:
+            return fingerprint(value)
+        if known[2] is None:
+            known[2] = fingerprint(value)
+        return known[2]
+
+    # ----------------------------- calls -----------------------------
+    def run(self, stage: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        key = hashlib.sha1(
+            "\n".join([stage, f"{fn.__module__}.{fn.__qualname__}",
+                       self.key_of(args), self.key_of(kwargs)]).encode()
+        ).hexdigest()
+        with self._lock:
+            s = self._stats.setdefault(stage, {"hits": 0, "misses": 0, "seconds": 0.0, "last_seconds": 0.0, "saved_seconds": 0.0})
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                s["hits"] += 1
+                s["saved_seconds"] += entry["seconds"]
+                return entry["value"]
+
+        t0 = time.perf_counter()
+        value = fn(*args, **kwargs)
+        took = time.perf_counter() - t0
+        with self._lock:
+            s["misses"] += 1
+            s["seconds"] += took
+            s["last_seconds"] = took
+            if value is None or key in self._entries:
+                return value
+            size = approx_size(value, self._shared(args, kwargs))
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = {"value": value, "seconds": took, "bytes": size, "stage": stage}
+            self._bytes += size
+            for i, part in enumerate(self._parts(value)):
+                known = self._known.get(id(part))
+                if known is None or known[0] is not part:  # a list passed through keeps its first key
+                    self._known[id(part)] = [part, f"{key}:{i}", None, key]
+            while self._bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+        return value
+
+    @classmethod
+    def _shared(cls, args: tuple, kwargs: Dict[str, Any]) -> Set[int]:
+        ids: Set[int] = set()
+        for v in (*args, *kwargs.values()):
+            for part in cls._parts(v):
+                ids.update(map(id, part))
+        return ids
+
+    @staticmethod
+    def _parts(value: Any) -> List[Any]:
+        """Lists inside a result that later stages may receive as arguments."""
+        if isinstance(value, list):
+            return [value]
+        items = value.values() if isinstance(value, dict) else value if isinstance(value, tuple) else ()
+        return [v for v in items if isinstance(v, list)]
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry["bytes"]
+        for part in self._parts(entry["value"]):
+            known = self._known.get(id(part))
+            if known is not None and known[3] == key:
+                del self._known[id(part)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._known.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {k: dict(v) for k, v in self._stats.items()}
+            for entry in self._entries.values():
+                s = stages[entry["stage"]]
+                s["entries"] = s.get("entries", 0) + 1
+                s["bytes"] = s.get("bytes", 0) + entry["bytes"]
+            return {"stages": stages, "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    def timing_rows(self, stages: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """One row per stage for a small table: calls, cache hits, compute time."""
+        out = []
+        for name, s in self.stats()["stages"].items():
+            if stages is not None and name not in stages:
+                continue
+            out.append({
+                "stage": name,
+                "computed": int(s["misses"]),
+                "reused": int(s["hits"]),
+                "last compute (ms)": round(s["last_seconds"] * 1000, 1),
+                "time saved (s)": round(s["saved_seconds"], 2),
+                "cached MB": round(s.get("bytes", 0) / 1e6, 1),
+            })
+        return out
+
+
+_MEMO: Optional[StageMemo] = None
+_MEMO_LOCK = threading.Lock()
+
+
+def get_memo() -> StageMemo:
+    """One memo per process, shared by every browser session (keys are content hashes)."""
+    global _MEMO
+    with _MEMO_LOCK:
+        if _MEMO is None:
+            _MEMO = StageMemo()
+    return _MEMO
@@ -0,0 +1,28 @@
+# slr/store/paths.py
+"""
+Where on-disk project data lives.
+
+Everything persistent (caches, checkpoints, stores) goes below one directory:
+$SLR_DATA_DIR if set, otherwise ./.slr in the current working directory.
+"""
+import os
+
+DATA_DIR_ENV = "SLR_DATA_DIR"
+
+
+def data_root() -> str:
+    return os.path.abspath(os.getenv(DATA_DIR_ENV) or os.path.join(os.getcwd(), ".slr"))
+
+
+def data_path(*parts: str) -> str:
+    """Join `parts` below the data root, creating the parent directory."""
+    path = os.path.join(data_root(), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def data_dir(*parts: str) -> str:
+    """Join `parts` below the data root and make sure the directory exists."""
+    path = os.path.join(data_root(), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,96 @@
+# slr/store/pdf_text.py
+"""
+Page-level text of stored PDFs.
+
+One row per (PDF sha256, extractor settings, page). The settings string names
+the extractor, its version and options such as max_pages, so changing any of
+them re-extracts instead of serving stale text. A document row records that
+a PDF was processed (also when it failed or had no text layer), so broken
+files are not parsed again on every run.
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from slr.store.db import connect
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS pdf_docs (
+        sha256     TEXT NOT NULL,
+        settings   TEXT NOT NULL,
+        pages      INTEGER NOT NULL,
+        error      TEXT NOT NULL DEFAULT '',
+        created_at REAL NOT NULL,
+        PRIMARY KEY (sha256, settings)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pdf_pages (
+        sha256   TEXT NOT NULL,
+        settings TEXT NOT NULL,
+        page     INTEGER NOT NULL,
+        text     TEXT NOT NULL,
+        PRIMARY KEY (sha256, settings, page)
+    )
+    """,
+]
+
+
+class PdfTextCache:
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._conn = connect("pdf_text.sqlite", path=path)
+        with self._lock:
+            for stmt in _SCHEMA:
+                self._conn.execute(stmt)
+            self._conn.commit()
+
+    def get_many(self, shas: Iterable[str], settings: str) -> Dict[str, List[str]]:
+        """{sha256: [page texts]} for processed PDFs only (failed ones map to [])."""
+        uniq = list(dict.fromkeys(s for s in shas if s))
+        out: Dict[str, List[str]] = {}
+        with self._lock:
+            for i in range(0, len(uniq), 500):
+                chunk = uniq[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                q = f"SELECT sha256, pages FROM pdf_docs WHERE settings=? AND sha256 IN ({marks})"
+                for r in self._conn.execute(q, [settings, *chunk]):
+                    out[r["sha256"]] = [""] * int(r["pages"])
+                q = f"SELECT sha256, page, text FROM pdf_pages WHERE settings=? AND sha256 IN ({marks})"
+                for r in self._conn.execute(q, [settings, *chunk]):
+                    pages = out.get(r["sha256"])
+                    if pages is not None and r["page"] < len(pages):
+                        pages[r["page"]] = r["text"]
+        return out
+
+    def put(self, sha: str, settings: str, pages: List[str], error: str = "") -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pdf_pages WHERE sha256=? AND settings=?", (sha, settings))
+            self._conn.executemany(
+                "INSERT INTO pdf_pages (sha256, settings, page, text) VALUES (?,?,?,?)",
+                [(sha, settings, k, t) for k, t in enumerate(pages)],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdf_docs (sha256, settings, pages, error, created_at) VALUES (?,?,?,?,?)",
+                (sha, settings, len(pages), error or "", time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pdf_pages")
+            self._conn.execute("DELETE FROM pdf_docs")
+            self._conn.commit()
+
+
+_CACHE: Optional[PdfTextCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_pdf_text_cache() -> PdfTextCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = PdfTextCache()
+    return _CACHE
@@ -0,0 +1,191 @@
+# slr/store/pdfs.py
+"""
+Content-addressed PDF store shared by all pages and jobs.
+
+Files live at <data root>/pdfs/objects/<sha[:2]>/<sha256>.pdf, so the same
+PDF reached from two papers or two pages is stored once. A SQLite index maps
+canonical_paper_id -> sha256 (plus source URL). Pages keep only paper ids in
+st.session_state and ask the store for paths or memory-mapped views, so
+session memory does not grow with the number of PDFs.
+
+    pdfs = get_pdf_store()
+    pdfs.add_file(canonical_paper_id(row), downloaded_path, url=url)
+    path = pdfs.path(pid)                 # or None
+    with pdfs.view(pid) as mm: ...        # read-only mmap (file-like, supports the buffer protocol)
+"""
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence
+
+from slr.store.db import connect
+from slr.store.paths import data_dir
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS blobs (
+        sha256     TEXT PRIMARY KEY,
+        size       INTEGER NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS papers (
+        paper_id   TEXT PRIMARY KEY,
+        sha256     TEXT NOT NULL,
+        url        TEXT NOT NULL DEFAULT '',
+        added_at   REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS papers_sha ON papers (sha256)",
+]
+
+_READ_BYTES = 1 << 20
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_BYTES), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PdfStore:
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or data_dir("pdfs")
+        self.objects = os.path.join(self.root, "objects")
+        os.makedirs(self.objects, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = connect("index.sqlite", path=os.path.join(self.root, "index.sqlite"))
+        with self._lock:
+            for stmt in _SCHEMA:
+                self._conn.execute(stmt)
+            self._conn.commit()
+
+    def blob_path(self, sha: str) -> str:
+        return os.path.join(self.objects, sha[:2], f"{sha}.pdf")
+
+    # ----------------------------- writes -----------------------------
+    def add_file(self, paper_id: str, src: str, url: str = "", move: bool = True) -> str:
+        """
+        Store the file at `src` for `paper_id` and return its sha256. With
+        move=True the source file is consumed (renamed into the store, or
+        deleted when the content is already stored).
+        """
+        sha = sha256_file(src)
+        dst = self.blob_path(sha)
+        if os.path.exists(dst):
+            if move:
+                os.remove(src)
+        else:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+            if move:
+                shutil.move(src, tmp)
+            else:
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)  # atomic: readers see the whole file or nothing
+        self._index(paper_id, sha, os.path.getsize(dst), url)
+        return sha
+
+    def add_bytes(self, paper_id: str, data: bytes, url: str = "") -> str:
+        fd, tmp = tempfile.mkstemp(suffix=".pdf", dir=self.objects)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return self.add_file(paper_id, tmp, url=url, move=True)
+
+    def _index(self, paper_id: str, sha: str, size: int, url: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (sha256, size, created_at) VALUES (?,?,?)", (sha, int(size), now)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO papers (paper_id, sha256, url, added_at) VALUES (?,?,?,?)",
+                (paper_id, sha, url or "", now),
+            )
+            self._conn.commit()
+
+    def remove(self, paper_id: str) -> None:
+        """Drop the paper's index entry (the blob stays; other papers may share it)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM papers WHERE paper_id=?", (paper_id,))
+            self._conn.commit()
+
+    # ----------------------------- reads -----------------------------
+    def sha(self, paper_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM papers WHERE paper_id=?", (paper_id,)).fetchone()
+        return row["sha256"] if row else None
+
+    def shas(self, paper_ids: Sequence[str]) -> Dict[str, str]:
+        """{paper_id: sha256} for the ids that have a PDF (one query per 500 ids)."""
+        uniq = list(dict.fromkeys(p for p in paper_ids if p))
+        out: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(uniq), 500):
+                chunk = uniq[i:i + 500]
+                q = f"SELECT paper_id, sha256 FROM papers WHERE paper_id IN ({','.join('?' * len(chunk))})"
+                for r in self._conn.execute(q, chunk):
+                    out[r["paper_id"]] = r["sha256"]
+        return out
+
+    def path(self, paper_id: str) -> Optional[str]:
+        sha = self.sha(paper_id)
+        if not sha:
+            return None
+        p = self.blob_path(sha)
+        return p if os.path.exists(p) else None
+
+    def paths(self, paper_ids: Sequence[str]) -> Dict[str, str]:
+        return {pid: self.blob_path(sha) for pid, sha in self.shas(paper_ids).items()
+                if os.path.exists(self.blob_path(sha))}
+
+    def has(self, paper_id: str) -> bool:
+        return self.path(paper_id) is not None
+
+    def read_bytes(self, paper_id: str) -> Optional[bytes]:
+        p = self.path(paper_id)
+        if not p:
+            return None
+        with open(p, "rb") as f:
+            return f.read()
+
+    @contextmanager
+    def view(self, paper_id: str) -> Iterator[Optional[mmap.mmap]]:
+        """Read-only memory map of the paper's PDF (None if there is none)."""
+        p = self.path(paper_id)
+        if not p or not os.path.getsize(p):
+            yield None
+            return
+        with open(p, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mm
+            finally:
+                mm.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            papers = self._conn.execute("SELECT COUNT(*) AS n FROM papers").fetchone()["n"]
+            row = self._conn.execute("SELECT COUNT(*) AS n, COALESCE(SUM(size), 0) AS b FROM blobs").fetchone()
+        return {"papers": int(papers), "files": int(row["n"]), "bytes": int(row["b"])}
+
+
+_STORE: Optional[PdfStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_pdf_store() -> PdfStore:
+    """One store object per process."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = PdfStore()
+    return _STORE
@@ -0,0 +1,326 @@
+# slr/store/project.py
+"""
+Durable project store: the review's data outside st.session_state.
+
+One SQLite file per project (<data root>/projects/<name>.sqlite) with typed
+tables:
+
+- records    one row per paper (canonical_paper_id), as first seen
+- decisions  ordered paper lists per stage (harvest, screening, quality)
+             with decision / reason / score columns; fields a stage added to
+             a paper (ai_reason, qa, total_score, ...) are kept per entry
+- lists      one row per list: stage, decision, size and content fingerprint
+- artifacts  everything else (picoc, synonyms, criteria, RQs, checklist,
+             extraction form, taxonomy, extracted data) as JSON
+
+Pages go through slr/ui/project_state.py, which loads only the keys a page
+names, so opening a project with 50k harvested records does not read them
+on the planning pages. Row lists are written in chunks from any iterable.
+
+    store = get_project_store("default")
+    store.put_rows("gathered_rows", rows)
+    store.count("gathered_rows"); store.get_rows("screened_rows")
+    store.put_artifact("criteria", {...}); store.get_artifact("criteria", {})
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from slr.store.db import connect
+from slr.store.keys import canonical_paper_id, text_hash
+from slr.store.paths import data_dir
+
+# session key -> (stage, default decision); an entry's own ai_decision / decision field wins
+ROW_LISTS: Dict[str, Tuple[str, str]] = {
+    "gathered_rows": ("harvest", ""),
+    "screened_rows": ("screening", "include"),
+    "screened_excluded": ("screening", "exclude"),
+    "quality_scored_rows": ("quality", ""),
+    "quality_included": ("quality", "include"),
+    "quality_excluded": ("quality", "exclude"),
+    "quality_unsure": ("quality", "unsure"),
+    "extraction_included": ("extraction", "include"),  # c04 upload when there is no quality/screening set
+}
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS records (
+        paper_id TEXT PRIMARY KEY,
+        title    TEXT NOT NULL DEFAULT '',
+        year     INTEGER,
+        data     TEXT NOT NULL,
+        added_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS decisions (
+        list     TEXT NOT NULL,
+        pos      INTEGER NOT NULL,
+        paper_id TEXT NOT NULL,
+        stage    TEXT NOT NULL,
+        decision TEXT NOT NULL DEFAULT '',
+        reason   TEXT NOT NULL DEFAULT '',
+        score    REAL,
+        extra    TEXT NOT NULL DEFAULT '{}',
+        PRIMARY KEY (list, pos)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS decisions_paper ON decisions (paper_id)",
+    """
+    CREATE TABLE IF NOT EXISTS lists (
+        name        TEXT PRIMARY KEY,
+        stage       TEXT NOT NULL,
+        decision    TEXT NOT NULL DEFAULT '',
+        size        INTEGER NOT NULL,
+        fingerprint TEXT NOT NULL DEFAULT '',
+        updated_at  REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS artifacts (
+        name       TEXT PRIMARY KEY,
+        value      TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+]
+
+_CHUNK = 500
+_UNSET = "_unset"  # record fields an entry does not have
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _canon(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def fingerprint(value: Any) -> str:
+    """
+    Content hash of a JSON-serializable value (used to skip unchanged writes).
+    Lists are hashed item by item, the same way put_rows hashes a streamed list.
+    """
+    if isinstance(value, list):
+        h = hashlib.sha1(b"list")
+        for item in value:
+            h.update(_canon(item) + b"\n")
+        return h.hexdigest()
+    return hashlib.sha1(_canon(value)).hexdigest()
+
+
+def paper_key(row: Dict[str, Any]) -> str:
+    return canonical_paper_id(row) or "row:" + text_hash(_dumps(row))
+
+
+def _year(row: Dict[str, Any]) -> Optional[int]:
+    m = re.match(r"(\d{4})", str(row.get("year") or row.get("published") or ""))
+    return int(m.group(1)) if m else None
+
+
+def _score(row: Dict[str, Any]) -> Optional[float]:
+    for k in ("total_score", "score"):
+        try:
+            return float(row[k])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+class ProjectStore:
+    def __init__(self, name: str = "default", path: Optional[str] = None):
+        self.name = name
+        self._lock = threading.Lock()
+        self._conn = connect(f"{name}.sqlite", path=path or os.path.join(data_dir("projects"), f"{name}.sqlite"))
+        with self._lock:
+            for stmt in _SCHEMA:
+                self._conn.execute(stmt)
+            self._conn.commit()
+
+    # ----------------------------- artifacts -----------------------------
+    def put_artifact(self, name: str, value: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts (name, value, updated_at) VALUES (?,?,?)",
+                (name, _dumps(value), time.time()),
+            )
+            self._conn.commit()
+
+    def get_artifact(self, name: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM artifacts WHERE name=?", (name,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def delete(self, name: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM artifacts WHERE name=?", (name,))
+            self._conn.execute("DELETE FROM decisions WHERE list=?", (name,))
+            self._conn.execute("DELETE FROM lists WHERE name=?", (name,))
+            self._conn.commit()
+
+    # ----------------------------- row lists -----------------------------
+    def put_rows(
+        self,
+        name: str,
+        rows: Iterable[Dict[str, Any]],
+        stage: Optional[str] = None,
+        decision: Optional[str] = None,
+        fp: str = "",
+    ) -> int:
+        """
+        Replace list `name` with `rows` (any iterable, consumed in chunks).
+        New papers are added to `records`; each entry keeps only the fields
+        that differ from its record. Returns the number of rows written.
+        Nothing is changed if iterating `rows` raises.
+        """
+        default_stage, default_decision = ROW_LISTS.get(name, (name, ""))
+        stage = stage or default_stage
+        decision = default_decision if decision is None else decision
+        n = 0
+        h = None if fp else hashlib.sha1(b"list")
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM decisions WHERE list=?", (name,))
+                chunk: List[Dict[str, Any]] = []
+                for row in rows:
+                    chunk.append(row)
+                    if h is not None:
+                        h.update(_canon(row) + b"\n")
+                    if len(chunk) >= _CHUNK:
+                        n = self._write_chunk(name, stage, decision, chunk, n)
+                        chunk = []
+                if chunk:
+                    n = self._write_chunk(name, stage, decision, chunk, n)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO lists (name, stage, decision, size, fingerprint, updated_at) "
+                    "VALUES (?,?,?,?,?,?)",
+                    (name, stage, decision, n, fp or h.hexdigest(), time.time()),
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return n
+
+    def _write_chunk(self, name: str, stage: str, decision: str, chunk: List[Dict[str, Any]], start: int) -> int:
+        keys = [paper_key(r) for r in chunk]
+        base = self._records(keys)
+        now = time.time()
+        new = {}
+        for k, r in zip(keys, chunk):
+            if k not in base and k not in new:
+                new[k] = r
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO records (paper_id, title, year, data, added_at) VALUES (?,?,?,?,?)",
+            [(k, str(r.get("title") or ""), _year(r), _dumps(r), now) for k, r in new.items()],
+        )
+        base.update(new)
+        out = []
+        for pos, (k, r) in enumerate(zip(keys, chunk), start):
+            rec = base[k]
+            extra = {f: v for f, v in r.items() if f not in rec or rec[f] != v}
+            unset = [f for f in rec if f not in r]
+            if unset:
+                extra[_UNSET] = unset
+            out.append((
+                name, pos, k, stage,
+                str(r.get("ai_decision") or r.get("decision") or decision or ""),
+                str(r.get("ai_reason") or r.get("reason") or ""),
+                _score(r),
+                _dumps(extra),
+            ))
+        self._conn.executemany(
+            "INSERT INTO decisions (list, pos, paper_id, stage, decision, reason, score, extra) VALUES (?,?,?,?,?,?,?,?)",
+            out,
+        )
+        return start + len(chunk)
+
+    def _records(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        uniq = list(dict.fromkeys(keys))
+        out: Dict[str, Dict[str, Any]] = {}
+        for i in range(0, len(uniq), _CHUNK):
+            part = uniq[i:i + _CHUNK]
+            q = f"SELECT paper_id, data FROM records WHERE paper_id IN ({','.join('?' * len(part))})"
+            for r in self._conn.execute(q, part):
+                out[r["paper_id"]] = json.loads(r["data"])
+        return out
+
+    def iter_rows(self, name: str, chunk_size: int = _CHUNK) -> Iterator[Dict[str, Any]]:
+        """Rows of list `name` in order, read `chunk_size` at a time."""
+        pos = 0
+        while True:
+            with self._lock:
+                part = self._conn.execute(
+                    "SELECT d.pos, d.extra, r.data FROM decisions d JOIN records r ON r.paper_id = d.paper_id "
+                    "WHERE d.list=? AND d.pos>=? ORDER BY d.pos LIMIT ?",
+                    (name, pos, int(chunk_size)),
+                ).fetchall()
+            if not part:
+                return
+            for r in part:
+                row = json.loads(r["data"])
+                extra = json.loads(r["extra"])
+                for f in extra.pop(_UNSET, []):
+                    row.pop(f, None)
+                row.update(extra)
+                yield row
+            pos = part[-1]["pos"] + 1
+
+    def get_rows(self, name: str) -> Optional[List[Dict[str, Any]]]:
+        """The whole list, or None if it was never saved."""
+        if not self.has(name):
+            return None
+        return list(self.iter_rows(name))
+
+    def has(self, name: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM lists WHERE name=?", (name,)).fetchone()
+        return row is not None
+
+    def count(self, name: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM lists WHERE name=?", (name,)).fetchone()
+        return int(row["size"]) if row else 0
+
+    def list_fingerprint(self, name: str) -> str:
+        with self._lock:
+            row = self._conn.execute("SELECT fingerprint FROM lists WHERE name=?", (name,)).fetchone()
+        return row["fingerprint"] if row else ""
+
+    def decisions_for(self, paper_id: str) -> List[Dict[str, Any]]:
+        """Every list entry of one paper (stage, decision, reason, score)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT list, stage, decision, reason, score FROM decisions WHERE paper_id=? ORDER BY stage, list",
+                (paper_id,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            records = self._conn.execute("SELECT COUNT(*) AS n FROM records").fetchone()["n"]
+            lists = {r["name"]: int(r["size"]) for r in self._conn.execute("SELECT name, size FROM lists")}
+            artifacts = [r["name"] for r in self._conn.execute("SELECT name FROM artifacts ORDER BY name")]
+        return {"records": int(records), "lists": lists, "artifacts": artifacts}
+
+
+def list_projects() -> List[str]:
+    root = data_dir("projects")
+    return sorted(f[:-len(".sqlite")] for f in os.listdir(root) if f.endswith(".sqlite"))
+
+
+_STORES: Dict[str, ProjectStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_project_store(name: str = "default") -> ProjectStore:
+    """One store object per project and process."""
+    with _STORES_LOCK:
+        if name not in _STORES:
+            _STORES[name] = ProjectStore(name)
+    return _STORES[name]
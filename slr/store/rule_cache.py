@@ -0,0 +1,68 @@
+# slr/store/rule_cache.py
+"""
+Per-rule screening verdict cache.
+
+One row per (canonical paper id, rule text hash, model). Rewording a rule
+changes its hash, so only that rule has to be re-judged; every other rule's
+verdicts are reused.
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from slr.store.db import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rule_verdicts (
+    paper_id   TEXT NOT NULL,
+    rule_hash  TEXT NOT NULL,
+    model      TEXT NOT NULL,
+    verdict    TEXT NOT NULL,
+    reason     TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    PRIMARY KEY (paper_id, rule_hash, model)
+)
+"""
+
+
+class RuleVerdictCache:
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._conn = connect("rule_cache.sqlite", path=path)
+        with self._lock:
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+
+    def get_many(self, rule_hash: str, model: str, paper_ids: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """Return {paper_id: {"verdict", "reason"}} for cached ids only."""
+        ids = list(dict.fromkeys(p for p in paper_ids if p))
+        out: Dict[str, Dict[str, str]] = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                q = (
+                    "SELECT paper_id, verdict, reason FROM rule_verdicts "
+                    f"WHERE rule_hash=? AND model=? AND paper_id IN ({','.join('?' * len(chunk))})"
+                )
+                for row in self._conn.execute(q, [rule_hash, model, *chunk]):
+                    out[row["paper_id"]] = {"verdict": row["verdict"], "reason": row["reason"]}
+        return out
+
+    def put_many(self, rule_hash: str, model: str, items: List[Tuple[str, str, str]]) -> None:
+        """items: [(paper_id, verdict, reason), ...]"""
+        now = time.time()
+        rows = [(pid, rule_hash, model, v, r or "", now) for (pid, v, r) in items if pid]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rule_verdicts "
+                "(paper_id, rule_hash, model, verdict, reason, created_at) VALUES (?,?,?,?,?,?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM rule_verdicts")
+            self._conn.commit()
@@ -0,0 +1,91 @@
+# slr/tools/bench_parallel_encode.py
+"""
+Scaling benchmark for the multi-process encoder (slr/embed/parallel.py).
+
+    python -m slr.tools.bench_parallel_encode                         # synthetic texts, 1..N processes
+    python -m slr.tools.bench_parallel_encode --input runs/x/raw.jsonl --limit 20000 --threads 2
+    python -m slr.tools.bench_parallel_encode --processes 1 4 8 16
+    python -m slr.tools.bench_parallel_encode --input runs/x/raw.jsonl --fill   # embed into the store
+
+The benchmark does not touch the embedding store. For each process count it
+reports encode throughput (pool start-up and model loading excluded), and
+the scaling efficiency against the smallest count. Vectors are compared
+with the first run's: exit status 1 if a cosine is below --min-cos.
+--fill instead encodes the corpus's uncached texts into the persistent
+store with live progress.
+"""
+import argparse
+import json
+import os
+import sys
+from typing import List
+
+import numpy as np
+
+from slr.tools.bench_sbert_backends import _load_texts, _synthetic_texts
+
+
+def _counts(threads: int) -> List[int]:
+    top = max(1, (os.cpu_count() or 1) // threads)
+    out, p = [], 1
+    while p < top:
+        out.append(p)
+        p *= 2
+    return out + [top]
+
+
+def _progress(done: int, total: int, rate: float) -> None:
+    sys.stdout.write(f"\r  {done}/{total} texts, {rate:.0f} texts/s")
+    sys.stdout.flush()
+    if done >= total:
+        sys.stdout.write("\n")
+
+
+def main() -> int:
+    from slr.embed.parallel import encode_corpus, encode_many, threads_per_process
+
+    ap = argparse.ArgumentParser(description="Benchmark multi-process SBERT encoding.")
+    ap.add_argument("--input", help="rows (.json/.jsonl) to embed; default: synthetic texts")
+    ap.add_argument("-n", "--limit", type=int, default=20000)
+    ap.add_argument("--processes", type=int, nargs="*", help="process counts to try (default: 1, 2, 4, … cores/threads)")
+    ap.add_argument("--threads", type=int, default=threads_per_process(), help="threads per worker process")
+    ap.add_argument("--chunk-size", type=int, default=256)
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--min-cos", type=float, default=0.999)
+    ap.add_argument("--fill", action="store_true", help="encode uncached texts into the embedding store")
+    args = ap.parse_args()
+
+    texts = _load_texts(args.input, args.limit) if args.input else _synthetic_texts(args.limit)
+    print(f"{len(texts)} texts, {args.threads} threads/process, chunk {args.chunk_size}, batch {args.batch_size}")
+
+    if args.fill:
+        procs = (args.processes or [None])[-1]
+        _, stats = encode_corpus(texts, processes=procs, threads=args.threads, chunk_size=args.chunk_size,
+                                 batch_size=args.batch_size, keep=False, on_progress=_progress)
+        print(json.dumps(stats, indent=2))
+        return 0
+
+    runs, ref = [], None
+    cos_min = 1.0
+    for p in args.processes or _counts(args.threads):
+        X, stats = encode_many(texts, processes=p, threads=args.threads,
+                               chunk_size=args.chunk_size, batch_size=args.batch_size)
+        if ref is None:
+            ref = X
+        else:
+            cos_min = min(cos_min, float(np.sum(ref * X, axis=1).min()))
+        runs.append(stats)
+        print(f"  {stats['processes']:>3} processes: {stats['encode_texts_per_s']:>9.1f} texts/s encoding, "
+              f"{stats['texts_per_s']:.1f} texts/s wall ({stats['seconds']} s)")
+
+    base = runs[0]
+    for r in runs:
+        speedup = r["encode_texts_per_s"] / max(base["encode_texts_per_s"], 1e-9)
+        r["speedup"] = round(speedup, 2)
+        r["efficiency"] = round(speedup * base["processes"] / r["processes"], 2)
+    print(json.dumps({"runs": runs, "cos_min_vs_first": round(cos_min, 5)}, indent=2))
+    return 0 if cos_min >= args.min_cos else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
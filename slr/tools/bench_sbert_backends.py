@@ -0,0 +1,125 @@
+# slr/tools/bench_sbert_backends.py
+"""
+Parity check + throughput benchmark: torch SBERT vs. ONNX Runtime (int8).
+
+    python -m slr.tools.bench_sbert_backends                       # synthetic texts
+    python -m slr.tools.bench_sbert_backends --input runs/x/raw.jsonl --limit 5000
+    python -m slr.tools.bench_sbert_backends --fp32                # unquantized ONNX
+
+Each backend runs in its own process, so the reported peak RSS is per backend.
+Parity: cosine between torch and ONNX vectors of the same text, plus top-10
+neighbour overlap. Exit status 1 if the minimum cosine is below --min-cos.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+WORDS = (
+    "sorting algorithm array merge quick heap radix comparison stable parallel cache "
+    "memory complexity benchmark dataset graph neural network transformer retrieval "
+    "systematic review screening classifier embedding latency throughput distributed"
+).split()
+
+
+def _synthetic_texts(n: int, seed: int = 0) -> List[str]:
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        k = int(rng.integers(8, 180))
+        out.append(" ".join(rng.choice(WORDS, size=k)))
+    return out
+
+
+def _load_texts(path: str, limit: int) -> List[str]:
+    from slr.embed.sbert import paper_texts
+    from slr.pipeline.stages import read_rows
+
+    return paper_texts(read_rows(path))[:limit]
+
+
+def _run_backend(backend: str, texts: List[str], batch_size: int, out_path: str, q) -> None:
+    from slr.embed.sbert import DEFAULT_SBERT_MODEL, encode, load_sbert
+
+    t0 = time.perf_counter()
+    load_sbert(DEFAULT_SBERT_MODEL, backend=backend)
+    load_s = time.perf_counter() - t0
+    encode(texts[:8], backend=backend, batch_size=batch_size)  # warm-up
+
+    t0 = time.perf_counter()
+    X = encode(texts, backend=backend, batch_size=batch_size)
+    enc_s = time.perf_counter() - t0
+    np.save(out_path, X)
+    q.put({
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "encode_s": round(enc_s, 2),
+        "texts_per_s": round(len(texts) / max(enc_s, 1e-9), 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+    })
+
+
+def _in_child(backend: str, texts: List[str], batch_size: int, out_path: str) -> Dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_run_backend, args=(backend, texts, batch_size, out_path, q))
+    p.start()
+    res = q.get()
+    p.join()
+    return res
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compare torch and ONNX SBERT backends.")
+    ap.add_argument("--input", help="rows (.json/.jsonl) to embed; default: synthetic texts")
+    ap.add_argument("-n", "--limit", type=int, default=2000)
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--fp32", action="store_true", help="benchmark the unquantized ONNX graph")
+    ap.add_argument("--min-cos", type=float, default=0.98, help="fail if any text's cosine is below this")
+    args = ap.parse_args()
+
+    if args.fp32:
+        os.environ["SBERT_ONNX_QUANTIZE"] = "0"
+    texts = _load_texts(args.input, args.limit) if args.input else _synthetic_texts(args.limit)
+    print(f"{len(texts)} texts, batch size {args.batch_size}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("torch", "onnx"):
+            path = os.path.join(tmp, f"{backend}.npy")
+            results[backend] = _in_child(backend, texts, args.batch_size, path)
+            results[backend]["X"] = np.load(path)
+
+    A, B = results["torch"].pop("X"), results["onnx"].pop("X")
+    cos = np.sum(A * B, axis=1)
+    k = min(10, len(texts) - 1)
+    overlap = None
+    if k > 0:
+        m = min(len(texts), 500)
+        na = np.argsort(-(A[:m] @ A.T), axis=1)[:, 1:k + 1]
+        nb = np.argsort(-(B[:m] @ B.T), axis=1)[:, 1:k + 1]
+        overlap = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(na, nb)]))
+
+    report = {
+        "torch": results["torch"],
+        "onnx": results["onnx"],
+        "speedup": round(results["onnx"]["texts_per_s"] / max(results["torch"]["texts_per_s"], 1e-9), 2),
+        "parity": {
+            "cos_min": round(float(cos.min()), 4),
+            "cos_mean": round(float(cos.mean()), 4),
+            f"top{k}_overlap": None if overlap is None else round(overlap, 3),
+        },
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if float(cos.min()) >= args.min_cos else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# slr/tools/import_times.py
+"""
+Import-time benchmark for pages and backend modules (python -X importtime).
+
+    python -m slr.tools.import_times                         # all pages + default modules
+    python -m slr.tools.import_times slr.llm.client slr.embed.sbert
+    python -m slr.tools.import_times --page slr/ui/pages/d02_taxonomy_viz.py --top 25
+    python -m slr.tools.import_times --budget-ms 1500 --fail-on-heavy
+
+For a page only its top-level import statements are executed (found with
+ast), which is exactly what a cold page load pays before rendering. Each
+target runs in a fresh interpreter. Reported per target: total import time,
+the heaviest top-level packages (cumulative) and any of the HEAVY packages
+that got imported — those should only load lazily on first use.
+Exit status 1 if a target exceeds --budget-ms, or (with --fail-on-heavy)
+imports a heavy package.
+"""
+import argparse
+import ast
+import glob
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+HEAVY = ("torch", "sentence_transformers", "transformers", "sklearn", "scipy",
+         "pandas", "plotly", "graphviz", "onnxruntime", "openai", "pyarrow")
+
+DEFAULT_MODULES = [
+    "slr.llm.client",
+    "slr.agents.screening",
+    "slr.agents.quality_assess",
+    "slr.embed.sbert",
+    "slr.embed.synonyms",
+    "slr.screening.filters",
+    "slr.ui.job_status",
+]
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def page_import_code(path: str) -> str:
+    """The top-level import statements of a page script (plus its sys.path setup)."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    stmts = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    src = "\n".join(ast.unparse(n) for n in stmts)
+    return f"import sys; sys.path.insert(0, {REPO_ROOT!r})\n{src}"
+
+
+def measure(code: str) -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    """Run `code` under -X importtime; returns (total ms, [(module, self_us, cumulative_us, depth)])."""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=REPO_ROOT, env=env,
+    )
+    rows: List[Tuple[str, int, int, int]] = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    if proc.returncode != 0:
+        tail = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")][-3:]
+        raise RuntimeError(" | ".join(tail) or f"exit status {proc.returncode}")
+    # top-level entries (depth 0) sum to the total import cost
+    total_us = sum(cum for _, _, cum, depth in rows if depth == 0)
+    return total_us / 1000.0, rows
+
+
+def by_package(rows: List[Tuple[str, int, int, int]]) -> Dict[str, float]:
+    """Self time summed per top-level package, in ms."""
+    out: Dict[str, float] = {}
+    for mod, self_us, _, _ in rows:
+        pkg = mod.split(".")[0]
+        out[pkg] = out.get(pkg, 0.0) + self_us / 1000.0
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Per-module import-time breakdown (python -X importtime).")
+    ap.add_argument("modules", nargs="*", help="modules to import (default: backend modules used by pages)")
+    ap.add_argument("--page", action="append", default=[], help="page script(s) to measure (default: all pages)")
+    ap.add_argument("--top", type=int, default=10, help="heaviest packages to list per target")
+    ap.add_argument("--budget-ms", type=float, default=0.0, help="fail if a target takes longer")
+    ap.add_argument("--fail-on-heavy", action="store_true", help="fail if a target imports a HEAVY package")
+    args = ap.parse_args()
+
+    targets: List[Tuple[str, str]] = []
+    pages = args.page or ([] if args.modules else sorted(
+        glob.glob(os.path.join(REPO_ROOT, "slr", "ui", "pages", "*.py"))
+        + [os.path.join(REPO_ROOT, "slr", "ui", "picoc_synonyms.py")]
+    ))
+    for p in pages:
+        targets.append((os.path.relpath(p, REPO_ROOT), page_import_code(p)))
+    for m in args.modules or ([] if args.page else DEFAULT_MODULES):
+        targets.append((m, f"import {m}"))
+
+    failed = False
+    for name, code in targets:
+        try:
+            total_ms, rows = measure(code)
+        except RuntimeError as e:
+            print(f"{name}: import failed: {e}\n")
+            failed = True
+            continue
+        pkgs = by_package(rows)
+        heavy = sorted(p for p in pkgs if p in HEAVY)
+        flag = ""
+        if args.budget_ms and total_ms > args.budget_ms:
+            flag, failed = " OVER BUDGET", True
+        if heavy and args.fail_on_heavy:
+            flag, failed = flag + " HEAVY", True
+        print(f"{name}: {total_ms:.0f} ms{flag}")
+        for pkg, ms in sorted(pkgs.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+            print(f"    {ms:8.1f} ms  {pkg}{'  (heavy)' if pkg in HEAVY else ''}")
+        if heavy:
+            print(f"    heavy imports: {', '.join(heavy)}")
+        print()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+# slr/ui/exports.py
+"""
+Download buttons that build the file only when asked.
+
+`export_buttons` shows a format picker and a "Prepare" button; on click the
+rows are streamed to a temporary file (slr/store/exports.py) and a download
+button for it appears. Nothing is serialized on ordinary reruns, and `rows`
+may be a zero-argument callable so that the rows themselves are only
+assembled on click.
+"""
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import streamlit as st
+
+from slr.store.exports import FORMATS, MIME, available_formats, export_to_temp
+
+FORMAT_LABELS = {"csv": "CSV", "json": "JSON", "jsonl": "JSONL", "parquet": "Parquet"}
+
+Rows = Union[Iterable[Dict[str, Any]], Callable[[], Iterable[Dict[str, Any]]]]
+
+
+def export_buttons(
+    label: str,
+    rows: Rows,
+    file_stem: str,
+    key: str,
+    header: Optional[List[str]] = None,
+    to_row: Optional[Callable[[Dict[str, Any]], List[Any]]] = None,
+    formats: Sequence[str] = FORMATS,
+) -> None:
+    fmts = available_formats(formats)
+    c_fmt, c_btn = st.columns([1, 3])
+    with c_fmt:
+        fmt = st.selectbox(f"{label} format", fmts, key=f"{key}_fmt", label_visibility="collapsed",
+                           format_func=lambda f: FORMAT_LABELS.get(f, f))
+    with c_btn:
+        prepare = st.button(f"📦 Prepare {label} ({FORMAT_LABELS.get(fmt, fmt)})", key=f"{key}_prepare",
+                            use_container_width=True)
+    if not prepare:
+        return
+    with st.spinner(f"Writing {label}…"):
+        path = export_to_temp(rows() if callable(rows) else rows, fmt, header=header, to_row=to_row)
+    try:
+        with open(path, "rb") as f:
+            st.download_button(
+                f"⬇️ Download {label} ({FORMAT_LABELS.get(fmt, fmt)}, {os.path.getsize(path) / 1e6:.1f} MB)",
+                data=f,
+                file_name=f"{file_stem}.{fmt}",
+                mime=MIME[fmt],
+                key=f"{key}_download",
+                use_container_width=True,
+            )
+    finally:
+        os.remove(path)
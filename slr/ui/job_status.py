@@ -0,0 +1,110 @@
+# slr/ui/job_status.py
+"""
+Streamlit glue for background jobs (slr/jobs).
+
+Pages describe a stage as (kind, params). `ensure_job` reuses a queued,
+running or finished job with the same input fingerprint (so reruns and
+browser refreshes re-attach to the same work) or submits a new one.
+`render_job` shows progress with a cancel button and polls until the job
+reaches a final state.
+"""
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import streamlit as st
+
+from slr.jobs.runner import get_runner
+from slr.jobs.store import FINAL_STATUSES, STATUS_DONE, STATUS_QUEUED, STATUS_RUNNING
+from slr.store.memo import get_memo
+
+
+def force_rerun():
+    if hasattr(st, "rerun"):
+        st.rerun()
+    elif hasattr(st, "experimental_rerun"):
+        st.experimental_rerun()
+
+
+def session_owner() -> str:
+    """Random id per browser session, used to label submitted jobs."""
+    if "slr_session_id" not in st.session_state:
+        st.session_state["slr_session_id"] = uuid.uuid4().hex
+    return st.session_state["slr_session_id"]
+
+
+def job_fingerprint(kind: str, params: Dict[str, Any]) -> str:
+    blob = json.dumps({"kind": kind, "params": params}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def ensure_job(
+    kind: str,
+    params: Dict[str, Any],
+    state_key: str,
+    resubmit: bool = False,
+    submit: bool = True,
+) -> Optional[str]:
+    """
+    Return the job id for these inputs, submitting a new job if needed.
+
+    resubmit: always start a fresh job.
+    submit:   if False, only re-attach to an existing job (returns None if there is none).
+    """
+    runner = get_runner()
+    runner.start()
+    fp = get_memo().run("job_fingerprint", job_fingerprint, kind, params)  # papers lists are not re-serialized on reruns
+
+    if not resubmit:
+        cur = st.session_state.get(state_key)
+        if isinstance(cur, dict) and cur.get("fingerprint") == fp and runner.store.get(cur["id"]):
+            # keep showing this session's job, including a failure, until the user re-runs
+            return cur["id"]
+        job = runner.store.find_latest(kind, fp, statuses=[STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE])
+        if job:
+            st.session_state[state_key] = {"id": job["id"], "fingerprint": fp}
+            return job["id"]
+        if not submit:
+            return None
+
+    job_id = runner.submit(kind, params, owner=session_owner(), fingerprint=fp)
+    st.session_state[state_key] = {"id": job_id, "fingerprint": fp}
+    return job_id
+
+
+def job_result(job_id: str) -> Optional[Any]:
+    return get_runner().store.result(job_id)
+
+
+def render_job(job_id: str, label: str, poll_seconds: float = 1.0, key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Show the job's state. While it is queued/running this polls (sleep + rerun)
+    and never returns; once final it returns the job record.
+    """
+    runner = get_runner()
+    job = runner.store.get(job_id) or {"status": "failed", "error": "job not found", "progress": 0.0, "message": ""}
+    status = job["status"]
+    key = key or f"job_{job_id}"
+
+    if status in FINAL_STATUSES:
+        if status == "failed":
+            st.error(f"{label} failed: {(job.get('error') or '').splitlines()[0] if job.get('error') else ''}")
+        elif status == "cancelled":
+            st.warning(f"{label} was cancelled.")
+        return job
+
+    c_prog, c_cancel = st.columns([5, 1])
+    with c_prog:
+        text = job.get("message") or ("Waiting for a free worker…" if status == STATUS_QUEUED else "Running…")
+        st.progress(float(job.get("progress") or 0.0), text=f"{label}: {text}")
+        st.caption("Runs in the background — you can switch pages or refresh; progress is kept.")
+    with c_cancel:
+        if st.button("✖ Cancel", key=f"{key}_cancel", use_container_width=True):
+            runner.cancel(job_id)
+            force_rerun()
+
+    time.sleep(float(poll_seconds))
+    force_rerun()
+    return job
@@ -6,10 +6,13 @@ import json
 import streamlit as st
 from slr.ui.theme import inject_css
 from slr.agents.formulate_rq import formulate_rqs_from_picoc
+from slr.ui.project_state import load, project_sidebar, save
 
 # ---------- Page setup ----------
 st.set_page_config(page_title="Planning → Step 2: Research Questions", layout="wide")
 inject_css()
+project_sidebar()
+load("topic", "ai_picoc", "selected_synonyms", "rqs", "rq_notes")
 st.markdown(
     "<h2 style='margin-top:25px;'>Planning • Step 2: Formulate Research Questions (from PICOC)</h2>",
     unsafe_allow_html=True,
@@ -86,8 +89,8 @@ if gen_rq_clicked:
             st.error(f"RQ generation failed: {e}")
             payload = {"rqs": [], "notes": ""}
 
-    st.session_state["rqs"] = payload.get("rqs", [])
-    st.session_state["rq_notes"] = payload.get("notes", "")
+    save("rqs", payload.get("rqs", []))
+    save("rq_notes", payload.get("notes", ""))
 
 
 
@@ -180,7 +183,7 @@ else:
     st.session_state["just_added_this_run"] = False
 
     # --- persist back to session (IMPORTANT) ---
-    st.session_state["rqs"] = updated_rqs
+    save("rqs", updated_rqs)
 
     st.markdown("---")
 
@@ -4,10 +4,13 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.
 import json
 import streamlit as st
 from slr.ui.theme import inject_css
+from slr.ui.project_state import load, project_sidebar, save
 
 # ---------------- Page setup ----------------
 st.set_page_config(page_title="Planning → Step 3: Select Sources", layout="wide")
 inject_css()
+project_sidebar()
+load("topic", "ai_picoc", "sources", "sources_notes")
 st.markdown(
     "<h2 style='margin-top:25px;'>Planning • Step 3: Select Digital Library Sources</h2>",
     unsafe_allow_html=True,
@@ -95,12 +98,12 @@ notes = st.text_area(
 
 # ---------------- Save to session ----------------
 if st.button("Save selection", use_container_width=True):
-    st.session_state["sources"] = {
+    save("sources", {
         "provider": "arXiv",
         "categories": selected,
-    }
-    st.session_state["sources_notes"] = notes
-    st.success("Saved sources to session.")
+    })
+    save("sources_notes", notes)
+    st.success("Saved sources to the project.")
 
 # ---------------- Current summary ----------------
 curr = st.session_state.get("sources", {})
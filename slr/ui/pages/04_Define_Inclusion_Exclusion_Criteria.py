@@ -6,6 +6,7 @@ import re
 import streamlit as st
 from slr.agents.criteria import generate_criteria_from_picoc
 from slr.ui.theme import inject_css
+from slr.ui.project_state import load, project_sidebar, save
 # -------- helpers --------
 
 def _shorten_rule(text: str) -> str:
@@ -59,6 +60,7 @@ def ensure_minimum(lst, minimum=5, fallback_sentence="Relevant to the defined te
 
 st.set_page_config(page_title="Planning → Step 4: Inclusion / Exclusion", layout="wide")
 inject_css()
+project_sidebar()
 st.markdown(
     "<h2 style='margin-top:25px;'>Planning • Step 4: Define Inclusion / Exclusion Criteria</h2>",
     unsafe_allow_html=True,
@@ -87,6 +89,7 @@ for css_name in ("styles.css", "style.css"):
 
 # -------- session context --------
 
+load("topic", "ai_picoc", "sources", "selected_synonyms", "criteria")
 topic    = st.session_state.get("topic", "")
 picoc    = st.session_state.get("ai_picoc", {})
 sources  = st.session_state.get("sources", {})
@@ -153,12 +156,12 @@ with c_mid:
         yr_from = yrs.get("from", crit_state.get("year_from"))
         yr_to   = yrs.get("to",   crit_state.get("year_to"))
 
-        st.session_state["criteria"] = {
+        save("criteria", {
             "include": inc_short,
             "exclude": exc_short,
             "year_from": yr_from,
             "year_to": yr_to,
-        }
+        })
         crit_state = st.session_state["criteria"]
 
 
@@ -299,8 +302,8 @@ with add_left:
         cleaned = _shorten_rule(custom_incl_txt.strip())
         if cleaned:
             edited_incl.append(cleaned)
-            # immediately push to session
-            st.session_state["criteria"]["include"] = edited_incl
+            # immediately push to session and project
+            save("criteria", {**st.session_state["criteria"], "include": edited_incl})
 
 with add_right:
     st.caption("Custom exclusion")
@@ -315,7 +318,7 @@ with add_right:
         cleaned = _shorten_rule(custom_excl_txt.strip())
         if cleaned:
             edited_excl.append(cleaned)
-            st.session_state["criteria"]["exclude"] = edited_excl
+            save("criteria", {**st.session_state["criteria"], "exclude": edited_excl})
 
 # after possible add buttons fired, make sure we reflect the longer of session vs current
 if "include" in st.session_state["criteria"]:
@@ -335,14 +338,14 @@ final_excl = ensure_minimum(edited_excl, minimum=5, fallback_sentence="Outside t
 # -------- save + export --------
 bottom_left, bottom_right = st.columns([0.4, 0.6])
 with bottom_left:
-    if st.button("💾 Save criteria to session", use_container_width=True):
-        st.session_state["criteria"] = {
+    if st.button("💾 Save criteria", use_container_width=True):
+        save("criteria", {
             "include": final_incl,
             "exclude": final_excl,
             "year_from": int(year_from),
             "year_to": int(year_to),
-        }
-        st.success("Saved criteria to session.")
+        })
+        st.success("Saved criteria to the project.")
 
 with bottom_right:
     st.caption("Saved criteria (JSON / Markdown downloads below).")
@@ -6,10 +6,12 @@ import json
 import streamlit as st
 from slr.ui.theme import inject_css
 from slr.agents.quality_checklist import generate_quality_checklist
+from slr.ui.project_state import load, project_sidebar, save
 
 # --------------- Page setup ---------------
 st.set_page_config(page_title="Planning → Step 5: Quality Checklist", layout="wide")
 inject_css()
+project_sidebar()
 st.markdown(
     "<h2 style='margin-top:25px;'>Planning • Step 5: Define Quality Assessment Checklist</h2>",
     unsafe_allow_html=True,
@@ -31,6 +33,7 @@ label[data-baseweb="checkbox"] { margin-bottom: 0px !important; }
 """, unsafe_allow_html=True)
 
 # ------- session context -------
+load("topic", "ai_picoc", "criteria", "sources", "quality_checklist")
 topic    = st.session_state.get("topic", "")
 picoc    = st.session_state.get("ai_picoc", {})
 criteria = st.session_state.get("criteria", {})
@@ -266,15 +269,15 @@ with cut_r:
     )
 
 # --------------- Save & Export ---------------
-if st.button("💾 Save checklist to session", use_container_width=True):
-    st.session_state["quality_checklist"] = {
+if st.button("💾 Save checklist", use_container_width=True):
+    save("quality_checklist", {
         "scheme": "Y/P/N",
         "questions": list(st.session_state["qc_qs"]),
         "weights": list(st.session_state["qc_ws"]),
         "cutoff": int(cutoff),
         "notes": "Planning artifact: to be used during study quality scoring.",
-    }
-    st.success("Saved quality checklist to session.")
+    })
+    st.success("Saved quality checklist to the project.")
 
 st.subheader("Current snapshot")
 st.write("**Scheme:** Y/P/N  (Yes=1, Partial=0.5, No=0)")
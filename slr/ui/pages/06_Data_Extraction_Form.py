@@ -4,10 +4,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.
 import json, csv, io
 import streamlit as st
 from slr.ui.theme import inject_css
+from slr.ui.project_state import load, project_sidebar, save
 
 # ---------------- Page setup ----------------
 st.set_page_config(page_title="Planning → Step 6: Data Extraction Form", layout="wide")
 inject_css()
+project_sidebar()
 st.markdown(
     "<h2 style='margin-top:25px;'>Planning • Step 6: Design the Data Extraction Form</h2>",
     unsafe_allow_html=True,
@@ -25,6 +27,7 @@ div[data-baseweb="input"] input { padding-top:6px; padding-bottom:6px; }
 </style>
 """, unsafe_allow_html=True)
 
+load("topic", "extraction_form")
 topic   = st.session_state.get("topic", "")
 if topic:
     st.caption(f"Current topic: **{topic}**")
@@ -71,12 +74,12 @@ if not selected:
 
 st.markdown("---")
 
-# --------- Save to session ---------
-if st.button("Save form to session", use_container_width=True):
-    st.session_state["extraction_form"] = {
+# --------- Save to project ---------
+if st.button("Save form", use_container_width=True):
+    save("extraction_form", {
         "fields": selected,
         "notes": "Planning artifact (minimal set).",
-    }
+    })
     st.success("Saved data extraction form.")
 
 # --------- Export helpers ---------
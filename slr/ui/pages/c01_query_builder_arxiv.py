@@ -1,13 +1,17 @@
 # slr/ui/pages/c01_query_builder_arxiv.py
-import sys, os, json, io, csv, math, time
+import sys, os, json, math
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
 import streamlit as st
 from slr.query.builder import build_boolean_query
+from slr.query.adapters.arxiv import build_recall_terms, build_recall_search_query, join_recall_terms
 from slr.ui.theme import inject_css
+from slr.ui.exports import export_buttons
+from slr.ui.project_state import load, project_sidebar, project_store, save
 
 st.set_page_config(page_title="Conducting → Build & Gather (arXiv)", layout="wide")
 inject_css()
+project_sidebar()
 st.markdown("""
 <style>
 div[data-testid="stHorizontalBlock"] > div { padding-right:.35rem !important; }
@@ -21,6 +25,7 @@ st.markdown(
 )
 
 # ----- Planning context -----
+load("topic", "ai_picoc", "ai_syns", "selected_synonyms")
 topic    = st.session_state.get("topic", "")
 ai_picoc = st.session_state.get("ai_picoc")
 ai_syns  = st.session_state.get("ai_syns")
@@ -62,13 +67,6 @@ if not fields:
     st.warning("Select at least one field.")
     st.stop()
 
-def _quote_if_needed(t: str) -> str:
-    t = (t or "").strip()
-    if not t:
-        return ""
-    t = t.replace('"', '\\"')
-    return f"\"{t}\""
-
 # ----- Strict Boolean (docs) -----
 try:
     strict_generic_query, strict_parts = build_boolean_query(selected_for_query, topic=topic)
@@ -80,38 +78,15 @@ st.caption("Uses AND across conceptual facets. This is good for documentation /
 st.code(strict_generic_query or "(empty)")
 
 # ----- Broad recall -----
-def build_recall_term_list(topic_str: str, facet_terms_map: dict[str, list[str]]):
-    pool = []
-    if topic_str: pool.append(topic_str)
-    facet_priority = ["Intervention", "Population", "Comparison", "Outcome", "Context"]
-    for facet in facet_priority:
-        for term in facet_terms_map.get(facet, []) or []:
-            pool.append(term)
-    out, seen = [], set()
-    for raw in pool:
-        qt = _quote_if_needed(raw)
-        if qt and qt.lower() not in seen:
-            seen.add(qt.lower()); out.append(qt)
-    return out
-
-recall_terms = build_recall_term_list(topic, selected_for_query)
-recall_boolean = "" if not recall_terms else (recall_terms[0] if len(recall_terms)==1 else "(" + " OR ".join(recall_terms) + ")")
+recall_terms = build_recall_terms(topic, selected_for_query)
+recall_boolean = join_recall_terms(recall_terms)
 
 st.subheader("Broad Recall Query (used for fetching)")
 st.caption("Single OR bucket with topic + method names + key data structure words. This maximizes recall, like arXiv's own search box.")
 st.code(recall_boolean or "(empty)")
 
 # ----- Build arXiv search_query -----
-def build_arxiv_search_query(recall_terms_list, chosen_fields):
-    if not recall_terms_list or not chosen_fields:
-        return ""
-    per_term_chunks = []
-    for term in recall_terms_list:
-        field_queries = [f'{fld}:{term}' for fld in chosen_fields]
-        per_term_chunks.append(field_queries[0] if len(field_queries)==1 else "(" + " OR ".join(field_queries) + ")")
-    return per_term_chunks[0] if len(per_term_chunks)==1 else "(" + " OR ".join(per_term_chunks) + ")"
-
-arxiv_query = build_arxiv_search_query(recall_terms, fields)
+arxiv_query = build_recall_search_query(recall_terms, fields)
 
 st.subheader("arXiv search_query ↪︎")
 st.code(arxiv_query or "(empty)")
@@ -174,69 +149,43 @@ with g3:
 
 st.caption("Click to fetch all pages up to the chosen cap. Then download CSV/JSON of the raw entries.")
 
-def _rows_to_csv(rows):
-    out = io.StringIO()
-    w = csv.writer(out)
-    w.writerow(["id", "title", "summary", "published", "updated", "authors", "category", "link"])
-    for r in rows:
-        authors = ", ".join(r.get("authors", []))
-        w.writerow([r.get("id",""), r.get("title","").replace("\n"," ").strip(),
-                    r.get("summary","").replace("\n"," ").strip(), r.get("published",""),
-                    r.get("updated",""), authors, r.get("category",""), r.get("link","")])
-    return out.getvalue()
+CSV_COLS = ["id", "title", "summary", "published", "updated", "authors", "category", "link"]
+
+def _csv_row(r):
+    authors = ", ".join(r.get("authors", []))
+    return [r.get("id",""), r.get("title","").replace("\n"," ").strip(),
+            r.get("summary","").replace("\n"," ").strip(), r.get("published",""),
+            r.get("updated",""), authors, r.get("category",""), r.get("link","")]
 
 if st.button("🚀 Fetch ALL & prepare downloads", use_container_width=True):
-    from slr.query.arxiv_api import fetch_page  # returns (rows, total_results)
-    all_rows, start = [], 0
-    cap, size = int(total_cap), int(page_size)
+    from slr.query.arxiv_api import fetch_all
 
     prog = st.progress(0, text="Starting…")
-    total_results_seen = None
-
-    while start < cap:
-        with st.spinner(f"Fetching records {start} … {start + size - 1}"):
-            try:
-                rows, total_results = fetch_page(arxiv_query, start=start, max_results=size, sort_by=pv_sort)
-            except Exception as e:
-                st.error(f"Fetch error at start={start}: {e}")
-                break
-
-        if total_results_seen is None:
-            total_results_seen = total_results
-
-        if not rows:
-            break
-
-        all_rows.extend(rows)
-        start += len(rows)
-
-        target = min(cap, total_results_seen or cap)
-        prog.progress(min(1.0, len(all_rows) / max(1, target)),
-                      text=f"Fetched {len(all_rows)} / {target} records")
-
-        if len(all_rows) >= target:
-            break
-
-        if sleep_ms > 0:
-            time.sleep(sleep_ms / 1000.0)
+    with st.spinner("Fetching records from arXiv…"):
+        all_rows, _total, fetch_err = fetch_all(
+            arxiv_query,
+            cap=int(total_cap),
+            page_size=int(page_size),
+            sort_by=pv_sort,
+            sleep_s=sleep_ms / 1000.0,
+            on_page=lambda n, target: prog.progress(min(1.0, n / max(1, target)),
+                                                    text=f"Fetched {n} / {target} records"),
+        )
+    if fetch_err:
+        st.error(fetch_err)
 
     prog.progress(1.0, text=f"Done. Total collected: {len(all_rows)}")
 
     if not all_rows:
         st.warning("No records collected.")
     else:
-        st.session_state["gathered_rows"] = all_rows
-        csv_blob = _rows_to_csv(all_rows)
-        json_blob = json.dumps(all_rows, ensure_ascii=False, indent=2)
-
+        save("gathered_rows", all_rows)
         st.success(f"Collected {len(all_rows)} records. You can download them below.")
-        d1, d2 = st.columns(2)
-        with d1:
-            st.download_button("⬇️ Download CSV (raw studies)", data=csv_blob,
-                               file_name="arxiv_raw_studies.csv", mime="text/csv", use_container_width=True)
-        with d2:
-            st.download_button("⬇️ Download JSON (raw studies)", data=json_blob,
-                               file_name="arxiv_raw_studies.json", mime="application/json", use_container_width=True)
+
+# files are built on click, streamed from the harvest saved in the project (not loaded here)
+if st.session_state.get("gathered_rows") or project_store().count("gathered_rows"):
+    export_buttons("raw studies", lambda: st.session_state.get("gathered_rows") or project_store().iter_rows("gathered_rows"),
+                   "arxiv_raw_studies", key="c01_raw", header=CSV_COLS, to_row=_csv_row)
 
 # ----- Bundle export -----
 bundle = {
@@ -1,5 +1,5 @@
 # slr/ui/pages/c02_screen_refine.py
-import sys, os, io, csv, json, re
+import sys, os
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 
@@ -7,198 +7,59 @@ from typing import List, Dict, Tuple, Optional
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
 import streamlit as st
-from slr.llm.client import LLMClient
+from slr.agents.screening import build_policy_text
+from slr.screening.filters import DEDUP_KEYS, KEEP_RULES, auto_screen, normalize_criteria_keys, perform_dedup
+from slr.store.memo import get_memo
 from slr.ui.theme import inject_css
+from slr.ui.exports import export_buttons
+from slr.ui.job_status import ensure_job, render_job, job_result
+from slr.ui.project_state import ingest_upload, load, project_sidebar, save
 
 st.set_page_config(page_title="Conducting → Step 3: Selection & Refinement", layout="wide")
 inject_css()
+project_sidebar()
 # -------------------------------------------------------------------
 # Helpers
 # -------------------------------------------------------------------
-def normalize_title(t: str) -> str:
-    if not t:
-        return ""
-    t = t.lower()
-    t = re.sub(r"[^a-z0-9\s]", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
-
-def parse_year(dt_str: str) -> Optional[int]:
-    if not dt_str:
-        return None
-    m = re.match(r"(\d{4})", dt_str)
-    return int(m.group(1)) if m else None
-
-def load_rows_from_csv(file) -> List[Dict]:
-    text = file.read().decode("utf-8")
-    reader = csv.DictReader(io.StringIO(text))
-    rows: List[Dict] = []
-    for r in reader:
-        authors_str = r.get("authors", "") or ""
-        authors = [a.strip() for a in authors_str.split(",") if a.strip()]
-        rows.append({
-            "id": r.get("id", ""),
-            "title": r.get("title", ""),
-            "summary": r.get("summary", ""),
-            "published": r.get("published", ""),
-            "updated": r.get("updated", ""),
-            "authors": authors,
-            "category": r.get("category", ""),
-            "link": r.get("link", ""),
-        })
-    return rows
-
-def rows_to_csv(rows: List[Dict], extra_cols: Optional[List[str]] = None) -> str:
-    extra_cols = extra_cols or []
-    cols = ["id", "title", "summary", "published", "updated", "authors", "category", "link"] + extra_cols
-    out = io.StringIO()
-    w = csv.writer(out)
-    w.writerow(cols)
-    for r in rows:
-        authors = ", ".join(r.get("authors", [])) if isinstance(r.get("authors"), list) else (r.get("authors") or "")
-        base = [
-            r.get("id", ""),
-            (r.get("title", "") or "").replace("\n", " ").strip(),
-            (r.get("summary", "") or "").replace("\n", " ").strip(),
-            r.get("published", ""),
-            r.get("updated", ""),
-            authors,
-            r.get("category", ""),
-            r.get("link", ""),
-        ]
-        for c in extra_cols:
-            base.append(r.get(c, ""))
-        w.writerow(base)
-    return out.getvalue()
-
-# -------- Accept BOTH naming styles from earlier steps --------
-def normalize_criteria_keys(crit: Dict) -> Dict:
-    """
-    Accept both:
-      - {"include","exclude","year_from","year_to"}
-      - {"inclusion","exclusion","years":{"from","to"}}
-    Return unified keys: {"inclusion":[], "exclusion":[], "years":{"from":..,"to":..}}
-    """
-    inclusion = crit.get("inclusion")
-    exclusion = crit.get("exclusion")
-    years     = crit.get("years")
-
-    if inclusion is None and "include" in crit:
-        inclusion = crit.get("include", [])
-    if exclusion is None and "exclude" in crit:
-        exclusion = crit.get("exclude", [])
-    if years is None and ("year_from" in crit or "year_to" in crit):
-        years = {"from": crit.get("year_from"), "to": crit.get("year_to")}
-
-    return {
-        "inclusion": inclusion or [],
-        "exclusion": exclusion or [],
-        "years": years or {},
-    }
+CSV_COLS = ["id", "title", "summary", "published", "updated", "authors", "category", "link"]
 
-# ---------------- AI helper funcs ----------------
-def safe_list(x):
-    return x if isinstance(x, list) else []
-
-def build_policy_text(crit_norm: Dict, research_questions: List[str]) -> str:
-    inc = safe_list(crit_norm.get("inclusion", []))
-    exc = safe_list(crit_norm.get("exclusion", []))
-    rqs = safe_list(research_questions)
-
-    lines = []
-    if rqs:
-        lines.append("RESEARCH QUESTIONS:")
-        for i, rq in enumerate(rqs, 1):
-            lines.append(f"- RQ{i}: {rq}")
-        lines.append("")
-    if inc:
-        lines.append("INCLUSION CRITERIA:")
-        for i, c in enumerate(inc, 1):
-            lines.append(f"- I{i}: {c}")
-        lines.append("")
-    if exc:
-        lines.append("EXCLUSION CRITERIA:")
-        for i, c in enumerate(exc, 1):
-            lines.append(f"- E{i}: {c}")
-        lines.append("")
-    return "\n".join(lines).strip()
-
-def paper_to_text(r: Dict) -> str:
+def csv_row(r: Dict, extra_cols: Optional[List[str]] = None) -> List:
+    """One CSV line (CSV_COLS + extra_cols) for the streaming exports."""
     authors = ", ".join(r.get("authors", [])) if isinstance(r.get("authors"), list) else (r.get("authors") or "")
-    # If abstracts are huge and you hit token limits, you can trim here, e.g. summary[:2000]
-    return (
-        f"ID: {r.get('id','')}\n"
-        f"Title: {r.get('title','').strip()}\n"
-        f"Authors: {authors}\n"
-        f"Year: {parse_year(r.get('published','')) or ''}\n"
-        f"Category: {r.get('category','')}\n"
-        f"Abstract: {r.get('summary','').strip()}\n"
-        f"Link: {r.get('link','')}\n"
-    ).strip()
-
-def parse_ai_array(s: str) -> Optional[List[Dict]]:
-    """
-    Extract one top-level JSON object with key 'results' that contains a list.
-    Be forgiving if the model wrapped it with prose.
-    """
-    # try direct parse
-    try:
-        obj = json.loads(s)
-        if isinstance(obj, dict) and isinstance(obj.get("results"), list):
-            return obj["results"]
-    except Exception:
-        pass
-
-    # fallback: extract first {...}
-    m = re.search(r'\{.*\}', s, flags=re.DOTALL)
-    if not m:
-        return None
-    try:
-        obj = json.loads(m.group(0))
-        if isinstance(obj, dict) and isinstance(obj.get("results"), list):
-            return obj["results"]
-    except Exception:
-        return None
-    return None
-
-def batched(lst, n):
-    for i in range(0, len(lst), n):
-        yield lst[i:i+n]
-
-def make_system_prompt() -> str:
-    return (
-        "You are assisting a systematic literature review. "
-        "Decide if a candidate paper should be INCLUDED, EXCLUDED, or marked as UNSURE "
-        "based strictly on the provided Research Questions and Inclusion/Exclusion criteria. "
-        "Respond ONLY with compact JSON using this exact structure:\n"
-        "{ \"results\": [\n"
-        "  {\"decision\":\"include|exclude|unsure\",\"reason\":\"...\",\"matched_rules\":[\"...\"]},\n"
-        "  ... one item per paper in the batch ...\n"
-        "]}\n"
-        "If information is insufficient or ambiguous, use 'unsure'. Be concise."
-    )
+    base = [
+        r.get("id", ""),
+        (r.get("title", "") or "").replace("\n", " ").strip(),
+        (r.get("summary", "") or "").replace("\n", " ").strip(),
+        r.get("published", ""),
+        r.get("updated", ""),
+        authors,
+        r.get("category", ""),
+        r.get("link", ""),
+    ]
+    for c in extra_cols or []:
+        base.append(r.get(c, ""))
+    return base
+
+def choose_sets(choice: str, inc: List[Dict], exc: List[Dict], ai_inc: List[Dict], ai_exc: List[Dict],
+                ai_unsure: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """(included, excluded) for the chosen download set."""
+    if choice == "AI-included (recommended)":
+        return ai_inc, ai_exc + ai_unsure
+    if choice == "AI-included + Unsure (broad)":
+        return ai_inc + ai_unsure, ai_exc
+    return inc, exc
 
-def make_user_prompt(policy: str, papers: List[Dict]) -> str:
-    """
-    Ask the model to return EXACTLY one JSON object with an array named 'results'.
-    The array length must equal the number of papers.
-    """
-    chunks = [f"POLICY\n{policy}\n\n"]
-    for idx, r in enumerate(papers, 1):
-        chunks.append(f"=== PAPER {idx} ===\n{paper_to_text(r)}")
-    chunks.append(
-        "\nINSTRUCTIONS\n"
-        "Return EXACTLY ONE JSON object named 'results' with one object per paper, in order.\n"
-        "Valid decisions: 'include' | 'exclude' | 'unsure'.\n"
-        "Schema per item: {\"decision\":\"...\",\"reason\":\"...\",\"matched_rules\":[...]}\n"
-        "Output format (and nothing else):\n"
-        "{\"results\": [ {..paper1..}, {..paper2..}, ... ]}"
-    )
-    return "\n".join(chunks)
+def preview_table(rows: List[Dict]) -> List[Dict]:
+    return [{k: v for k, v in r.items() if k in ("id","title","ai_reason","ai_matched_rules")} for r in rows]
+
+# dedup / filters / policy text / previews are memoized on their inputs (slr/store/memo.py),
+# so widget changes elsewhere on the page do not recompute them
+memo = get_memo()
 
 # -------------------------------------------------------------------
 # Planning artifacts (from previous steps)
 # -------------------------------------------------------------------
+load("topic", "criteria", "sources", "quality_checklist", "rqs", "gathered_rows")
 topic     = st.session_state.get("topic", "")
 criteria  = st.session_state.get("criteria", {})           # Step 4 (varied schema)
 sources   = st.session_state.get("sources", {})            # Step 3
@@ -228,14 +89,15 @@ st.markdown("### Load raw studies")
 if rows:
     st.success(f"Loaded {len(rows)} studies from session (Step 2).")
 else:
-    up = st.file_uploader("Upload raw studies (CSV or JSON) exported from Step 2", type=["csv", "json"])
+    up = st.file_uploader("Upload raw studies (CSV, JSON or JSONL) exported from Step 2",
+                          type=["csv", "json", "jsonl", "ndjson"])
     if up:
         try:
-            if (getattr(up, "type", "") or "").endswith("/json") or up.name.lower().endswith(".json"):
-                rows = json.loads(up.read().decode("utf-8"))
-            else:
-                rows = load_rows_from_csv(up)
-            st.success(f"Loaded {len(rows)} studies from upload.")
+            # parsed row by row straight into the project store (slr/store/ingest.py)
+            stats = ingest_upload("gathered_rows", up)
+            rows = st.session_state.get("gathered_rows") or []
+            st.success(f"Loaded {stats['rows']} studies from upload"
+                       + (f" (skipped {stats['skipped']} rows without title or id)." if stats["skipped"] else "."))
         except Exception as e:
             st.error(f"Failed to parse file: {e}")
 
@@ -247,33 +109,10 @@ if not rows:
 # Deduplication
 # -------------------------------------------------------------------
 st.markdown("### Deduplication")
-dedup_key = st.selectbox("Choose deduplication key", ["normalized title", "id", "title + year"], index=0)
-keep_rule = st.selectbox("When duplicates found, keep …", ["first occurrence", "latest by year"], index=0)
-
-def perform_dedup(items: List[Dict]) -> Tuple[List[Dict], int]:
-    seen: Dict[str, Dict] = {}
-    drops = 0
-    for r in items:
-        if dedup_key == "id":
-            k = (r.get("id", "") or "").strip().lower()
-        elif dedup_key == "title + year":
-            yr = parse_year(r.get("published", "")) or 0
-            k = f"{normalize_title(r.get('title',''))}::{yr}"
-        else:
-            k = normalize_title(r.get("title", ""))
-
-        if k not in seen:
-            seen[k] = r
-        else:
-            if keep_rule == "latest by year":
-                y_old = parse_year(seen[k].get("published", "")) or 0
-                y_new = parse_year(r.get("published", "")) or 0
-                if y_new > y_old:
-                    seen[k] = r
-            drops += 1
-    return list(seen.values()), drops
-
-deduped, dropped = perform_dedup(rows)
+dedup_key = st.selectbox("Choose deduplication key", DEDUP_KEYS, index=0)
+keep_rule = st.selectbox("When duplicates found, keep …", KEEP_RULES, index=0)
+
+deduped, dropped = memo.run("dedup", perform_dedup, rows, dedup_key, keep_rule)
 st.write(f"Deduped to **{len(deduped)}** (removed {dropped}).")
 
 # -------------------------------------------------------------------
@@ -310,41 +149,7 @@ with colf2:
 cat_explain = ", ".join(sel_cats) if sel_cats else "any cs.*"
 st.caption(f"Category filter: **{cat_explain}**")
 
-def auto_screen(items: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
-    included: List[Dict] = []
-    excluded: List[Dict] = []
-    cat_allow: Optional[set] = set(sel_cats) if sel_cats else None
-
-    for r in items:
-        yr = parse_year(r.get("published", ""))
-        cat = (r.get("category", "") or "").strip()
-
-        # Year filter
-        if yr is not None and (yr < int(y_from) or yr > int(y_to)):
-            rr = dict(r)
-            rr["reason"] = f"year {yr} outside [{y_from}-{y_to}]"
-            excluded.append(rr)
-            continue
-
-        # Computer Science only
-        if not cat.startswith("cs."):
-            rr = dict(r)
-            rr["reason"] = f"non-CS category: {cat or 'N/A'}"
-            excluded.append(rr)
-            continue
-
-        # Enforce selected categories if provided
-        if cat_allow and cat not in cat_allow:
-            rr = dict(r)
-            rr["reason"] = f"category not in selected sources: {cat}"
-            excluded.append(rr)
-            continue
-
-        included.append(r)
-
-    return included, excluded
-
-inc, exc = auto_screen(deduped)
+inc, exc = memo.run("auto_screen", auto_screen, deduped, int(y_from), int(y_to), sel_cats)
 st.success(f"Auto-include: **{len(inc)}**  |  Auto-exclude: **{len(exc)}**")
 
 # -------------------------------------------------------------------
@@ -352,7 +157,7 @@ st.success(f"Auto-include: **{len(inc)}**  |  Auto-exclude: **{len(exc)}**")
 # -------------------------------------------------------------------
 st.markdown("### AI-assisted refinement (RQ + I/E criteria)")
 
-policy_text = build_policy_text(crit_norm, research_questions)
+policy_text = memo.run("policy_text", build_policy_text, crit_norm, research_questions)
 
 with st.expander("Show applied RQs and criteria", expanded=False):
     st.code(policy_text or "No research questions/criteria found in session.", language="markdown")
@@ -371,65 +176,114 @@ with col_ai3:
     temp = st.slider("Temperature", min_value=0.0, max_value=1.0, value=0.2, step=0.1,
                      help="Lower = more deterministic.")
 
+refine_mode = st.radio(
+    "Refinement mode",
+    options=[
+        "Full (every paper to the LLM)",
+        "Active learning (classifier + uncertain papers)",
+        "Per-criterion (cached per rule)",
+    ],
+    index=0,
+    horizontal=True,
+    help="Active learning trains a local classifier on LLM decisions and only sends "
+         "the papers it is least sure about, stopping at the target recall. "
+         "Per-criterion judges every I/E rule separately and caches each verdict, so editing "
+         "one rule on Planning Step 4 only re-checks that rule (RQs are not used in this mode).",
+)
+use_active = refine_mode.startswith("Active")
+use_rules = refine_mode.startswith("Per-criterion")
+if use_active:
+    al1, al2, al3 = st.columns(3)
+    with al1:
+        al_target = st.slider("Target recall", min_value=0.80, max_value=0.99, value=0.95, step=0.01,
+                              help="Stop once the estimated share of relevant papers already found reaches this.")
+    with al2:
+        al_seed = st.number_input("Seed papers", min_value=4, max_value=200, value=20, step=2,
+                                  help="Papers screened by the LLM before the classifier is first trained.")
+    with al3:
+        al_round = st.number_input("Papers per round", min_value=1, max_value=100, value=10, step=1,
+                                   help="Most uncertain papers sent to the LLM per round.")
+
+resume_run = st.checkbox(
+    "Resume from saved decisions",
+    value=True,
+    help="Decisions are saved after every batch. Keep this on to skip papers already screened "
+         "with the same criteria/model/temperature; turn it off to start the run from scratch.",
+)
+
+if use_rules:
+    require_all_inc = st.checkbox(
+        "Require ALL inclusion rules",
+        value=True,
+        help="Off: one satisfied inclusion rule is enough (exclusion rules always apply).",
+    )
+
 ai_inc: List[Dict] = []
 ai_exc: List[Dict] = []
 ai_unsure: List[Dict] = []
 
-def run_ai_refinement(papers: List[Dict]) -> Tuple[List[Dict], List[Dict], List[Dict]]:
-    client = LLMClient()  # uses env + defaults from slr/llm/client.py
-    inc_ai, exc_ai, unsure_ai = [], [], []
-
-    if not policy_text:
-        st.warning("No research questions or criteria found in session; AI refinement will default to 'unsure'.")
-        return [], [], [dict(r, **{"ai_decision": "unsure", "ai_reason": "No RQs/criteria available"}) for r in papers]
-
-    for batch in batched(papers, int(max_batch)):
-        sys_prompt = make_system_prompt()
-        usr_prompt = make_user_prompt(policy_text, batch)
-
-        # allocate generous tokens: ~450 per paper, capped at 6000
-        max_tok = min(6000, 450 * max(1, len(batch)))
-
-        try:
-            raw = client.chat(system=sys_prompt, user=usr_prompt, temperature=float(temp), max_tokens=max_tok)
-        except Exception as e:
-            st.error(f"LLM error: {e}")
-            break
-
-        items = parse_ai_array(raw or "") or []
-        if len(items) != len(batch):
-            st.warning(
-                f"Model returned {len(items)} results for a batch of {len(batch)}; "
-                "filling missing items as 'unsure'."
-            )
-            if len(items) < len(batch):
-                items = items + [{} for _ in range(len(batch) - len(items))]
-            else:
-                items = items[:len(batch)]
-
-        for r, parsed in zip(batch, items):
-            parsed = parsed or {}
-            decision = str(parsed.get("decision", "unsure")).lower().strip()
-            reason = (parsed.get("reason") or "").strip()
-            matched = parsed.get("matched_rules") or []
-            rr = dict(r)
-            rr["ai_decision"] = decision if decision in {"include","exclude","unsure"} else "unsure"
-            rr["ai_reason"] = reason
-            rr["ai_matched_rules"] = matched
-
-            if rr["ai_decision"] == "include":
-                inc_ai.append(rr)
-            elif rr["ai_decision"] == "exclude":
-                exc_ai.append(rr)
-            else:
-                unsure_ai.append(rr)
-
-    return inc_ai, exc_ai, unsure_ai
+def refinement_job_params(papers: List[Dict]) -> Dict:
+    """Inputs for the background 'screening' job (slr/jobs/tasks.py)."""
+    params: Dict = {
+        "papers": papers,
+        "mode": "active" if use_active else ("rules" if use_rules else "full"),
+        "policy_text": policy_text,
+        "batch_size": int(max_batch),
+        "temperature": float(temp),
+        "resume": bool(resume_run),
+    }
+    if use_active:
+        params["active"] = {
+            "seed_size": int(al_seed),
+            "round_size": int(al_round),
+            "target_recall": float(al_target),
+        }
+    if use_rules:
+        params["inclusion"] = crit_norm.get("inclusion") or []
+        params["exclusion"] = crit_norm.get("exclusion") or []
+        params["require_all_inclusion"] = bool(require_all_inc)
+    return params
+
+def show_refinement_stats(result: Dict) -> None:
+    stats = result.get("stats") or {}
+    for w in (result.get("warnings") or [])[:5]:
+        st.warning(w)
+    if stats.get("error"):
+        st.error(
+            f"LLM error: {stats['error']}. Completed decisions are saved — "
+            "click **Re-run AI refinement** to continue with the unfinished papers."
+        )
+    if stats.get("resumed"):
+        st.caption(f"Resumed **{stats['resumed']}** saved decisions (run `{stats.get('run_id', '')}`).")
+    if stats.get("remaining"):
+        st.caption(f"**{stats['remaining']}** papers are not screened yet.")
+    if use_active and stats:
+        st.caption(
+            f"LLM screened **{stats['llm_screened']} / {stats['total']}** papers in {stats['rounds']} rounds; "
+            f"estimated recall **{(stats.get('est_recall') or 0.0):.0%}** "
+            f"(~{stats.get('est_remaining') or 0:g} relevant papers estimated among the rest; stop: {stats.get('stopped')})."
+        )
+    elif use_rules and stats:
+        st.caption(
+            f"{stats['rules']} rules × {stats['papers']} papers: **{stats['cached_verdicts']}** verdicts from cache, "
+            f"**{stats['llm_calls']}** LLM calls."
+        )
+
+if use_ai and not policy_text:
+    st.warning("No research questions or criteria found in session; AI refinement will default to 'unsure'.")
+    ai_unsure = [dict(r, **{"ai_decision": "unsure", "ai_reason": "No RQs/criteria available"}) for r in inc]
+elif use_ai:
+    st.info("AI refinement on the **auto-included** set runs as a background job.")
+    rerun_clicked = st.button("🔁 Re-run AI refinement", help="Start a fresh job even if results for these inputs exist.")
+    job_id = ensure_job("screening", refinement_job_params(inc), "c02_refinement_job", resubmit=rerun_clicked)
+    job = render_job(job_id, "AI refinement")
+    result = memo.run("job_result", job_result, job_id) if job["status"] == "done" else None
+    if result is None:
+        st.stop()
+    ai_inc, ai_exc, ai_unsure = result["included"], result["excluded"], result["unsure"]
+    show_refinement_stats(result)
 
 if use_ai:
-    st.info("Running AI refinement on the **auto-included** set...")
-    ai_inc, ai_exc, ai_unsure = run_ai_refinement(inc)
-
     c1, c2, c3 = st.columns(3)
     with c1:
         st.success(f"AI include: {len(ai_inc)}")
@@ -449,59 +303,42 @@ if use_ai:
         horizontal=False
     )
 
-    if choice == "AI-included (recommended)":
-        final_inc = ai_inc
-        final_exc = ai_exc + ai_unsure
-    elif choice == "AI-included + Unsure (broad)":
-        final_inc = ai_inc + ai_unsure
-        final_exc = ai_exc
-    else:
-        final_inc = inc
-        final_exc = exc
-
-    st.session_state["screened_rows"] = final_inc
-    st.session_state["screened_excluded"] = final_exc
+    final_inc, final_exc = memo.run("c02_sets", choose_sets, choice, inc, exc, ai_inc, ai_exc, ai_unsure)
+
+    save("screened_rows", final_inc)
+    save("screened_excluded", final_exc)
 
     with st.expander("Preview AI-included", expanded=False):
-        st.dataframe([{k: v for k, v in r.items() if k in ("id","title","ai_reason","ai_matched_rules")} for r in ai_inc],
-                     use_container_width=True)
+        st.dataframe(memo.run("c02_preview", preview_table, ai_inc), use_container_width=True)
     with st.expander("Preview AI-excluded", expanded=False):
-        st.dataframe([{k: v for k, v in r.items() if k in ("id","title","ai_reason","ai_matched_rules")} for r in ai_exc],
-                     use_container_width=True)
+        st.dataframe(memo.run("c02_preview", preview_table, ai_exc), use_container_width=True)
     with st.expander("Preview AI-unsure", expanded=False):
-        st.dataframe([{k: v for k, v in r.items() if k in ("id","title","ai_reason","ai_matched_rules")} for r in ai_unsure],
-                     use_container_width=True)
+        st.dataframe(memo.run("c02_preview", preview_table, ai_unsure), use_container_width=True)
 else:
-    st.session_state["screened_rows"] = inc
-    st.session_state["screened_excluded"] = exc
+    save("screened_rows", inc)
+    save("screened_excluded", exc)
+
+with st.expander("⏱ Stage timings", expanded=False):
+    st.caption("Stages are recomputed only when their inputs change; otherwise the previous result is reused.")
+    st.dataframe(memo.timing_rows(["dedup", "auto_screen", "policy_text", "job_fingerprint", "job_result",
+                                   "c02_sets", "c02_preview"]), use_container_width=True)
 
 # -------------------------------------------------------------------
 # Downloads
 # -------------------------------------------------------------------
 st.markdown("### Downloads")
 
-if use_ai:
-    csv_inc = rows_to_csv(st.session_state["screened_rows"], extra_cols=["ai_decision","ai_reason"])
-    json_inc = json.dumps(st.session_state["screened_rows"], ensure_ascii=False, indent=2)
-    csv_exc = rows_to_csv(st.session_state["screened_excluded"], extra_cols=["reason","ai_decision","ai_reason"])
-    json_exc = json.dumps(st.session_state["screened_excluded"], ensure_ascii=False, indent=2)
-else:
-    csv_inc = rows_to_csv(st.session_state["screened_rows"])
-    json_inc = json.dumps(st.session_state["screened_rows"], ensure_ascii=False, indent=2)
-    csv_exc = rows_to_csv(st.session_state["screened_excluded"], extra_cols=["reason"])
-    json_exc = json.dumps(st.session_state["screened_excluded"], ensure_ascii=False, indent=2)
+# files are written only when "Prepare" is clicked (CSV/Parquet use the columns below)
+inc_extra = ["ai_decision", "ai_reason"] if use_ai else []
+exc_extra = ["reason", "ai_decision", "ai_reason"] if use_ai else ["reason"]
 
 c_d1, c_d2 = st.columns(2)
 with c_d1:
-    st.download_button("⬇️ Download INCLUDED (CSV)", data=csv_inc,
-                       file_name="included_studies.csv", mime="text/csv", use_container_width=True)
-    st.download_button("⬇️ Download INCLUDED (JSON)", data=json_inc,
-                       file_name="included_studies.json", mime="application/json", use_container_width=True)
+    export_buttons("INCLUDED", lambda: st.session_state["screened_rows"], "included_studies", key="c02_inc",
+                   header=CSV_COLS + inc_extra, to_row=lambda r: csv_row(r, inc_extra))
 with c_d2:
-    st.download_button("⬇️ Download EXCLUDED + reason (CSV)", data=csv_exc,
-                       file_name="excluded_studies.csv", mime="text/csv", use_container_width=True)
-    st.download_button("⬇️ Download EXCLUDED + reason (JSON)", data=json_exc,
-                       file_name="excluded_studies.json", mime="application/json", use_container_width=True)
+    export_buttons("EXCLUDED + reason", lambda: st.session_state["screened_excluded"], "excluded_studies",
+                   key="c02_exc", header=CSV_COLS + exc_extra, to_row=lambda r: csv_row(r, exc_extra))
 
 # -------------------------------------------------------------------
 # Quality checklist template (optional)
@@ -512,19 +349,15 @@ st.subheader("Quality scoring template (optional)")
 if isinstance(qcheck, dict) and qcheck.get("questions"):
     qs = qcheck.get("questions", [])
     scheme = qcheck.get("scheme", "Y/N")  # "Y/N" or "Y/P/N"
-    out = io.StringIO()
-    w = csv.writer(out)
     hdr = ["id", "title"] + [f"Q{i+1}" for i in range(len(qs))] + ["total_score"]
-    w.writerow(hdr)
-    for r in st.session_state.get("screened_rows", []):
-        w.writerow([r.get("id", ""), r.get("title", "")] + ["" for _ in qs] + [""])
-    tmpl = out.getvalue()
-    st.download_button(
-        f"⬇️ Download Quality Checklist Template (scheme: {scheme})",
-        data=tmpl,
-        file_name="quality_scoring_template.csv",
-        mime="text/csv",
-        use_container_width=True,
+    export_buttons(
+        f"Quality Checklist Template (scheme: {scheme})",
+        lambda: st.session_state.get("screened_rows", []),
+        "quality_scoring_template",
+        key="c02_qtemplate",
+        header=hdr,
+        to_row=lambda r: [r.get("id", ""), r.get("title", "")] + ["" for _ in qs] + [""],
+        formats=("csv",),
     )
     st.caption("Fill the per-paper answers offline or in the next UI, then compute total_score. "
                "You can also integrate this with your Step-5 page.")
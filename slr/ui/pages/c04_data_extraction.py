@@ -1,14 +1,21 @@
 # slr/ui/pages/c03_data_extraction.py
 
-import sys, os, io, csv, json, re
+import sys, os, re
 from typing import List, Dict
 
-import requests  # <-- for fetching PDFs
-
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 import streamlit as st
 
+from slr.pdf.fetch import SkipDownload, fetch_pdf, guess_pdf_url, pdf_filename
+from slr.store.keys import canonical_paper_id
+from slr.store.paths import data_dir
+from slr.store.pdfs import get_pdf_store
+from slr.ui.exports import export_buttons
+from slr.ui.job_status import ensure_job, render_job, job_result
+from slr.ui.project_state import ingest_upload, load, project_sidebar, save
+
 st.set_page_config(page_title="Conducting → Step 4: Data extraction", layout="wide")
+project_sidebar()
 
 # ---------- rerun helper (handles Streamlit versions) ----------
 def force_rerun():
@@ -20,20 +27,6 @@ def force_rerun():
         return
 
 # ---------- helpers ----------
-def rows_to_csv(rows: List[Dict], cols: List[str]) -> str:
-    out = io.StringIO()
-    w = csv.writer(out)
-    w.writerow(cols)
-    for r in rows:
-        row = []
-        for c in cols:
-            v = r.get(c, "")
-            if isinstance(v, list):
-                v = ", ".join(v)
-            row.append(v)
-        w.writerow(row)
-    return out.getvalue()
-
 def to_list(v):
     if v is None:
         return []
@@ -73,38 +66,12 @@ def pick_first(*vals) -> str:
             return s
     return ""
 
-def guess_pdf_url(paper: Dict) -> str:
-    """
-    Try to guess a direct PDF URL for this paper.
-
-    - Prefer an explicit 'pdf_url' field.
-    - If it's an arXiv abs URL, convert to pdf URL.
-    - If any candidate already ends with .pdf, use it.
-    """
-    candidates = [
-        paper.get("pdf_url"),
-        paper.get("url"),
-        paper.get("link"),
-    ]
-
-    for u in candidates:
-        if not u:
-            continue
-        u = str(u).strip()
-
-        # arXiv abs -> pdf
-        if "arxiv.org/abs/" in u and not u.lower().endswith(".pdf"):
-            u = u.replace("arxiv.org/abs/", "arxiv.org/pdf/")
-            if not u.lower().endswith(".pdf"):
-                u = u + ".pdf"
-
-        if u.lower().endswith(".pdf"):
-            return u
-
-    return ""
-
-
 # ---------- load included studies ----------
+load("topic", "quality_included", "extraction_form", "extracted_data", "extracted_ai")
+if not st.session_state.get("quality_included"):
+    load("screened_rows")
+if not st.session_state.get("quality_included") and not st.session_state.get("screened_rows"):
+    load("extraction_included")
 topic = st.session_state.get("topic", "")
 if topic:
     st.caption(f"Current topic: **{topic}**")
@@ -120,20 +87,21 @@ else:
     included = st.session_state.get("screened_rows", [])
     if included:
         source_name = "screened_rows"
+    else:
+        included = st.session_state.get("extraction_included", [])
+        if included:
+            source_name = "upload"
 
 if included:
     st.success(f"Loaded {len(included)} studies from session (source: **{source_name}**).")
 else:
-    up_inc = st.file_uploader("Upload INCLUDED studies (CSV or JSON)", type=["csv", "json"])
+    up_inc = st.file_uploader("Upload INCLUDED studies (CSV, JSON or JSONL)", type=["csv", "json", "jsonl", "ndjson"])
     if up_inc:
         try:
-            if (getattr(up_inc, "type", "") or "").endswith("/json") or up_inc.name.lower().endswith(".json"):
-                included = json.loads(up_inc.read().decode("utf-8"))
-            else:
-                text = up_inc.read().decode("utf-8")
-                reader = csv.DictReader(io.StringIO(text))
-                included = list(reader)
-            st.success(f"Loaded {len(included)} INCLUDED studies from upload.")
+            # parsed row by row straight into the project store (slr/store/ingest.py)
+            stats = ingest_upload("extraction_included", up_inc)
+            included = st.session_state.get("extraction_included") or []
+            st.success(f"Loaded {stats['rows']} INCLUDED studies from upload.")
         except Exception as e:
             st.error(f"Failed to parse included list: {e}")
 
@@ -167,8 +135,12 @@ with st.expander("Show fields", expanded=False):
 
 # ---------- session storage for entered data ----------
 extracted: Dict[str, Dict] = st.session_state.get("extracted_data", {})
+# LLM pre-fill per paper id: {"values": {...}, "evidence": {...}, "source": "pdf" | "abstract"}
+extracted_ai: Dict[str, Dict] = st.session_state.get("extracted_ai", {})
 # store raw PDF bytes by paper id when fetched
-pdf_store: Dict[str, bytes] = st.session_state.get("extracted_pdfs", {})
+# PDFs are kept on disk in the shared store (same files as d01), keyed by canonical paper id
+pdf_store = get_pdf_store()
+st.session_state.pop("extracted_pdfs", None)  # bytes kept in the session by older versions
 
 # ---------- paper navigator ----------
 st.markdown("### Extract per paper")
@@ -216,8 +188,11 @@ prefilled: Dict[str, str] = {
 if not prefilled["id"]:
     prefilled["id"] = pid
 
-# merge existing extracted (user edits win)
+# merge AI pre-fill and existing extracted (user edits win)
 current_record = dict(prefilled)
+ai_rec = extracted_ai.get(pid) or {}
+for k, v in (ai_rec.get("values") or {}).items():
+    current_record[k] = ", ".join(map(str, v)) if isinstance(v, list) else v
 current_record.update(extracted.get(pid, {}))
 
 # Helpful heading with link if available
@@ -230,6 +205,7 @@ else:
 
 # ---------- PDF fetch / download ----------
 pdf_url = guess_pdf_url(paper)
+pdf_key = canonical_paper_id(paper) or pid
 
 if pdf_url:
     st.markdown(f"**PDF candidate:** [{pdf_url}]({pdf_url})")
@@ -237,26 +213,22 @@ if pdf_url:
     col_pdf_fetch, col_pdf_dl = st.columns([1, 1])
 
     with col_pdf_fetch:
-        if st.button("📥 Fetch PDF", key=f"fetch_pdf_{pid}", use_container_width=True):
+        fetch_clicked = st.button("📥 Fetch PDF", key=f"fetch_pdf_{pid}", use_container_width=True)
+        if fetch_clicked and pdf_store.has(pdf_key):
+            st.success("PDF already stored (fetched here or on the taxonomy page).")
+        elif fetch_clicked:
             try:
-                resp = requests.get(pdf_url, timeout=25)
-                resp.raise_for_status()
-                content_type = resp.headers.get("Content-Type", "")
-
-                if "pdf" not in content_type.lower() and not pdf_url.lower().endswith(".pdf"):
-                    st.warning(
-                        f"Fetched URL but it does not look like a PDF "
-                        f"(Content-Type: {content_type})."
-                    )
-
-                pdf_store[pid] = resp.content
-                st.session_state["extracted_pdfs"] = pdf_store
-                st.success("PDF fetched and stored in session.")
+                info = fetch_pdf(pdf_url, os.path.join(data_dir("pdfs", "incoming"), pdf_filename(pdf_key)), timeout=25)
+                pdf_store.add_file(pdf_key, info["path"], url=pdf_url)
+                st.success("PDF fetched and stored.")
+            except SkipDownload as e:
+                # HTML landing page / paywall, or bigger than SLR_PDF_MAX_MB
+                st.warning(f"Not stored: {e}.")
             except Exception as e:
                 st.error(f"Failed to fetch PDF: {e}")
 
     with col_pdf_dl:
-        pdf_bytes = pdf_store.get(pid)
+        pdf_bytes = pdf_store.read_bytes(pdf_key)  # only the paper on screen is read
         if pdf_bytes:
             st.download_button(
                 "⬇️ Download fetched PDF",
@@ -286,7 +258,7 @@ with st.form(key=f"extract_form_{pid}", clear_on_submit=False):
 
         if ftype == "number":
             try:
-                default_num = int(str(default_val)) if str(default_val).strip() != "" else 0
+                default_num = int(float(str(default_val))) if str(default_val).strip() != "" else 0
             except Exception:
                 default_num = 0
             val = st.number_input(f"{fname}" + (" *" if freq else ""), value=default_num, step=1, help=fhelp, key=wkey)
@@ -316,9 +288,21 @@ with st.form(key=f"extract_form_{pid}", clear_on_submit=False):
 
 if submitted:
     extracted[pid] = new_values
-    st.session_state["extracted_data"] = extracted
+    save("extracted_data", extracted)
     st.success("Saved.")
 
+if ai_rec and pid not in extracted:
+    st.info(
+        f"Pre-filled by the LLM from the paper's {'full text' if ai_rec.get('source') == 'pdf' else 'abstract'} "
+        "— verify the values and save."
+    )
+if ai_rec.get("evidence"):
+    with st.expander("Evidence for the pre-filled values", expanded=False):
+        for f in fields:
+            ev = ai_rec["evidence"].get(f.get("key"))
+            if ev and ev != "metadata":
+                st.markdown(f"**{f.get('name', f.get('key'))}** — {ev}")
+
 # ---------- quick jump ----------
 with st.expander("Jump to a specific paper", expanded=False):
     target = st.selectbox("Select paper", [f"{i+1}. {titles[i][:80]}" for i in range(len(titles))], index=idx)
@@ -327,42 +311,102 @@ with st.expander("Jump to a specific paper", expanded=False):
         st.session_state["extract_idx"] = max(0, min(jump_idx, len(included)-1))
         force_rerun()
 
+# ---------- AI pre-fill ----------
+st.markdown("---")
+st.subheader("🤖 AI pre-fill")
+st.caption(
+    "Fills the form for every paper in one LLM call per paper, using the passages of its stored PDF "
+    "(fetched here or on the taxonomy page) that best match each field; papers without a PDF use the abstract. "
+    "Results are checkpointed, so re-running only sends new papers. Saved values are never overwritten."
+)
+c_model, c_workers, c_pages = st.columns(3)
+with c_model:
+    ai_model = st.text_input("Model", value="gpt-oss-120b", key="c04_ai_model")
+with c_workers:
+    ai_workers = st.number_input("Papers in parallel", min_value=1, max_value=32, value=4, step=1)
+with c_pages:
+    ai_pages = st.number_input("PDF pages to read", min_value=1, max_value=50, value=10, step=1)
+ai_fresh = st.checkbox("Start over (ignore checkpointed results)", value=False)
+
+if st.button("🤖 Pre-fill all papers", use_container_width=True):
+    ai_params = {
+        "papers": included,
+        "fields": fields,
+        "pdf_ids": [canonical_paper_id(r) or pick_first(r.get("id"), r.get("arxiv_id"), r.get("doi"), f"paper_{i}")
+                    for i, r in enumerate(included)],
+        "model": ai_model,
+        "max_pages": int(ai_pages),
+        "workers": int(ai_workers),
+        "resume": not ai_fresh,
+    }
+    ensure_job("data_extraction", ai_params, "c04_extract_job", resubmit=True)
+
+extract_job = st.session_state.get("c04_extract_job")
+if extract_job:
+    job = render_job(extract_job["id"], "AI pre-fill", key="c04_extract")
+    if job["status"] == "done":
+        res = job_result(extract_job["id"]) or {}
+        if st.session_state.get("c04_extract_applied") != extract_job["id"]:
+            for i, (r, row) in enumerate(zip(included, res.get("rows") or [])):
+                if not row:
+                    continue
+                pid_i = pick_first(r.get("id"), r.get("arxiv_id"), r.get("doi"), f"paper_{i}")
+                extracted_ai[pid_i] = row
+                for f in fields:  # drop stale widget state so the new values show
+                    st.session_state.pop(f"{f.get('key')}_{pid_i}", None)
+            save("extracted_ai", extracted_ai)
+            st.session_state["c04_extract_applied"] = extract_job["id"]
+            force_rerun()
+
+        stats = res.get("stats") or {}
+        done = int(stats.get("total", 0)) - int(stats.get("remaining", 0))
+        st.success(
+            f"Pre-filled **{done} / {stats.get('total', 0)}** papers "
+            f"({stats.get('with_pdf', 0)} from full text, {stats.get('resumed', 0)} from checkpoints)."
+        )
+        if res.get("errors"):
+            st.warning(
+                ("Stopped after repeated errors. " if stats.get("stopped_early") else "")
+                + "Some papers failed (showing up to 5):\n\n"
+                + "\n".join(f"- {e}" for e in res["errors"][:5])
+            )
+
 # ---------- exports ----------
 st.markdown("---")
 st.subheader("Export")
 
 cols = ["id"] + [f.get("key") for f in fields]
-table: List[Dict] = []
-for r in included:
-    pid_i = pick_first(r.get("id"), r.get("arxiv_id"), r.get("doi"))
-    if not pid_i:
-        pid_i = ""
-    base = {"id": pid_i}
-    base.update(st.session_state.get("extracted_data", {}).get(pid_i, {}))
-    for k in cols:
-        if k not in base:
-            base[k] = ""
-    table.append(base)
-
-csv_blob  = rows_to_csv(table, cols)
-json_blob = json.dumps(table, ensure_ascii=False, indent=2)
-
-c1, c2, c3 = st.columns(3)
+
+def extracted_table():
+    """Saved values per included paper, one row at a time (built only when an export is prepared)."""
+    saved = st.session_state.get("extracted_data", {})
+    for r in included:
+        pid_i = pick_first(r.get("id"), r.get("arxiv_id"), r.get("doi"))
+        if not pid_i:
+            pid_i = ""
+        base = {"id": pid_i}
+        base.update(saved.get(pid_i, {}))
+        for k in cols:
+            if k not in base:
+                base[k] = ""
+        yield base
+
+c1, c2 = st.columns(2)
 with c1:
-    st.download_button("⬇️ Download extracted (CSV)", data=csv_blob, file_name="extracted_data.csv",
-                       mime="text/csv", use_container_width=True)
+    export_buttons("extracted", extracted_table, "extracted_data", key="c04_extracted", header=cols)
 with c2:
-    st.download_button("⬇️ Download extracted (JSON)", data=json_blob, file_name="extracted_data.json",
-                       mime="application/json", use_container_width=True)
-with c3:
-    blank_rows = [{"id": pick_first(r.get("id"), r.get("arxiv_id"), r.get("doi")) or ""} for r in included]
-    blank_cols = ["id"] + [f.get("key") for f in fields]
-    blank_csv = rows_to_csv(blank_rows, blank_cols)
-    st.download_button("⬇️ Download blank template (CSV)", data=blank_csv, file_name="extraction_template.csv",
-                       mime="text/csv", use_container_width=True)
+    export_buttons(
+        "blank template",
+        lambda: ({"id": pick_first(r.get("id"), r.get("arxiv_id"), r.get("doi")) or ""} for r in included),
+        "extraction_template",
+        key="c04_template",
+        header=cols,
+        formats=("csv",),
+    )
 
 st.caption(
     "Widgets are keyed per paper so they reset on navigation. "
     "Authors/Year/URL/Abstract are prefilled when available from arXiv metadata. "
-    "You can also fetch and download PDFs per paper from this page."
+    "You can also fetch and download PDFs per paper from this page. "
+    "AI pre-filled values are only exported once saved."
 )
@@ -1,21 +1,19 @@
 # slr/ui/pages/d01_taxonomy.py
 import sys, os, json, io, csv
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 import streamlit as st
-import requests
 
-from slr.agents.taxonomy import generate_taxonomy
+from slr.pdf.extract import extraction_available
+from slr.pdf.fetch import guess_pdf_url
+from slr.store.keys import canonical_paper_id
+from slr.store.pdfs import get_pdf_store
+from slr.ui.job_status import ensure_job, render_job, job_result
+from slr.ui.project_state import load, project_sidebar, save
 
 st.set_page_config(page_title="📚 Taxonomy generation (AI)", layout="wide")
-
-# Optional PDF → text (for full-paper taxonomy)
-try:
-    from PyPDF2 import PdfReader  # type: ignore
-except Exception:  # PyPDF2 not installed or import error
-    PdfReader = None
-
+project_sidebar()
 
 def force_rerun():
     if hasattr(st, "rerun"):
@@ -24,57 +22,6 @@ def force_rerun():
         st.experimental_rerun()
 
 
-def _guess_pdf_url(paper: Dict[str, Any]) -> str:
-    """
-    Heuristic to guess a PDF URL for a paper.
-
-    - Uses explicit `pdf_url` if present.
-    - For arXiv links (abs), converts to pdf link.
-    - Otherwise returns empty string.
-    """
-    # Explicit field from upstream pipeline
-    pdf = str(paper.get("pdf_url") or "").strip()
-    if pdf:
-        return pdf
-
-    # Look at URL / link / id / arxiv_id for arXiv patterns
-    candidates = [
-        paper.get("url"),
-        paper.get("link"),
-        paper.get("id"),
-        paper.get("arxiv_id"),
-    ]
-    for val in candidates:
-        s = str(val or "").strip()
-        if not s:
-            continue
-        if "arxiv.org" in s:
-            # normalize abs→pdf
-            if "/abs/" in s:
-                s = s.replace("/abs/", "/pdf/")
-            if not s.endswith(".pdf"):
-                s = s.rstrip("/") + ".pdf"
-            return s
-
-    return ""
-
-
-def _pdf_bytes_to_text(data: bytes, max_pages: int = 10) -> str:
-    """Best-effort: decode a PDF into plain text (first max_pages pages)."""
-    if not PdfReader:
-        # No dependency installed; caller can still rely on abstracts only.
-        return ""
-    try:
-        reader = PdfReader(io.BytesIO(data))
-        texts: List[str] = []
-        for i, page in enumerate(reader.pages[:max_pages]):
-            t = page.extract_text() or ""
-            texts.append(t)
-        return "\n\n".join(texts).strip()
-    except Exception:
-        return ""
-
-
 st.markdown("<h2>📚 Taxonomy generation (AI)</h2>", unsafe_allow_html=True)
 
 # ------------------------------------------------------------------------
@@ -82,6 +29,9 @@ st.markdown("<h2>📚 Taxonomy generation (AI)</h2>", unsafe_allow_html=True)
 # ------------------------------------------------------------------------
 included = None
 source_name = None
+load("topic", "ai_picoc", "taxonomy_ai", "quality_included")
+if not st.session_state.get("quality_included"):
+    load("screened_rows")
 
 # 1) Prefer the quality-assessed set (used by Data extraction)
 if st.session_state.get("quality_included"):
@@ -122,63 +72,76 @@ with st.expander("Input snapshot", expanded=False):
 # ------------------------------------------------------------------------
 st.markdown("### PDFs for taxonomy (optional)")
 
-# Where we store PDFs for taxonomy purposes
-pdf_store: Dict[str, Dict[str, Any]] = st.session_state.get("taxonomy_pdfs", {})
-if not isinstance(pdf_store, dict):
-    pdf_store = {}
-    st.session_state["taxonomy_pdfs"] = pdf_store
+# PDFs live on disk in the shared store (slr/store/pdfs.py), keyed by canonical paper id;
+# the session only holds ids.
+pdf_store = get_pdf_store()
+pdf_keys: List[str] = [canonical_paper_id(r) or pid for pid, r in zip(paper_ids, included)]
+
+legacy = st.session_state.pop("taxonomy_pdfs", None)  # bytes kept in the session by older versions
+if isinstance(legacy, dict):
+    for pid, key in zip(paper_ids, pdf_keys):
+        entry = legacy.get(pid)
+        if isinstance(entry, dict) and entry.get("bytes"):
+            pdf_store.add_bytes(key, entry["bytes"], url=entry.get("url", ""))
 
 # Pre-compute candidate URLs
 pdf_candidates: Dict[str, str] = {}
-for pid, paper in zip(paper_ids, included):
-    pdf_candidates[pid] = _guess_pdf_url(paper)
+for key, paper in zip(pdf_keys, included):
+    pdf_candidates[key] = guess_pdf_url(paper)
 
+stored_keys = set(pdf_store.paths(pdf_keys))
 num_candidates = sum(1 for u in pdf_candidates.values() if u)
-num_already = sum(1 for pid in paper_ids if pid in pdf_store)
+num_already = sum(1 for key in pdf_keys if key in stored_keys)
 
 st.caption(
     f"PDF candidates found for **{num_candidates} / {len(included)}** papers. "
     f"Already fetched: **{num_already}**."
 )
 
-if st.button("📥 Fetch PDFs for all candidate papers", use_container_width=True):
-    fetched = 0
-    skipped = 0
-    failures: List[str] = []
-
-    for pid, paper in zip(paper_ids, included):
-        pdf_url = pdf_candidates.get(pid) or ""
-        if not pdf_url:
-            continue
-        if pid in pdf_store:
-            skipped += 1
-            continue
-        try:
-            resp = requests.get(pdf_url, timeout=30)
-            resp.raise_for_status()
-            pdf_bytes = resp.content
-            pdf_store[pid] = {
-                "url": pdf_url,
-                "bytes": pdf_bytes,
-            }
-            fetched += 1
-        except Exception as e:
-            failures.append(f"{pid}: {e}")
-
-    st.session_state["taxonomy_pdfs"] = pdf_store
-
-    msg = f"Fetched **{fetched}** PDFs"
-    if skipped:
-        msg += f"; skipped **{skipped}** already-fetched."
-    st.success(msg)
-    if failures:
-        st.warning(
-            "Some PDFs could not be fetched (showing up to 5):\n\n"
-            + "\n".join(f"- {f}" for f in failures[:5])
-        )
-    force_rerun()
-
-if not PdfReader:
+col_fetch, col_cap = st.columns([3, 1])
+with col_cap:
+    max_mb = st.number_input(
+        "Skip PDFs larger than (MB)", min_value=0, max_value=500, value=25, step=5,
+        help="Only the first pages are used for the taxonomy; big files (supplementary material) "
+             "are skipped. 0 = no limit.",
+    )
+with col_fetch:
+    if st.button("📥 Fetch PDFs for all candidate papers", use_container_width=True):
+        # background job: keeps running across reruns; files already on disk are not downloaded again
+        items = [[key, pdf_candidates[key]] for key in dict.fromkeys(pdf_keys)
+                 if pdf_candidates.get(key) and key not in stored_keys]
+        ensure_job("pdf_fetch", {"items": items, "max_bytes": int(max_mb) * 1024 * 1024},
+                   "d01_pdf_job", resubmit=True)
+
+pdf_job = st.session_state.get("d01_pdf_job")
+if pdf_job:
+    job = render_job(pdf_job["id"], "Fetching PDFs", key="d01_pdf")
+    if job["status"] == "done":
+        res = job_result(pdf_job["id"]) or {}
+        if st.session_state.get("d01_pdf_applied") != pdf_job["id"]:
+            st.session_state["d01_pdf_applied"] = pdf_job["id"]
+            force_rerun()  # refresh the counts above
+
+        stats = res.get("stats") or {}
+        msg = f"Fetched **{stats.get('fetched', 0)}** PDFs"
+        already = int(stats.get("cached", 0)) + int(stats.get("stored", 0))
+        if already:
+            msg += f"; **{already}** were already downloaded"
+        st.success(msg + f" ({stats.get('seconds', 0)} s).")
+        failures = [f"{pid}: {err}" for pid, err in (res.get("failed") or {}).items()]
+        if failures:
+            st.warning(
+                "Some PDFs could not be fetched (showing up to 5):\n\n"
+                + "\n".join(f"- {f}" for f in failures[:5])
+            )
+        skips = [f"{pid}: {why}" for pid, why in (res.get("skipped") or {}).items()]
+        if skips:
+            st.info(
+                f"Skipped **{len(skips)}** downloads (showing up to 5):\n\n"
+                + "\n".join(f"- {f}" for f in skips[:5])
+            )
+
+if not extraction_available():
     st.info(
         "PyPDF2 is not installed, so taxonomy will still rely mainly on titles & abstracts. "
         "Install `PyPDF2` if you want full-text snippets from PDFs."
@@ -187,6 +150,22 @@ if not PdfReader:
 # ------------------------------------------------------------------------
 # Taxonomy generation controls
 # ------------------------------------------------------------------------
+ENGINES = {
+    "Single prompt (up to max papers)": "single",
+    "Cluster-first (all papers)": "cluster",
+    "Map-reduce (all papers)": "map_reduce",
+}
+engine_label = st.radio(
+    "Engine",
+    list(ENGINES),
+    index=1 if len(included) > 60 else 0,
+    horizontal=True,
+    help="Cluster-first embeds and clusters every paper; the LLM only names the clusters "
+         "(at most 1 + max children calls). Map-reduce drafts partial taxonomies for chunks of "
+         "papers in parallel and merges them. Neither has a paper cap.",
+)
+method = ENGINES[engine_label]
+
 c1, c2, c3, c4 = st.columns([1, 1, 1, 1.3])
 with c1:
     depth = st.selectbox("Depth", [2, 3], index=0)
@@ -200,6 +179,7 @@ with c3:
         value=60,
         step=10,
         help="Trim to avoid 502s. You can re-run with a higher number if stable.",
+        disabled=method != "single",
     )
 with c4:
     abs_len = st.slider(
@@ -211,40 +191,23 @@ with c4:
         help="Shorter → smaller payload. 0 disables abstracts.",
     )
 
+SNIPPETS = {"Most relevant passages": "relevant", "Beginning of the paper": "head"}
+snippet_label = st.radio(
+    "Full-text snippets (fetched PDFs)",
+    list(SNIPPETS),
+    horizontal=True,
+    help="Relevant passages: the parts of each PDF closest to the PICOC and research questions "
+         "(embedding search, ~800 characters per paper). Beginning: the first 800 characters.",
+    disabled=not stored_keys,
+)
+
 # ------------------------------------------------------------------------
 # Generate taxonomy
 # ------------------------------------------------------------------------
 
-if st.button("🚀 Generate taxonomy (AI)", use_container_width=True):
-    # Build full-text list from any fetched PDFs (same order as titles/paper_ids)
-    full_texts: Optional[List[str]] = None
-    if pdf_store and PdfReader:
-        full_texts = []
-        for pid in paper_ids:
-            entry = pdf_store.get(pid)
-            if entry and entry.get("bytes"):
-                txt = _pdf_bytes_to_text(entry["bytes"])
-            else:
-                txt = ""
-            full_texts.append(txt)
-
-    with st.spinner("Calling LLM to draft taxonomy..."):
-        data = generate_taxonomy(
-            titles=titles,
-            paper_ids=paper_ids,
-            abstracts=abstracts if abs_len > 0 else None,
-            full_texts=full_texts,                  # 👈 NOW USED
-            picoc=ai_picoc,
-            rqs=rq_list,
-            depth=int(depth),
-            max_children_per_node=int(max_children),
-            max_papers=int(max_papers),
-            abs_snip_len=int(abs_len),
-            full_snip_len=800,                      # chars per paper from PDF
-        )
-
+def apply_taxonomy_result(data: Dict[str, Any]) -> None:
     # Save raw LLM output
-    st.session_state["taxonomy_ai"] = data
+    save("taxonomy_ai", data)
 
     # ---- prepare tree + assignments for visualization ----
     topic = st.session_state.get("topic", "") or "Root topic"
@@ -258,14 +221,44 @@ if st.button("🚀 Generate taxonomy (AI)", use_container_width=True):
     else:
         tree_for_viz = raw_tree
 
-    st.session_state["taxonomy_tree"] = tree_for_viz
-    st.session_state["taxonomy_assignments"] = data.get("mapping", [])
+    save("taxonomy_tree", tree_for_viz)
+    save("taxonomy_assignments", data.get("mapping", []))
 
-    if data.get("taxonomy", {}).get("children"):
-        st.success("Draft taxonomy generated.")
-    else:
-        st.warning(f"LLM returned empty taxonomy. Notes: {data.get('notes')}")
-    force_rerun()
+
+if st.button("🚀 Generate taxonomy (AI)", use_container_width=True):
+    # Full text from fetched PDFs is extracted inside the job (process pool, cached per PDF);
+    # pdf_ids is aligned with titles/paper_ids.
+    use_pdfs = bool(stored_keys) and extraction_available()
+
+    job_params = dict(
+        method=method,
+        titles=titles,
+        paper_ids=paper_ids,
+        abstracts=abstracts if abs_len > 0 else None,
+        pdf_ids=pdf_keys if use_pdfs else None,
+        pdf_max_pages=10,
+        picoc=ai_picoc,
+        rqs=rq_list,
+        depth=int(depth),
+        max_children_per_node=int(max_children),
+        max_papers=int(max_papers),
+        abs_snip_len=int(abs_len),
+        full_snip_len=800,                      # chars per paper from PDF
+        snippets=SNIPPETS[snippet_label],
+    )
+    ensure_job("taxonomy", job_params, "d01_taxonomy_job", resubmit=True)
+
+tax_job = st.session_state.get("d01_taxonomy_job")
+if tax_job:
+    job = render_job(tax_job["id"], "Taxonomy generation")
+    if job["status"] == "done" and st.session_state.get("d01_taxonomy_applied") != tax_job["id"]:
+        data = job_result(tax_job["id"]) or {}
+        apply_taxonomy_result(data)
+        st.session_state["d01_taxonomy_applied"] = tax_job["id"]
+        if data.get("taxonomy", {}).get("children"):
+            st.success("Draft taxonomy generated.")
+        else:
+            st.warning(f"LLM returned empty taxonomy. Notes: {data.get('notes')}")
 
 # ------------------------------------------------------------------------
 # Preview + downloads
@@ -293,6 +286,70 @@ if isinstance(data, dict):
     st.write(f"{len(mapping)} assignments")
     st.dataframe(mapping, use_container_width=True, height=360)
 
+    # ---- papers that are not in the mapping yet (e.g. after a delta harvest) ----
+    mapped_ids = {str(m.get("paper_id", "")) for m in mapping}
+    unmapped = [i for i, pid in enumerate(paper_ids) if pid not in mapped_ids]
+    if unmapped and data.get("taxonomy", {}).get("children"):
+        st.markdown("### New papers")
+        UPDATE_MODES = {
+            "Update taxonomy (add or split nodes where needed)": "taxonomy_update",
+            "Only place into existing leaves": "taxonomy_assign",
+        }
+        upd_label = st.radio("Mode", list(UPDATE_MODES), horizontal=True)
+        upd_kind = UPDATE_MODES[upd_label]
+        a1, a2, a3 = st.columns([1, 1, 2])
+        with a1:
+            min_conf = st.slider(
+                "Min confidence (else ask LLM)", 0.0, 1.0, 0.5, 0.05,
+                help="Papers whose nearest leaf is less certain than this are assigned by the LLM.",
+            )
+        with a2:
+            max_leaf = st.number_input(
+                "Split leaves above", min_value=5, max_value=500, value=40, step=5,
+                help="A leaf that receives new papers and then holds more papers than this is split by the LLM.",
+                disabled=upd_kind != "taxonomy_update",
+            )
+        with a3:
+            st.caption(
+                f"**{len(unmapped)}** papers are not in the mapping. They are matched to the nearest leaf "
+                "by embedding; only low-confidence ones go to the LLM. In update mode, papers that fit no "
+                "leaf get new nodes and overfull leaves are split; everything else keeps its place."
+            )
+        if st.button(f"🧭 Add {len(unmapped)} papers to this taxonomy", use_container_width=True):
+            params = dict(
+                tree=data["taxonomy"],
+                titles=[titles[i] for i in unmapped],
+                paper_ids=[paper_ids[i] for i in unmapped],
+                abstracts=[abstracts[i] for i in unmapped],
+                mapping=mapping,
+                min_confidence=float(min_conf),
+            )
+            if upd_kind == "taxonomy_update":
+                # the update sees all papers; those already mapped keep their leaf
+                params.update(
+                    titles=titles, paper_ids=paper_ids, abstracts=abstracts,
+                    picoc=ai_picoc, rqs=rq_list, depth=int(depth),
+                    max_children_per_node=int(max_children), max_leaf_size=int(max_leaf),
+                )
+            ensure_job(upd_kind, params, "d01_assign_job", resubmit=True)
+
+    assign_job = st.session_state.get("d01_assign_job")
+    if assign_job:
+        job = render_job(assign_job["id"], "Adding papers to the taxonomy", key="d01_assign")
+        if job["status"] == "done":
+            res = job_result(assign_job["id"]) or {}
+            if st.session_state.get("d01_assign_applied") != assign_job["id"]:
+                if res.get("taxonomy"):
+                    # incremental update: new tree + full mapping
+                    data = {**data, "taxonomy": res["taxonomy"], "mapping": res.get("mapping", [])}
+                else:
+                    new_ids = {m["paper_id"] for m in res.get("mapping", [])}
+                    data["mapping"] = [m for m in mapping if str(m.get("paper_id", "")) not in new_ids] + res.get("mapping", [])
+                apply_taxonomy_result(data)
+                st.session_state["d01_assign_applied"] = assign_job["id"]
+                force_rerun()  # show the updated tree and mapping above
+            st.success(res.get("notes") or "Papers added.")
+
     st.markdown("---")
     tax_json = json.dumps(data, ensure_ascii=False, indent=2)
     st.download_button(
@@ -1,15 +1,23 @@
 # slr/ui/pages/d02_taxonomy_viz.py
+from __future__ import annotations
 import sys, os, json, io, csv
-from typing import Optional, List, Dict
+from typing import TYPE_CHECKING, Optional, List, Dict
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import graphviz
+
+from slr.ui.job_status import ensure_job, job_result, render_job
+from slr.ui.project_state import load, project_sidebar, save
+
+# pandas / plotly / graphviz are imported where they are first needed, so the
+# page (and its "no taxonomy" state) renders without paying for them
+if TYPE_CHECKING:
+    import graphviz
+    import pandas as pd
 
 st.set_page_config(page_title="Taxonomy Visualization", layout="wide")
+project_sidebar()
 
 # --------------------------------------------------------------------------------------
 # Helpers
@@ -70,6 +78,8 @@ def taxonomy_to_rows(node: dict, path: Optional[List[str]] = None) -> List[Dict]
 
 def df_from_assignments(assignments: List[Dict]) -> pd.DataFrame:
     """Expect each assignment: {'paper_id': 'paper_0', 'title': '...', 'path': ['X','Y','Z']}"""
+    import pandas as pd
+
     # Make path a printable string
     rows = []
     for a in assignments:
@@ -86,6 +96,7 @@ def df_from_assignments(assignments: List[Dict]) -> pd.DataFrame:
 st.markdown("## 📚 Taxonomy Visualization")
 
 # NEW: prefer the wrapped tree & assignments prepared in d01_Taxonomy
+load("taxonomy_tree", "taxonomy_assignments", "taxonomy_ai")
 tree = st.session_state.get("taxonomy_tree")
 assignments = st.session_state.get("taxonomy_assignments", [])
 
@@ -116,6 +127,43 @@ if not tree:
     )
     st.stop()
 
+# --------------------------------------------------------------------------------------
+# Assign papers to this taxonomy (e.g. an uploaded one) without regenerating it
+# --------------------------------------------------------------------------------------
+load("quality_included")
+if not st.session_state.get("quality_included"):
+    load("screened_rows")
+papers = st.session_state.get("quality_included") or st.session_state.get("screened_rows") or []
+if papers:
+    with st.expander(f"Assign the {len(papers)} current papers to this taxonomy", expanded=False):
+        st.caption(
+            "Each paper goes to the nearest leaf by embedding (leaf path + description + papers already "
+            "assigned to it); only papers below the confidence threshold are sent to the LLM."
+        )
+        min_conf = st.slider("Min confidence (else ask LLM)", 0.0, 1.0, 0.5, 0.05, key="d02_min_conf")
+        if st.button("🧭 Assign papers", use_container_width=True):
+            ensure_job(
+                "taxonomy_assign",
+                dict(
+                    tree=tree,
+                    titles=[str(r.get("title", "")) for r in papers],
+                    paper_ids=[str(r.get("id", "")) or f"paper_{i}" for i, r in enumerate(papers)],
+                    abstracts=[str(r.get("summary", "")) for r in papers],
+                    mapping=assignments,
+                    min_confidence=float(min_conf),
+                ),
+                "d02_assign_job",
+                resubmit=True,
+            )
+        assign_job = st.session_state.get("d02_assign_job")
+        if assign_job:
+            job = render_job(assign_job["id"], "Taxonomy assignment", key="d02_assign")
+            if job["status"] == "done":
+                res = job_result(assign_job["id"]) or {}
+                assignments = res.get("mapping", [])
+                save("taxonomy_assignments", assignments)
+                st.success(res.get("notes") or "Papers assigned.")
+
 # --------------------------------------------------------------------------------------
 # Graphviz Tree (your hand-drawn style)
 # --------------------------------------------------------------------------------------
@@ -124,6 +172,8 @@ st.markdown("### 🌳 Taxonomy (Tree view)")
 col_gv, col_info = st.columns([2, 1])
 with col_gv:
     try:
+        import graphviz
+
         dot = graphviz.Digraph(
             "taxonomy",
             graph_attr={"rankdir": "TB"},
@@ -145,6 +195,9 @@ with col_info:
 # --------------------------------------------------------------------------------------
 # Treemap & Sunburst
 # --------------------------------------------------------------------------------------
+import pandas as pd
+import plotly.express as px
+
 rows = taxonomy_to_rows(tree)
 df = pd.DataFrame(rows)
 max_depth = max(len(p) for p in df["path"]) if not df.empty else 1
@@ -1,66 +1,17 @@
 # slr/ui/picoc_synonyms.py
-import sys, os, json, hashlib, re
+import sys, os, json, hashlib
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 import streamlit as st
 from slr.ui.theme import inject_css
 from slr.agents.agent import run_define_picoc
+from slr.ui.project_state import load, project_sidebar, save
+from slr.store.memo import get_memo
 
 # === SBERT (minimal; score-only control) ======================================
-from typing import List, Sequence, Tuple, Optional
-import torch
-from sentence_transformers import SentenceTransformer, util
-
-DEFAULT_SBERT_MODEL = os.getenv("SBERT_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
-
-@st.cache_resource(show_spinner=False)
-def _load_sbert(model_name: str = DEFAULT_SBERT_MODEL, device: Optional[str] = None) -> SentenceTransformer:
-    dev = device or ("cuda" if torch.cuda.is_available() else "cpu")
-    return SentenceTransformer(model_name, device=dev)
-
-def _norm(t: str) -> str:
-    t = (t or "").strip()
-    return re.sub(r"\s+", " ", t)
-
-def _sbert_filter(
-    base_term: str,
-    candidates: Sequence[str],
-    *,
-    context: str = "",
-    min_score: float = 0.70,
-    alpha: float = 0.7,   # weight for base vs. context (kept fixed; only score is user-controlled)
-) -> List[Tuple[str, float]]:
-    """
-    Returns [(candidate, score)] with score >= min_score, sorted desc.
-    """
-    base = _norm(base_term)
-    cands = [c.strip() for c in candidates if isinstance(c, str) and c.strip()]
-    if not base or not cands:
-        return []
-
-    model = _load_sbert()
-    ref_texts = [base]
-    ctx = _norm(context)
-    if ctx:
-        ref_texts.append(ctx)
-
-    ref_embs = model.encode(ref_texts, convert_to_tensor=True, normalize_embeddings=True)
-    cand_embs = model.encode(cands, convert_to_tensor=True, normalize_embeddings=True)
-
-    if ref_embs.dim() == 1:
-        ref_embs = ref_embs.unsqueeze(0)
-
-    if len(ref_texts) == 1:
-        ref_emb = ref_embs[0:1]
-    else:
-        base_emb = ref_embs[0]
-        ctx_emb = ref_embs[1:].mean(dim=0)
-        ref_emb = (alpha * base_emb + (1.0 - alpha) * ctx_emb).unsqueeze(0)
-
-    sims = util.cos_sim(ref_emb, cand_embs).squeeze(0)  # [num_candidates]
-    pairs = [(cands[i], float(sims[i])) for i in range(len(cands))]
-    pairs.sort(key=lambda x: x[1], reverse=True)
-    return [(t, s) for (t, s) in pairs if s >= float(min_score)]
+from slr.embed.sbert import DEFAULT_SBERT_MODEL, paper_texts, warm_up
+from slr.embed.expansion import expand_facets, get_phrase_index
+from slr.embed.synonyms import filter_scored, score_facet_synonyms, scores_key
 # ==============================================================================
 
 # --- PICOC short definitions for hover help icons ---
@@ -76,6 +27,8 @@ PICOC_HELP = {
 # ---------------- UI setup ----------------
 st.set_page_config(page_title="Planning → Step 1: PICOC & Synonyms", layout="wide")
 inject_css()  # shared styles for all pages
+project_sidebar()
+load("topic", "ai_picoc", "ai_syns_original", "selected_synonyms")
 
 # --- page title ---
 st.markdown(
@@ -133,10 +86,10 @@ if gen_clicked:
 
 
     # persist for later steps/pages
-    st.session_state["topic"] = seed
-    st.session_state["ai_picoc"] = data.get("picoc", {})
-    st.session_state["ai_syns_original"] = data.get("synonyms", {})  # keep original
-    st.session_state["selected_synonyms"] = {}   # reset selections for a fresh run
+    save("topic", seed)
+    save("ai_picoc", data.get("picoc", {}))
+    save("ai_syns_original", data.get("synonyms", {}))  # keep original
+    save("selected_synonyms", {})   # reset selections for a fresh run
 
 st.markdown("""
 <style>
@@ -190,24 +143,34 @@ if ai_picoc and ai_syns_original:
     # SBERT-verified synonyms
     context_text = _picoc_context_str(ai_picoc, st.session_state.get("topic", ""))
 
-    def sbert_verify_facet(facet_name: str, base_text: str, items: list[str]) -> list[str]:
-        if not items:
-            return []
-        scored = _sbert_filter(
-            base_text,
-            items,
-            context=context_text,
-            min_score=float(sbert_min)
-        )
-        return [t for (t, _) in scored]
-
-    ai_syns_filtered = {
-        "Population":   sbert_verify_facet("Population",   ai_picoc.get("population", ""),   ai_syns_original.get("Population", [])),
-        "Intervention": sbert_verify_facet("Intervention", ai_picoc.get("intervention", ""), ai_syns_original.get("Intervention", [])),
-        "Comparison":   sbert_verify_facet("Comparison",   ai_picoc.get("comparison", ""),   ai_syns_original.get("Comparison", [])),
-        "Outcome":      sbert_verify_facet("Outcome",      ai_picoc.get("outcome", ""),      ai_syns_original.get("Outcome", [])),
-        "Context":      sbert_verify_facet("Context",      ai_picoc.get("context", ""),      ai_syns_original.get("Context", [])),
-    }
+    # Score all facets once per (PICOC, synonyms); the slider only filters these scores
+    sk = scores_key(ai_picoc, ai_syns_original, context_text)
+    cached = st.session_state.get("sbert_scores")
+    if not isinstance(cached, dict) or cached.get("key") != sk:
+        with st.spinner("Scoring synonyms with SBERT…"):
+            cached = {"key": sk, "scores": score_facet_synonyms(ai_picoc, ai_syns_original, context=context_text)}
+        st.session_state["sbert_scores"] = cached
+    ai_syns_filtered = filter_scored(cached["scores"], sbert_min)
+
+    # Local expansion from harvested papers (phrases embedded once; no LLM call)
+    load("gathered_rows")  # only read from the project store once PICOC exists
+    corpus_rows = st.session_state.get("gathered_rows") or []
+    corpus_suggestions: dict = {}
+    if corpus_rows:
+        # rows loaded through project_state are registered with the memo: neither is re-hashed per rerun
+        corpus_texts = get_memo().run("paper_texts", paper_texts, corpus_rows)
+        ck = get_memo().fingerprint(corpus_rows)
+        if st.session_state.get("corpus_phrases_key") == ck:
+            corpus_suggestions = expand_facets(get_phrase_index(corpus_texts, key=ck), ai_picoc, ai_syns_filtered)
+        elif st.button(
+            f"🔎 Suggest more terms from the {len(corpus_rows)} harvested papers",
+            help="Mines phrases from titles and abstracts of the last harvest and proposes the ones "
+                 "closest to each facet (embedding similarity + corpus frequency).",
+        ):
+            with st.spinner("Mining and embedding corpus phrases (first time only)…"):
+                get_phrase_index(corpus_texts, key=ck)
+            st.session_state["corpus_phrases_key"] = ck
+            st.rerun()
 
     st.subheader("Facet-wise synonyms (select what to keep)")
     prev_sel = st.session_state.get("selected_synonyms", {})
@@ -248,8 +211,20 @@ if ai_picoc and ai_syns_original:
 
             curated[facet] = checklist(facet, items)
 
-    st.session_state["ai_syns"] = ai_syns_filtered
-    st.session_state["selected_synonyms"] = curated
+            sugg = corpus_suggestions.get(facet) or []
+            if sugg:
+                info = {p: (sim, cnt) for p, _, sim, cnt in sugg}
+                extra = st.multiselect(
+                    "Add from corpus",
+                    options=[p for p, *_ in sugg],
+                    default=[t for t in prev_sel.get(facet, []) if t in info],
+                    format_func=lambda p, info=info: f"{p} ({info[p][0]:.2f}, ×{info[p][1]})",
+                    key=f"corpus_{facet}_{key_suffix}",
+                )
+                curated[facet] += [t for t in extra if t not in curated[facet]]
+
+    save("ai_syns", ai_syns_filtered)
+    save("selected_synonyms", curated)
 
     st.markdown("---")
     st.write("**Selected counts:**", {k: len(v) for k, v in curated.items()})
@@ -260,6 +235,7 @@ if ai_picoc and ai_syns_original:
         "picoc": ai_picoc,
         "synonyms_all": ai_syns_original,
         "synonyms_sbert_filtered": ai_syns_filtered,
+        "synonyms_sbert_scores": {f: [[t, round(sc, 4)] for t, sc in pairs] for f, pairs in cached["scores"].items()},
         "synonyms_selected": curated,
         "sbert_min": float(sbert_min),
         "sbert_model": DEFAULT_SBERT_MODEL,
@@ -274,3 +250,7 @@ if ai_picoc and ai_syns_original:
     )
 else:
     st.info("Enter a topic and click **Generate PICOC & Synonyms (AI)**.")
+
+# Page is rendered: load SBERT in the background so synonym scoring is ready
+# by the time the LLM returns (torch is never imported on the render path)
+warm_up()
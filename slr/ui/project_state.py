@@ -0,0 +1,115 @@
+# slr/ui/project_state.py
+"""
+Session <-> project store bridge for the pages.
+
+st.session_state stays the in-page working copy; the project store
+(slr/store/project.py) is the durable copy that survives restarts and is
+shared by every browser session on the same project.
+
+- load(*keys)         fill missing session keys from the store (only the keys a page needs)
+- save(key, value)    set the session key and persist it (skipped when unchanged)
+- ingest_upload(key, file)  stream an uploaded CSV/JSON/JSONL list into the store, then load it
+- project_sidebar()   project picker; switching drops the loaded keys
+
+The current project comes from the sidebar, else $SLR_PROJECT, else "default".
+"""
+import os
+import re
+from typing import Any, Dict
+
+import streamlit as st
+
+from slr.store.ingest import ingest
+from slr.store.memo import get_memo
+from slr.store.project import ROW_LISTS, fingerprint, get_project_store, list_projects
+from slr.ui.job_status import force_rerun
+
+PROJECT_ENV = "SLR_PROJECT"
+_SAVED = "_project_saved"  # {key: fingerprint} of what this session last loaded/saved
+
+
+def project_slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", (name or "").strip()).strip("._") or "default"
+
+
+def current_project() -> str:
+    return project_slug(st.session_state.get("slr_project") or os.getenv(PROJECT_ENV) or "default")
+
+
+def project_store():
+    return get_project_store(current_project())
+
+
+def _saved() -> Dict[str, str]:
+    return st.session_state.setdefault(_SAVED, {})
+
+
+def load(*keys: str) -> None:
+    """Read `keys` that are not in the session yet from the project store."""
+    store = project_store()
+    for key in keys:
+        if key in st.session_state:
+            continue
+        if key in ROW_LISTS:
+            value = store.get_rows(key)
+            fp = store.list_fingerprint(key)
+        else:
+            value = store.get_artifact(key)
+            fp = ""
+        if value is not None:
+            st.session_state[key] = value
+            _saved()[key] = fp or fingerprint(value)
+            if key in ROW_LISTS:
+                get_memo().register(value, _saved()[key])
+
+
+def save(key: str, value: Any) -> None:
+    """Set st.session_state[key] and write it to the project store if it changed."""
+    st.session_state[key] = value
+    if key in ROW_LISTS:
+        # row lists are not mutated in place, so a list seen before is not re-hashed (slr/store/memo.py)
+        fp = get_memo().fingerprint(value)
+        get_memo().register(value, fp)
+    else:
+        fp = fingerprint(value)
+    if _saved().get(key) == fp:
+        return
+    store = project_store()
+    if key in ROW_LISTS:
+        if store.list_fingerprint(key) != fp:  # another session may have written the same rows
+            store.put_rows(key, value or [], fp=fp)
+    else:
+        store.put_artifact(key, value)
+    _saved()[key] = fp
+
+
+def ingest_upload(key: str, uploaded: Any) -> Dict[str, Any]:
+    """
+    Parse an uploaded file incrementally straight into the project list `key`
+    (see slr/store/ingest.py) and load the result into the session.
+    Returns {"format", "rows", "skipped"}.
+    """
+    uploaded.seek(0)
+    stats = ingest(uploaded, uploaded.name, project_store(), key)
+    st.session_state.pop(key, None)
+    _saved().pop(key, None)
+    load(key)
+    return stats
+
+
+def project_sidebar() -> None:
+    """Project picker in the sidebar; switching projects reloads every page's data from the store."""
+    names = list(dict.fromkeys([current_project(), *list_projects()]))
+    with st.sidebar:
+        choice = st.selectbox("Project", names, index=0, key="slr_project_pick",
+                              help="Everything you enter is saved to this project and survives restarts.")
+        new = st.text_input("New project", value="", key="slr_project_new", placeholder="name, then Enter")
+    target = project_slug(new) if new.strip() else choice
+    if target != current_project():
+        for key in list(_saved()):
+            st.session_state.pop(key, None)
+        st.session_state[_SAVED] = {}
+        st.session_state["slr_project"] = target
+        for widget in ("slr_project_pick", "slr_project_new"):
+            st.session_state.pop(widget, None)
+        force_rerun()
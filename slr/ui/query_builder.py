@@ -5,6 +5,7 @@ import json
 import streamlit as st
 from slr.query.builder import build_boolean_query
 from slr.query.adapters.arxiv import build_arxiv_query, arxiv_api_url
+from slr.ui.project_state import load
 
 st.set_page_config(page_title="Planning → Step 2: Query Builder (arXiv)", layout="wide")
 
@@ -14,6 +15,7 @@ st.markdown(
 )
 
 # pull curated selections from step 1
+load("selected_synonyms", "ai_picoc", "topic")
 selected = st.session_state.get("selected_synonyms", {})
 picoc = st.session_state.get("ai_picoc", {})
 topic = st.session_state.get("topic", "")
@@ -0,0 +1,59 @@
+# tests/test_sbert_onnx_parity.py
+"""
+Parity between the int8 ONNX Runtime backend and torch SentenceTransformer.
+
+Both encode the same fixed texts; every pair of vectors must be close in
+cosine (same threshold as the benchmark's --min-cos default). Skipped when
+torch, sentence-transformers or onnxruntime are not installed, or when the
+model cannot be loaded (offline without a cached copy).
+
+The throughput side lives in `python -m slr.tools.bench_sbert_backends`.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("transformers")
+pytest.importorskip("onnxruntime")
+
+from slr.embed.onnx_backend import OnnxEncoder, export_onnx  # noqa: E402
+from slr.embed.sbert import DEFAULT_SBERT_MODEL  # noqa: E402
+
+MIN_COS = 0.98
+
+TEXTS = [
+    "A systematic literature review of parallel sorting algorithms on GPUs.",
+    "Merge sort and quicksort compared on cache-efficient multicore machines.",
+    "Screening abstracts with large language models for evidence synthesis.",
+    "Transformer embeddings for dense retrieval of scientific papers.",
+    "Energy consumption of distributed training for graph neural networks.",
+    "Radix sort",
+    "Inclusion and exclusion criteria were applied independently by two reviewers, "
+    "and disagreements were resolved by discussion until consensus was reached.",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    out = str(tmp_path_factory.mktemp("onnx"))
+    try:
+        return export_onnx(DEFAULT_SBERT_MODEL, out, quantize=True)
+    except OSError as e:  # model not downloadable here
+        pytest.skip(f"cannot load {DEFAULT_SBERT_MODEL}: {e}")
+
+
+def test_int8_onnx_matches_torch(model_dir):
+    from sentence_transformers import SentenceTransformer
+
+    onnx = OnnxEncoder(model_dir, quantized=True)
+    assert onnx.model_path.endswith("model.int8.onnx")
+    torch_model = SentenceTransformer(DEFAULT_SBERT_MODEL, device="cpu")
+
+    A = np.asarray(torch_model.encode(TEXTS, normalize_embeddings=True, convert_to_numpy=True), dtype=np.float32)
+    B = onnx.encode(TEXTS, normalize_embeddings=True)
+
+    assert B.shape == A.shape
+    cos = np.sum(A * B, axis=1)
+    assert float(cos.min()) >= MIN_COS, dict(zip(TEXTS, cos.round(4)))